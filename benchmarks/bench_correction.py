@@ -0,0 +1,70 @@
+from benchmarks.common import measure, make_dead_reckoned_lap
+from benchmarks.bench_fusion import map_error
+from ir_map.model.track_correction import ClosureMode, close_loop, closure_error, correct_lap, savgol_smooth
+from ir_map.model.track_fusion import similarity_transform
+from ir_map.model.track_generator import TrackGenerator
+import numpy as np
+
+N_LAPS = 6
+N_SAMPLES = 5000
+LONG_SAMPLES = 100000
+
+
+def smooth_track(n: int = 20000) -> np.ndarray:
+    # a smooth closed curve about 7 km long, LapDistPct by arc length, so the
+    # only roughness in a map of it is what the reconstruction adds
+    theta = np.linspace(0, 2 * np.pi, n + 1)
+    radius = 1000 * (1 + 0.3 * np.sin(3 * theta) + 0.1 * np.cos(5 * theta))
+    xy = np.column_stack((radius * np.cos(theta), radius * np.sin(theta)))
+    arc_length = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(xy, axis=0).T))))
+    return np.column_stack((xy, arc_length / arc_length[-1], np.ones(n + 1)))
+
+
+def roughness(points: np.ndarray, truth: np.ndarray) -> float:
+    # rms of the second difference of the map less the true one, after the
+    # best fit onto the truth
+    points = points[points[:, 2] < 1.0]
+    true_xy = np.column_stack([np.interp(points[:, 2], truth[:, 2], truth[:, i]) for i in (0, 1)])
+    scale, rotation, offset = similarity_transform(points[:, :2], true_xy)
+    fitted = scale * points[:, :2] @ rotation.T + offset
+    second = np.diff(fitted, 2, axis=0) - np.diff(true_xy, 2, axis=0)
+    return np.sqrt((second ** 2).sum(axis=1).mean())
+
+
+def run(n_laps: int = N_LAPS) -> dict:
+    truth = smooth_track()
+    length = np.hypot(*np.diff(truth[:, :2], axis=0).T).sum()
+    laps = [make_dead_reckoned_lap(truth, N_SAMPLES, seed, drift=3.0) for seed in range(n_laps)]
+    generator = TrackGenerator()
+    results = {}
+
+    gaps = [np.hypot(*closure_error(lap)[0]) / length for lap in laps]
+    results['closure error before (x1e5 of lap)'] = int(1e5 * np.mean(gaps) + 0.5)
+    for mode in ClosureMode:
+        gaps = [np.hypot(*closure_error(close_loop(lap, mode))[0]) / length for lap in laps]
+        results[f'closure error after {mode.value} (x1e5 of lap)'] = int(1e5 * np.mean(gaps) + 0.5)
+
+    # map error of one corrected lap, mean over the laps; smoothing is the
+    # same whatever the closure, an open lap is smoothed as it is
+    for mode in ClosureMode:
+        for smoothing in (0.0, None):
+            label = f'{mode.value}{" + savgol" if smoothing is None else ""}'
+            kwargs = {} if smoothing is None else {'smoothing': smoothing}
+            maps = [generator.resample_points(correct_lap(lap, mode, **kwargs)) for lap in laps]
+            results[f'{label}: map error (x1e5 of lap)'] = int(1e5 * np.mean([map_error(m, truth) for m in maps]) + 0.5)
+            if mode == ClosureMode.LEAST_SQUARES:
+                results[f'{label}: roughness (x1000)'] = int(1000 * np.mean([roughness(m, truth) for m in maps]) + 0.5)
+    results['none + savgol: laps smoothed'] = sum(not np.allclose(correct_lap(lap, ClosureMode.NONE), lap) for lap in laps)
+
+    long_lap = make_dead_reckoned_lap(truth, LONG_SAMPLES, 0)
+    results[f'close_loop arc_length {LONG_SAMPLES}'] = measure(lambda: close_loop(long_lap, ClosureMode.ARC_LENGTH), repeat=5)
+    results[f'close_loop least_squares {LONG_SAMPLES}'] = measure(lambda: close_loop(long_lap, ClosureMode.LEAST_SQUARES), repeat=5)
+    window = int(0.004 * LONG_SAMPLES)
+    results[f'savgol_smooth {LONG_SAMPLES}'] = measure(lambda: savgol_smooth(long_lap[:, :2], window), repeat=5)
+    results[f'correct_lap {LONG_SAMPLES}'] = measure(lambda: correct_lap(long_lap), repeat=5)
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results(f'loop closure and smoothing, {N_LAPS} dead-reckoned laps', run())
@@ -0,0 +1,73 @@
+from benchmarks.common import measure, synthetic_telemetry
+from ir_map.model.dead_reckoning import SAMPLE_COLUMNS, dead_reckon, sample_row
+from ir_map.model.point_buffer import PointBuffer
+from ir_map.model.track_generator import TrackGenerator
+import numpy as np
+import math
+
+SAMPLES_PER_LAP = 3600
+
+
+def random_samples(n: int, seed: int = 0) -> np.ndarray:
+    # a car weaving about at 60 Hz with some jitter in the tick times
+    rng = np.random.default_rng(seed)
+    return np.column_stack((
+        rng.uniform(10, 80, n),
+        rng.normal(0, 1, n),
+        np.cumsum(rng.normal(0, 0.02, n)) % (2 * np.pi) - np.pi,
+        np.cumsum(rng.uniform(0.9, 1.1, n) / 60),
+        np.arange(n) / n,
+    ))
+
+
+def scalar_collect(samples: np.ndarray) -> np.ndarray:
+    # the per-tick integration TrackGenerator.generate did before, kept as reference
+    point_store = PointBuffer(columns=4, max_length=TrackGenerator.MAX_POINTS)
+    prev_session_time = 0
+    last_x = last_y = 0
+    for vel_x, vel_y, yaw_north, session_time, ld_pct in samples:
+        delta_time = session_time - prev_session_time
+        prev_session_time = session_time
+        w_vel_x = vel_x * math.cos(yaw_north) - vel_y * math.sin(yaw_north)
+        w_vel_y = vel_x * math.sin(yaw_north) + vel_y * math.cos(yaw_north)
+        if len(point_store) > 0:
+            last_x, last_y = last_x + w_vel_x * delta_time, last_y - w_vel_y * delta_time
+        point_store.append((last_x, last_y, ld_pct, 1))
+    return point_store.snapshot().copy()
+
+
+def batch_collect(samples: np.ndarray) -> np.ndarray:
+    sample_store = PointBuffer(columns=SAMPLE_COLUMNS, max_length=TrackGenerator.MAX_POINTS)
+    for row in samples:
+        sample_store.append(row)
+    return dead_reckon(sample_store.snapshot())
+
+
+def run(samples_per_lap: int = SAMPLES_PER_LAP) -> dict:
+    results = {}
+    # the batch pass must put every point where the scalar one did
+    worst = 0.0
+    for seed in range(5):
+        samples = random_samples(samples_per_lap, seed)
+        scalar = scalar_collect(samples)
+        batch = dead_reckon(samples)
+        extent = np.ptp(scalar[:, :2], axis=0).max()
+        worst = max(worst, np.abs(batch - scalar).max() / extent)
+    results['batch vs scalar: max difference (x1e9 of extent)'] = int(1e9 * worst + 0.5)
+
+    # per 1000 ticks, from the Telemetry the generator gets
+    telemetries = list(synthetic_telemetry(1, samples_per_lap))
+    rows = np.array([sample_row(telemetry) for telemetry in telemetries])
+    results['scalar: collect 1000 ticks'] = measure(lambda: scalar_collect(rows), repeat=3) * 1000 / samples_per_lap
+    results['batch: collect 1000 ticks'] = measure(lambda: batch_collect(rows), repeat=3) * 1000 / samples_per_lap
+    results['sample_row 1000 ticks'] = measure(lambda: [sample_row(t) for t in telemetries], repeat=3) * 1000 / samples_per_lap
+
+    # whole laps of recorded samples, the offline path
+    samples = random_samples(samples_per_lap)
+    results[f'dead_reckon lap of {samples_per_lap}'] = measure(lambda: dead_reckon(samples), repeat=5, number=100)
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results(f'dead reckoning, {SAMPLES_PER_LAP} samples per lap', run())
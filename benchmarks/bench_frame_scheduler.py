@@ -0,0 +1,82 @@
+from benchmarks.bench_pipeline import Pipeline, TRACK
+from benchmarks.common import load_bundled_tracks, synthetic_session_info, synthetic_telemetry
+from PySide6.QtCore import QTimer, QEventLoop
+import time
+
+TELEMETRY_RATE = 120
+DURATION = 2.0
+N_CARS = 63
+
+
+def drive(pipeline: Pipeline, legacy: bool = False, duration: float = DURATION) -> dict:
+    # push telemetry at TELEMETRY_RATE through the VM into the shown overlay
+    # and count the paints it causes. legacy repaints on every tick like
+    # _on_telemetry_ready did before the scheduler.
+    view = pipeline.view
+    telemetries = list(synthetic_telemetry(1, 3600, n_cars=N_CARS))
+    view.frame_scheduler.reset_stats()
+    paints = [0]
+    paint_event = view.paintEvent
+
+    def counted_paint(event):
+        paints[0] += 1
+        paint_event(event)
+    view.paintEvent = counted_paint
+
+    index = [0]
+
+    def push():
+        telemetry = telemetries[index[0] % len(telemetries)]
+        index[0] += 1
+        if legacy:
+            view.telemetry = telemetry
+            view.cars = None
+            view.update()
+        else:
+            pipeline.vm._on_telemetry_updated(telemetry)
+    timer = QTimer()
+    timer.setInterval(int(1000 / TELEMETRY_RATE))
+    timer.timeout.connect(push)
+    loop = QEventLoop()
+    QTimer.singleShot(int(duration * 1000), loop.quit)
+    start = time.thread_time()
+    timer.start()
+    loop.exec()
+    timer.stop()
+    cpu = time.thread_time() - start
+    view.paintEvent = paint_event
+    return {'ticks': index[0], 'paints': paints[0], 'cpu': cpu, 'stats': view.frame_stats()}
+
+
+def run(duration: float = DURATION) -> dict:
+    pipeline = Pipeline(load_bundled_tracks()[TRACK])
+    pipeline.set_cars(N_CARS)
+    view = pipeline.view
+    view.show()
+    results = {}
+    cases = (
+        ('before: repaint per tick', True, 60, 0, True),
+        ('after: cap 60 Hz', False, 60, 0, True),
+        ('after: cap 30 Hz', False, 30, 0, True),
+        ('after: cap 60 Hz, min move 2 px', False, 60, 2, True),
+        ('after: cap 60 Hz, transparent', False, 60, 0, False),
+    )
+    for name, legacy, frame_rate, min_move, opaque in cases:
+        view.frame_scheduler.set_frame_rate(frame_rate)
+        view.frame_scheduler.set_min_move(min_move)
+        # one frame per tick at most, the animation between ticks is bench_motion's
+        view.motion.set_mode('off')
+        view.setWindowOpacity(1.0 if opaque else 0.0)
+        result = drive(pipeline, legacy, duration)
+        results[f'{name} paints'] = result['paints']
+        results[f'{name} GUI CPU per tick'] = result['cpu'] / max(result['ticks'], 1)
+        if not legacy:
+            results[f'{name} paint p95'] = result['stats']['paint p95']
+    view.hide()
+    pipeline.stop()
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results(f'overlay frames at {TELEMETRY_RATE} Hz telemetry, {N_CARS} cars', run())
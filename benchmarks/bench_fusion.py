@@ -0,0 +1,96 @@
+from benchmarks.common import measure, load_bundled_tracks, make_dead_reckoned_lap
+from benchmarks.bench_pipeline import TRACK
+from ir_map.model.track_generator import TrackGenerator
+from ir_map.model.track_fusion import TrackFusion, similarity_transform
+import numpy as np
+
+N_LAPS = 10
+
+
+def map_error(points: np.ndarray, truth: np.ndarray) -> float:
+    # rms distance to the true track at the map's LapDistPcts, after the
+    # best fit of position, rotation and scale, as a fraction of the lap
+    inside = points[:, 2] < 1.0
+    points = points[inside]
+    true_xy = np.column_stack([np.interp(points[:, 2], truth[:, 2], truth[:, i]) for i in (0, 1)])
+    scale, rotation, offset = similarity_transform(points[:, :2], true_xy)
+    fitted = scale * points[:, :2] @ rotation.T + offset
+    length = np.hypot(*np.diff(truth[:, :2], axis=0).T).sum()
+    return np.sqrt(((fitted - true_xy) ** 2).sum(axis=1).mean()) / length
+
+
+def seam(points: np.ndarray) -> float:
+    # largest step between neighbouring points over the median one, the drift
+    # of an uncorrected lap shows as a jump where its integration started
+    steps = np.hypot(*np.diff(points[:, :2], axis=0).T)
+    steps = steps[steps > 0]
+    return steps.max() / np.median(steps)
+
+
+def run(n_laps: int = N_LAPS) -> dict:
+    truth = load_bundled_tracks()[TRACK]
+    rng = np.random.default_rng(0)
+    laps = [make_dead_reckoned_lap(truth['points'], int(truth['length'] * rng.uniform(0.95, 1.05)), seed)
+            for seed in range(n_laps)]
+    generator = TrackGenerator()
+    results = {}
+
+    # before: the lap with the fewest samples replaces the map, uncorrected
+    shortest = None
+    for lap in laps:
+        if shortest is None or len(lap) < len(shortest):
+            shortest = lap
+    old = generator.resample_points(shortest)
+    results['shortest lap: error (x1e5 of lap)'] = int(1e5 * map_error(old, truth['points']) + 0.5)
+    results['shortest lap: largest / median step (x100)'] = int(100 * seam(old) + 0.5)
+
+    fusion = TrackFusion(generator.target_length)
+    for i, lap in enumerate(laps, start=1):
+        fusion.add_lap(lap)
+        if i in (1, 3, n_laps):
+            points = generator.resample_points(fusion.track_points())
+            results[f'fused {i} laps: error (x1e5 of lap)'] = int(1e5 * map_error(points, truth['points']) + 0.5)
+    results['fused: largest / median step (x100)'] = int(100 * seam(points) + 0.5)
+    results['fused laps'] = fusion.laps
+
+    # a map stored in other units is kept in its frame
+    seeded = TrackFusion(generator.target_length)
+    scaled = truth['points'].copy()
+    scaled[:, :2] *= 3.0
+    seeded.seed(scaled)
+    seeded.add_lap(laps[0])
+    results['seeded x3 map: scale kept (x1000)'] = int(1000 * np.ptp(seeded.mean[:, 0]) / np.ptp(truth['points'][:, 0]) / 3 + 0.5)
+
+    # a wrong stored map turns the laps away until RECOVERY_LAPS of them agree
+    # with each other, then they replace it
+    wrong = next(track for name, track in load_bundled_tracks().items() if name != TRACK)
+    recovering = TrackFusion(generator.target_length)
+    recovering.seed(wrong['points'])
+    laps_until_replaced = 0
+    for lap in laps:
+        laps_until_replaced += 1
+        if recovering.add_lap(lap):
+            break
+    results['wrong seeded map: laps until replaced'] = laps_until_replaced
+    recovered = generator.resample_points(recovering.track_points())
+    results['wrong seeded map: error after (x1e5 of lap)'] = int(1e5 * map_error(recovered, truth['points']) + 0.5)
+
+    # locking and unlocking the track hands the committed points back to
+    # the generator, that must leave the fused map as it is
+    generator.fusion = fusion
+    generator.track_dict = {'length': 0, 'updatable': True, 'laps': fusion.laps, 'points': points}
+    mean = fusion.mean.copy()
+    for updatable in (False, True) * 5:
+        generator.set_track(dict(generator.track_dict, updatable=updatable))
+    results['lock toggles: map moved (x1e9 of lap)'] = int(1e9 * np.abs(generator.fusion.mean - mean).max()
+                                                          / np.hypot(*np.diff(points[:, :2], axis=0).T).sum() + 0.5)
+
+    results['add_lap'] = measure(lambda: fusion.add_lap(laps[0]), repeat=5, number=5)
+    long_lap = make_dead_reckoned_lap(truth['points'], 100000, 0)
+    results['add_lap 100k samples'] = measure(lambda: fusion.add_lap(long_lap), repeat=3)
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results(f'multi-lap fusion, {N_LAPS} dead-reckoned laps of {TRACK}', run())
@@ -0,0 +1,69 @@
+from benchmarks.bench_pipeline import Pipeline, TRACK
+from benchmarks.common import measure, load_bundled_tracks
+from ir_map.view import IRMap
+from PySide6.QtGui import QPainter, QImage
+from PySide6.QtCore import Qt, QRectF
+import numpy as np
+import time
+
+N_CARS = 63
+
+
+class DirectTextIRMap(IRMap):
+    # paintEvent with the car numbers laid out by drawText for every car,
+    # as before the label cache
+    def paintEvent(self, event):
+        now = time.perf_counter()
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), Qt.transparent)
+        if len(self.draw_points) > 1:
+            if self.track_pixmap is None:
+                self.render_track_layer()
+            painter.drawPixmap(0, 0, self.track_pixmap)
+            number_color = self.config['color']['number_color']
+            car_rect = QRectF()
+            for (car_x, car_y), (car_size, pen, brush, opacity, car_number) in zip(self.car_positions(now), self.cars):
+                painter.setOpacity(opacity)
+                painter.setPen(pen)
+                painter.setBrush(brush)
+                car_rect.setRect(car_x - car_size, car_y - car_size, car_size * 2, car_size * 2)
+                painter.drawEllipse(car_rect)
+                painter.setPen(number_color)
+                self.font_family.setPointSizeF(car_size * 0.8)
+                painter.setFont(self.font_family)
+                painter.drawText(car_rect, Qt.AlignCenter, car_number)
+        painter.end()
+
+
+def pixels(image: QImage) -> np.ndarray:
+    image = image.convertToFormat(QImage.Format_ARGB32)
+    data = np.frombuffer(image.constBits(), dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    return data[:, :image.width() * 4].reshape(image.height(), image.width(), 4).astype(int)
+
+
+def run(n_cars: int = N_CARS) -> dict:
+    track_dict = load_bundled_tracks()[TRACK]
+    direct = Pipeline(track_dict, DirectTextIRMap)
+    cached = Pipeline(track_dict)
+    results = {}
+    for pipeline in (direct, cached):
+        pipeline.view.motion.set_mode('off')
+        pipeline.set_cars(n_cars)
+    results[f'before: paint {n_cars} cars'] = measure(direct.paint, repeat=5, number=20)
+    results[f'after: paint {n_cars} cars'] = measure(cached.paint, repeat=5, number=20)
+    # the labels are blitted at whole device pixels, the text was not
+    diff = np.abs(pixels(direct.image) - pixels(cached.image)).max(axis=2)
+    results['pixels differing'] = int((diff > 0).sum())
+    results['max channel difference'] = int(diff.max())
+    labels = cached.view.labels
+    results['labels cached'] = len(labels.labels)
+    results['label cache hit rate (%)'] = int(100 * labels.hits / max(labels.hits + labels.misses, 1))
+    direct.stop()
+    cached.stop()
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results(f'car number labels, {N_CARS} cars', run())
@@ -0,0 +1,58 @@
+from benchmarks.common import model_sandbox, synthetic_telemetry
+from benchmarks.fake_ir_manager import FakeIRManager
+from PySide6.QtCore import QCoreApplication
+from ir_map.model import Model, TrackGenerator
+import numpy as np
+import time
+
+# ~Nordschleife: 14000 raw samples per lap
+SAMPLES_PER_LAP = 14000
+
+
+def probe(threaded: bool, n_laps: int = 2):
+    # main-thread CPU time spent per telemetry frame. thread_time() leaves out the
+    # time the GUI thread waits for the GIL while the generator thread runs.
+    app = QCoreApplication.instance() or QCoreApplication([])
+    ir_manager = FakeIRManager()
+    sandbox, paths = model_sandbox()
+    model = Model(ir_manager, **paths)
+    ir_manager.connect_ir()
+    # synchronous generator, as Model.update_telemetry used to run it
+    sync_generator = TrackGenerator()
+    sync_track = {'length': 0, 'updatable': True, 'points': np.empty((0, 4), dtype=float)}
+
+    frame_times = []
+    commit_frame = None
+    for telemetry in synthetic_telemetry(n_laps, SAMPLES_PER_LAP):
+        if threaded:
+            # posted by the irsdk thread in the app, not part of the GUI thread cost
+            ir_manager.worker.telemetry_updated.emit(telemetry)
+        start = time.thread_time()
+        ir_manager.telemetry_updated.emit(telemetry)
+        if not threaded:
+            sync_generator.generate(sync_track, telemetry, True)
+        app.processEvents()
+        frame_times.append(time.thread_time() - start)
+        if threaded:
+            sync_generator.generate(sync_track, telemetry, True)
+        if commit_frame is None and sync_track['length'] > 0:
+            commit_frame = len(frame_times) - 1
+
+    model.stop()
+    sandbox.cleanup()
+    return np.array(frame_times), commit_frame
+
+
+def run() -> dict:
+    results = {}
+    for name, threaded in (('before (GUI thread)', False), ('after (generator thread)', True)):
+        frame_times, commit_frame = probe(threaded)
+        results[f'{name} mean'] = frame_times.mean()
+        results[f'{name} p99'] = np.percentile(frame_times, 99)
+        results[f'{name} lap commit frame'] = frame_times[commit_frame]
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results('main-thread time per telemetry frame', run())
@@ -0,0 +1,105 @@
+from benchmarks.bench_pipeline import Pipeline, TRACK
+from benchmarks.common import measure, load_bundled_tracks, synthetic_telemetry
+from ir_map.view.motion import MotionSmoother
+from PySide6.QtCore import QTimer, QEventLoop
+import numpy as np
+
+TELEMETRY_RATES = (20, 30, 60)
+FRAME_RATE = 60
+DURATION = 10.0
+N_CARS = 63
+LAP_TIME = 100.0
+
+
+def true_ld_pcts(t: float) -> np.ndarray:
+    # cars spread around the lap, each going about 30% faster and slower
+    # than its average pace, so extrapolation is never exact
+    cars = np.arange(N_CARS)
+    lap_times = LAP_TIME * (1 + 0.002 * cars)
+    ld_pcts = cars / N_CARS + t / lap_times + 0.004 * np.sin(2 * np.pi * t / 8 + cars)
+    return ld_pcts % 1.0
+
+
+def position_errors(view, telemetry_rate: float, mode: str, duration: float = DURATION) -> tuple:
+    # pixel distance between the drawn and the true position of every car on
+    # every frame, with samples arriving at telemetry_rate and frames at
+    # FRAME_RATE, and the share of frames where the cars did not move at all
+    smoother = MotionSmoother(mode)
+    sample_times = np.arange(0.0, duration, 1 / telemetry_rate)
+    frame_times = np.arange(1.0, duration, 1 / FRAME_RATE)
+    errors = []
+    stalls = 0
+    drawn = None
+    sample = 0
+    for frame_time in frame_times:
+        while sample < len(sample_times) and sample_times[sample] <= frame_time:
+            ld_pcts = np.full(64, -1.0)
+            ld_pcts[:N_CARS] = true_ld_pcts(sample_times[sample])
+            smoother.update(ld_pcts, sample_times[sample], now=sample_times[sample])
+            sample += 1
+        last_drawn = drawn
+        drawn = view.interpolate_positions(smoother.ld_pcts_at(frame_time)[:N_CARS])
+        errors.append(np.hypot(*(drawn - view.interpolate_positions(true_ld_pcts(frame_time))).T))
+        if last_drawn is not None and np.array_equal(drawn, last_drawn):
+            stalls += 1
+    return np.concatenate(errors), stalls / len(frame_times)
+
+
+def count_paints(pipeline: Pipeline, telemetry_rate: float, mode: str, duration: float = 2.0) -> int:
+    # paints of the shown overlay with telemetry pushed at telemetry_rate
+    view = pipeline.view
+    view.motion.set_mode(mode)
+    step = max(1, round(60 / telemetry_rate))
+    telemetries = list(synthetic_telemetry(1, 3600, n_cars=N_CARS))[::step]
+    paints = [0]
+    paint_event = view.paintEvent
+
+    def counted_paint(event):
+        paints[0] += 1
+        paint_event(event)
+    view.paintEvent = counted_paint
+
+    index = [0]
+
+    def push():
+        pipeline.vm._on_telemetry_updated(telemetries[index[0] % len(telemetries)])
+        index[0] += 1
+    timer = QTimer()
+    timer.setInterval(int(1000 / telemetry_rate))
+    timer.timeout.connect(push)
+    loop = QEventLoop()
+    QTimer.singleShot(int(duration * 1000), loop.quit)
+    timer.start()
+    loop.exec()
+    timer.stop()
+    view.paintEvent = paint_event
+    return paints[0]
+
+
+def run(telemetry_rates=TELEMETRY_RATES) -> dict:
+    pipeline = Pipeline(load_bundled_tracks()[TRACK])
+    pipeline.set_cars(N_CARS)
+    view = pipeline.view
+    results = {}
+    # errors in 1/1000 px on the 800px overlay. interpolate draws one sample
+    # interval late on purpose, so its error is the lag, not jitter
+    for telemetry_rate in telemetry_rates:
+        for mode in MotionSmoother.MODES:
+            errors, stalls = position_errors(view, telemetry_rate, mode)
+            results[f'{telemetry_rate} Hz {mode} mean error (px, x1000)'] = int(errors.mean() * 1000)
+            results[f'{telemetry_rate} Hz {mode} p95 error (px, x1000)'] = int(np.percentile(errors, 95) * 1000)
+            results[f'{telemetry_rate} Hz {mode} stalled frames (%)'] = int(stalls * 100)
+    results['car_positions 63 cars'] = measure(view.car_positions, repeat=5, number=200)
+    view.show()
+    view.setWindowOpacity(1.0)
+    view.frame_scheduler.set_frame_rate(FRAME_RATE)
+    for mode in ('off', 'extrapolate'):
+        results[f'20 Hz telemetry {mode} paints in 2 s'] = count_paints(pipeline, 20, mode)
+    view.hide()
+    pipeline.stop()
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results(f'car motion between telemetry samples, {FRAME_RATE} Hz frames, {N_CARS} cars', run())
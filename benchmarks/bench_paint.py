@@ -0,0 +1,157 @@
+from benchmarks.bench_pipeline import Pipeline, TRACK
+from benchmarks.common import measure, load_bundled_tracks
+from ir_map.view import IRMap
+from PySide6.QtGui import QPainter, QPen, QColor
+from PySide6.QtCore import Qt, QPointF, QRectF
+import numpy as np
+
+FIELD_SIZES = (1, 10, 20, 40, 63)
+
+
+class LegacyIRMap(IRMap):
+    # paintEvent as it was before the batched car placement, one argmin
+    # over the whole track per car on every repaint
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), Qt.transparent)
+        if len(self.draw_points) > 1:
+            
+            # draw the track
+            
+            outline_pen = QPen(self.config['color']['outline_color'], self.track_width + self.track_outline_width * 2)
+            painter.setPen(outline_pen)
+            painter.drawPath(self.static_path)
+                
+            painter.setPen(QPen(self.config['color']['track_color'], self.track_width))
+            painter.drawPath(self.static_path)
+            
+            # # draw the s/f line
+            painter.save()
+            first_point = self.draw_points[0]
+            last_point = self.draw_points[-1]
+            angle = np.arctan2(last_point[1] - first_point[1], last_point[0] - first_point[0]) * 180 / np.pi
+            rect_x = first_point[0]
+            rect_y = first_point[1]
+            
+            painter.translate(rect_x, rect_y)
+            painter.rotate(angle)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self.config['color']['sf_color'])
+            sf_height = self.track_width + self.track_outline_width * 2
+            painter.drawRect(-self.track_width / 3, -sf_height / 2, self.track_width / 3 * 2, sf_height)
+            
+            painter.restore()
+            
+            # draw cars
+            for driver in self.session_info['drivers']:
+                painter.save()
+                car_idx = driver['CarIdx']
+                car_class_position = self.telemetry['other_class_posts'][car_idx]
+                car_number = driver['CarNumber']
+                car_class_color = driver['CarClassColor']
+                closest_point = np.argmin(
+                    np.abs(self.draw_points[:, 2] - self.telemetry['other_ld_pcts'][car_idx])
+                )
+                car_position = self.draw_points[closest_point, :2]
+                car_x = car_position[0]
+                car_y = car_position[1]
+                
+                if car_idx == self.telemetry['player_idx']:
+                    painter.setPen(QPen(self.config['color']['player_outline_color'], self.car_outline_width))
+                    painter.setBrush(self.config['color']['player_color'])
+                    car_size = self.car_size * self.config['number']['player_scale']
+                else:
+                    painter.setPen(Qt.NoPen)
+                    if driver['CarClassID'] == self.telemetry['player_class']:
+                        if car_class_position == self.telemetry['player_class_pos'] - 1 and self.telemetry['player_class_pos'] -1 > 0:
+                            painter.setPen(QPen(self.config['color']['next_outline_color'], self.car_outline_width))
+                        if car_class_position == self.telemetry['player_class_pos'] + 1 and self.telemetry['player_class_pos'] > 0:
+                            painter.setPen(QPen(self.config['color']['prev_outline_color'], self.car_outline_width))
+                        painter.setOpacity(self.config['number']['other_car_opacity'])
+                    else:
+                        painter.setOpacity(self.config['number']['other_class_opacity']*self.config['number']['other_car_opacity'])
+                    if car_class_color == QColor(255, 255, 255):
+                        car_class_color = self.config['color']['other_color']
+                    painter.setBrush(car_class_color)
+                    car_size = self.car_size
+
+                if self.telemetry['other_trk_surfs'][car_idx] == 1 or self.telemetry['other_trk_surfs'][car_idx] == 2:
+                    painter.setOpacity(0.4)
+                if self.telemetry['other_trk_surfs'][car_idx] == -1:
+                    painter.setOpacity(0.0)
+                    
+                painter.drawEllipse(QPointF(car_x, car_y), car_size, car_size)
+                
+                painter.setPen(QColor(self.config['color']['number_color']))
+                self.font_family.setPointSizeF(car_size * 0.8)
+                painter.setFont(self.font_family)
+                s = car_size * 2
+                text_rect = QRectF(
+                    car_x - s / 2, 
+                    car_y - s / 2, 
+                    s, 
+                    s
+                )
+                if self.config['bool']['show_position']:
+                    car_number = str(car_class_position) if car_class_position > 0 else '-'
+                painter.drawText(text_rect, Qt.AlignCenter, str(car_number))
+                
+                painter.restore()
+
+
+def legacy_positions(view: IRMap) -> np.ndarray:
+    positions = []
+    for driver in view.session_info['drivers']:
+        closest_point = np.argmin(np.abs(view.draw_points[:, 2] - view.telemetry['other_ld_pcts'][driver['CarIdx']]))
+        positions.append(view.draw_points[closest_point, :2])
+    return np.array(positions)
+
+
+def new_positions(view: IRMap) -> np.ndarray:
+    car_idxs = np.array([driver['CarIdx'] for driver in view.session_info['drivers']])
+    return view.interpolate_positions(view.telemetry['other_ld_pcts'][car_idxs])
+
+
+def check_accuracy(view: IRMap) -> float:
+    # interpolated positions stay within one track segment of the nearest point
+    view.update_cars()
+    positions = view.car_positions(view.motion.received)
+    segment = np.hypot(*np.diff(view.draw_points[:, :2], axis=0).T).max()
+    return np.hypot(*(positions - legacy_positions(view)).T).max() / segment
+
+
+def run(field_sizes=FIELD_SIZES) -> dict:
+    track_dict = load_bundled_tracks()[TRACK]
+    legacy = Pipeline(track_dict, LegacyIRMap)
+    pipeline = Pipeline(track_dict)
+    results = {}
+    worst = 0.0
+    for n_cars in field_sizes:
+        legacy.set_cars(n_cars)
+        pipeline.set_cars(n_cars)
+        worst = max(worst, check_accuracy(pipeline.view))
+
+        def paint():
+            # one repaint per telemetry tick, so the car styles are redone every time
+            pipeline.view.cars = None
+            pipeline.paint()
+        results[f'before: placement {n_cars} cars'] = measure(lambda: legacy_positions(legacy.view), repeat=5, number=20)
+        results[f'after: placement {n_cars} cars'] = measure(lambda: new_positions(pipeline.view), repeat=5, number=20)
+        results[f'before: paint {n_cars} cars'] = measure(legacy.paint, repeat=5, number=10)
+        results[f'after: paint {n_cars} cars'] = measure(paint, repeat=5, number=10)
+
+        def paint_uncached():
+            # a frame right after a track, size or config change
+            pipeline.view.track_pixmap = None
+            paint()
+        results[f'after: paint {n_cars} cars, track layer redrawn'] = measure(paint_uncached, repeat=5, number=10)
+    results['max offset from nearest point (segments, x1000)'] = int(worst * 1000)
+    legacy.stop()
+    pipeline.stop()
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results('IRMap.paintEvent vs field size', run())
@@ -0,0 +1,64 @@
+from benchmarks.common import measure, load_bundled_tracks
+from ir_map.model.persistence import PersistenceWorker
+from ir_map.model.track_store import encode_track, save_track_file
+from PySide6.QtCore import QCoreApplication, QObject, QThread, Signal, Qt
+import json
+import os
+import tempfile
+import time
+
+
+class Requests(QObject):
+    # the persistence signals of Model
+    write = Signal(str, object)
+    flush = Signal()
+
+
+def run(n_saves: int = 100) -> dict:
+    app = QCoreApplication.instance() or QCoreApplication([])
+    track_dict = next(iter(load_bundled_tracks().values()))
+    config = {'color': {f'color{i}': '#ffffff' for i in range(10)}, 'number': {f'number{i}': i for i in range(10)}}
+    directory = tempfile.mkdtemp()
+    track_path = os.path.join(directory, 'track.trk')
+    config_path = os.path.join(directory, 'config.json')
+
+    def save_blocking():
+        # what save_track/save_config did on the GUI thread
+        save_track_file(track_path, track_dict)
+        with open(config_path, 'w') as f:
+            json.dump(config, f, indent=4)
+
+    worker = PersistenceWorker()
+    thread = QThread()
+    worker.moveToThread(thread)
+    requests = Requests()
+    requests.write.connect(worker.write)
+    requests.flush.connect(worker.flush, Qt.BlockingQueuedConnection)
+    thread.start()
+
+    def save_queued():
+        requests.write.emit(track_path, encode_track(track_dict))
+        requests.write.emit(config_path, json.dumps(config, indent=4).encode('utf-8'))
+
+    results = {
+        'blocking save (GUI thread)': measure(save_blocking, repeat=20),
+        'queued save (GUI thread)': measure(save_queued, repeat=20),
+    }
+    requests.flush.emit()
+
+    # a burst of saves within the write delay is written once per file
+    worker.write_count = 0
+    for _ in range(n_saves):
+        save_queued()
+    time.sleep(worker.WRITE_DELAY / 1000 * 2)
+    requests.flush.emit()
+    results[f'files written for {n_saves} saves'] = worker.write_count
+
+    thread.quit()
+    thread.wait()
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results('track and config persistence', run())
@@ -0,0 +1,92 @@
+from benchmarks.common import measure, load_bundled_tracks, make_raw_lap, model_sandbox, synthetic_session_info, synthetic_telemetry
+from benchmarks.fake_ir_manager import FakeIRManager
+from ir_map.model import Model, TrackGenerator
+from ir_map.view_model import IRMapVM
+from ir_map.view import IRMap
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+import numpy as np
+
+# each stage of the telemetry -> model -> paint pipeline, timed on its own
+SAMPLES_PER_LAP = 3600
+PAINT_CARS = (1, 20, 63)
+TRACK = 'spa_2024_combined'
+
+
+def bench_generate() -> float:
+    # TrackGenerator.generate per tick over two laps, including the lap commit
+    telemetries = list(synthetic_telemetry(2, SAMPLES_PER_LAP))
+
+    def generate():
+        generator = TrackGenerator()
+        track_dict = {'length': 0, 'updatable': True, 'points': np.empty((0, 4), dtype=float)}
+        for telemetry in telemetries:
+            generator.generate(track_dict, telemetry, True)
+    return measure(generate, repeat=3) / len(telemetries)
+
+
+def bench_resample(points: np.ndarray) -> float:
+    # resample_points per commit of a Nordschleife-sized raw lap
+    generator = TrackGenerator()
+    raw = make_raw_lap(points, 14000)
+    return measure(lambda: generator.resample_points(raw), repeat=20)
+
+
+class Pipeline:
+    # Model, IRMapVM and IRMap wired to a fake IRManager, the overlay sized to 800px
+    def __init__(self, track_dict: dict, view_class=IRMap):
+        self.app = QApplication.instance() or QApplication([])
+        self.ir_manager = FakeIRManager()
+        self.sandbox, paths = model_sandbox()
+        self.model = Model(self.ir_manager, **paths)
+        self.model.load_config()
+        self.vm = IRMapVM(self.model)
+        self.view = view_class(self.vm)
+        self.view.resize(800, 800)
+        self.view._on_track_ready(dict(track_dict, points=track_dict['points'].copy()))
+        self.image = QImage(self.view.size(), QImage.Format_ARGB32_Premultiplied)
+
+    def set_cars(self, n_cars: int):
+        self.vm._on_session_info_updated(synthetic_session_info(n_cars))
+        self.telemetry = next(synthetic_telemetry(1, SAMPLES_PER_LAP, n_cars=n_cars))
+        self.vm._on_telemetry_updated(self.telemetry)
+
+    def paint(self):
+        self.image.fill(0)
+        self.view.render(self.image)
+
+    def stop(self):
+        self.model.stop()
+        self.sandbox.cleanup()
+
+
+def bench_view(track_dict: dict) -> dict:
+    results = {}
+    pipeline = Pipeline(track_dict)
+    session_info = synthetic_session_info(63)
+    pipeline.set_cars(63)
+    results['IRMapVM._on_telemetry_updated'] = measure(
+        lambda: pipeline.vm._on_telemetry_updated(pipeline.telemetry), repeat=5, number=1000)
+    # per-driver QColor conversion, once per SessionInfoUpdate
+    results['IRMapVM._on_session_info_updated 63 cars'] = measure(
+        lambda: pipeline.vm._on_session_info_updated(session_info), repeat=5, number=20)
+    for n_cars in PAINT_CARS:
+        pipeline.set_cars(n_cars)
+        results[f'IRMap.paintEvent {n_cars} cars'] = measure(pipeline.paint, repeat=5, number=20)
+    pipeline.stop()
+    return results
+
+
+def run() -> dict:
+    track_dict = load_bundled_tracks()[TRACK]
+    results = {
+        'TrackGenerator.generate per tick': bench_generate(),
+        'resample_points per commit': bench_resample(track_dict['points']),
+    }
+    results.update(bench_view(track_dict))
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results('telemetry -> model -> paint pipeline', run())
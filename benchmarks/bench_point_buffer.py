@@ -0,0 +1,31 @@
+from benchmarks.common import measure, print_results
+from ir_map.model.point_buffer import PointBuffer
+import numpy as np
+
+SIZES = (10000, 50000, 100000)
+
+
+def collect_np_append(n: int):
+    point_store = np.empty((0, 4), dtype=float)
+    for i in range(n):
+        point_store = np.append(point_store, [[i, i, i / n, 1]], axis=0)
+    return point_store
+
+
+def collect_point_buffer(n: int):
+    point_store = PointBuffer(columns=4, max_length=100000)
+    for i in range(n):
+        point_store.append((i, i, i / n, 1))
+    return point_store.snapshot()
+
+
+def run(sizes=SIZES, repeat: int = 1) -> dict:
+    results = {}
+    for n in sizes:
+        results[f'np.append {n}'] = measure(lambda: collect_np_append(n), repeat=repeat)
+        results[f'PointBuffer {n}'] = measure(lambda: collect_point_buffer(n), repeat=repeat)
+    return results
+
+
+if __name__ == '__main__':
+    print_results('point store: time to collect n samples', run())
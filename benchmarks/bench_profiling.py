@@ -0,0 +1,92 @@
+from benchmarks.bench_pipeline import Pipeline, TRACK
+from benchmarks.bench_replay import record
+from benchmarks.common import measure, load_bundled_tracks
+from ir_map.model.ir_manager import IRManagerWorker
+from ir_map.model.telemetry_recorder import ReplaySource
+from ir_map.profiling import PROFILER
+import json
+import logging
+import os
+import tempfile
+import time
+
+N_CARS = 63
+SPANS = 1000
+log = logging.getLogger('benchmarks.bench_profiling')
+
+
+def spans():
+    for _ in range(SPANS):
+        with PROFILER.span('bench'):
+            pass
+
+
+def replay(pipeline: Pipeline, path: str) -> float:
+    # one recorded lap through acquisition, generator, model, VM and a paint
+    # per tick, all on this thread; returns the time per tick
+    worker = IRManagerWorker(ReplaySource(path, speed=0))
+    ticks = [0]
+
+    def on_telemetry(telemetry):
+        ticks[0] += 1
+        pipeline.ir_manager.push(telemetry)
+        pipeline.paint()
+
+    def on_disconnected():
+        worker.running = False
+    worker.telemetry_updated.connect(on_telemetry)
+    worker.ir_disconnected.connect(on_disconnected)
+    start = time.perf_counter()
+    worker.run()
+    return (time.perf_counter() - start) / max(ticks[0], 1)
+
+
+def run() -> dict:
+    results = {}
+    PROFILER.disable()
+    PROFILER.reset()
+    results[f'{SPANS} spans, profiler off'] = measure(spans, repeat=5)
+    PROFILER.enable()
+    results[f'{SPANS} spans, profiler on'] = measure(spans, repeat=5)
+    PROFILER.enable(tracing=True)
+    results[f'{SPANS} spans, tracing'] = measure(spans, repeat=5)
+    PROFILER.disable()
+    PROFILER.reset()
+
+    # the print() calls the logger replaced, against a disabled debug call
+    with open(os.devnull, 'w') as devnull:
+        results[f'{SPANS} prints'] = measure(lambda: [print('lap changed: 1', file=devnull) for _ in range(SPANS)], repeat=5)
+    logging.getLogger().setLevel(logging.WARNING)
+    results[f'{SPANS} disabled log.debug'] = measure(lambda: [log.debug('lap changed: %d', 1) for _ in range(SPANS)], repeat=5)
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'recording')
+    record(path, n_laps=1, n_cars=N_CARS)
+    pipeline = Pipeline(load_bundled_tracks()[TRACK])
+    pipeline.ir_manager.connect_ir()
+    pipeline.set_cars(N_CARS)
+    results['replay tick, profiler off'] = replay(pipeline, path)
+    PROFILER.enable(tracing=True)
+    results['replay tick, tracing'] = replay(pipeline, path)
+    trace_path = os.path.join(directory, 'trace.json')
+    PROFILER.export_chrome_trace(trace_path)
+    with open(trace_path, 'r') as f:
+        events = [event for event in json.load(f)['traceEvents'] if event['ph'] == 'X']
+    results['trace spans'] = len(events)
+    results['trace span names'] = len({event['name'] for event in events})
+
+    pipeline.view.set_show_hud(False)
+    results[f'paint {N_CARS} cars'] = measure(pipeline.paint, repeat=5, number=20)
+    pipeline.view.set_show_hud(True)
+    results[f'paint {N_CARS} cars with HUD'] = measure(pipeline.paint, repeat=5, number=20)
+    pipeline.view.set_show_hud(False)
+    PROFILER.disable()
+    PROFILER.reset()
+    pipeline.model.delete_track()
+    pipeline.stop()
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results('profiling and logging overhead', run())
@@ -0,0 +1,126 @@
+from benchmarks.bench_pipeline import Pipeline, TRACK
+from benchmarks.bench_labels import pixels
+from benchmarks.common import measure, load_bundled_tracks
+from ir_map.view.gl_renderer import stroke_strip, car_instances, gl_available
+from PySide6.QtGui import QImage
+import numpy as np
+import json
+import os
+import subprocess
+import sys
+
+# The GL renderer needs an OpenGL 3.3 (or ES 3.0) context. Headless, Mesa's
+# llvmpipe provides an ES 3.2 one through surfaceless EGL on the eglfs
+# platform, which only has to open some file as its framebuffer. The
+# platform is fixed per process, so the GL frame is rendered by this module
+# again in a child process with MESA_ENVIRONMENT, and compared with the
+# software frame there. In this process (offscreen, no context) the
+# geometry and the fallback to the software renderer are measured.
+#   python -m benchmarks.bench_renderer
+N_CARS = 63
+MESA_ENVIRONMENT = {
+    'QT_QPA_PLATFORM': 'eglfs',
+    'QT_QPA_EGLFS_INTEGRATION': 'none',
+    'QT_QPA_EGLFS_FB': os.devnull,
+    'QT_QPA_EGLFS_WIDTH': '1280',
+    'QT_QPA_EGLFS_HEIGHT': '800',
+    'QT_QPA_EGLFS_PHYSICAL_WIDTH': '300',
+    'QT_QPA_EGLFS_PHYSICAL_HEIGHT': '200',
+    'EGL_PLATFORM': 'surfaceless',
+    'LIBGL_ALWAYS_SOFTWARE': '1',
+}
+# the renderers antialias differently (QPainter coverage, 4x multisampling),
+# edges differ by up to about this much in a channel
+EDGE_DIFFERENCE = 64
+
+
+def strip_area(strip: np.ndarray) -> float:
+    # area covered by a triangle strip, every triangle counted once
+    a, b, c = strip[:-2].astype(float), strip[1:-1].astype(float), strip[2:].astype(float)
+    ab = b - a
+    ac = c - a
+    return np.abs(ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0]).sum() / 2
+
+
+def opengl_frame(n_cars: int = N_CARS) -> dict:
+    # run in the child process: the same frame from both renderers. The view
+    # stays hidden, eglfs has no window surface to show it on; the canvas
+    # renders into its framebuffer object all the same.
+    pipeline = Pipeline(load_bundled_tracks()[TRACK])
+    pipeline.view.motion.set_mode('off')
+    pipeline.set_cars(n_cars)
+    view = pipeline.view
+    pipeline.paint()
+    software = pixels(pipeline.image)
+    results = {'opengl available': int(gl_available())}
+    results['opengl renderer in use'] = int(view.use_gl_renderer() and view.canvas is not None)
+    if view.canvas is not None:
+        canvas = view.canvas
+        canvas.resize(view.size())
+        frame = canvas.grabFramebuffer()
+        results['opengl renderer in use'] = int(view.canvas is not None and not frame.isNull())
+        results['opengl: paint and read back'] = measure(canvas.grabFramebuffer, repeat=5, number=10)
+        opengl = pixels(frame.convertToFormat(QImage.Format_ARGB32_Premultiplied))
+        diff = np.abs(opengl - software).max(axis=2)
+        covered = (software[:, :, 3] > 0) | (opengl[:, :, 3] > 0)
+        results['opengl pixels drawn'] = int((opengl[:, :, 3] > 0).sum())
+        results['software pixels drawn'] = int((software[:, :, 3] > 0).sum())
+        results[f'opengl pixels differing by more than {EDGE_DIFFERENCE} (x1000 of drawn)'] = \
+            int(1000 * (diff > EDGE_DIFFERENCE).sum() / max(covered.sum(), 1) + 0.5)
+        results['opengl mean channel difference (x100)'] = int(100 * diff[covered].mean() + 0.5)
+        view.use_software_renderer()
+        results['software renderer back'] = int(view.canvas is None)
+    pipeline.stop()
+    return results
+
+
+def run_opengl(n_cars: int = N_CARS) -> dict:
+    # opengl_frame in a process of its own on Mesa; {} when it cannot start
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        child = subprocess.run([sys.executable, '-m', 'benchmarks.bench_renderer', '--opengl', str(n_cars)],
+                               cwd=root, env=dict(os.environ, **MESA_ENVIRONMENT),
+                               capture_output=True, text=True, timeout=600)
+    except subprocess.TimeoutExpired:
+        return {}
+    lines = child.stdout.strip().splitlines()
+    if child.returncode != 0 or not lines:
+        return {}
+    return json.loads(lines[-1])
+
+
+def run(n_cars: int = N_CARS) -> dict:
+    pipeline = Pipeline(load_bundled_tracks()[TRACK])
+    pipeline.view.motion.set_mode('off')
+    pipeline.set_cars(n_cars)
+    view = pipeline.view
+    results = {}
+
+    # the stroked strip covers about length x width, plus the square caps
+    width = view.track_width + view.track_outline_width * 2
+    strip = stroke_strip(view.draw_points, width)
+    length = np.hypot(*np.diff(view.draw_points[:, :2], axis=0).T).sum()
+    results['track strip vertices'] = len(strip)
+    results['track strip area / stroke area (x1000)'] = int(1000 * strip_area(strip) / (length * width + width * width))
+    results['stroke_strip'] = measure(lambda: stroke_strip(view.draw_points, width), repeat=5, number=10)
+    positions = view.car_positions()
+    results[f'car_instances {n_cars} cars'] = measure(lambda: car_instances(positions, view.cars), repeat=5, number=20)
+    results['software: paint'] = measure(pipeline.paint, repeat=5, number=20)
+
+    # without a context here, asking for the GL renderer keeps the software one
+    if not gl_available():
+        results['no context: opengl renderer in use'] = int(view.use_gl_renderer() or view.canvas is not None)
+    pipeline.stop()
+
+    for key, value in run_opengl(n_cars).items():
+        results[f'mesa llvmpipe: {key}'] = value
+    results['mesa llvmpipe: opengl checked'] = int('mesa llvmpipe: opengl available' in results)
+    return results
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--opengl']:
+        print(json.dumps(opengl_frame(int(sys.argv[2]))))
+    else:
+        from benchmarks.common import print_results
+        print_results(f'software and OpenGL renderers, {N_CARS} cars', run())
@@ -0,0 +1,135 @@
+from benchmarks.common import print_results
+from benchmarks.fake_irsdk import FakeIRSDK
+from PySide6.QtCore import QObject, QThread, Qt, Signal
+from PySide6.QtWidgets import QApplication
+from ir_map.model.ir_manager import IRManagerWorker
+from ir_map.model.telemetry_recorder import TelemetryRecorder, TelemetryRecording, ReplaySource
+from ir_map.model.track_generator import TrackGenerator
+import numpy as np
+import os
+import tempfile
+import time
+
+N_LAPS = 5
+N_CARS = 63
+
+
+def record(path: str, n_laps: int = N_LAPS, n_cars: int = N_CARS) -> float:
+    # drive the fake sim for a few laps and record every tick
+    ir = FakeIRSDK(n_cars)
+    recorder = TelemetryRecorder(path)
+    start = time.perf_counter()
+    while ir.vars['Lap'] <= n_laps:
+        ir.tick()
+        if ir.vars['LapDistPct'] < 0.0005:
+            ir.vars['Lap'] += 1
+        recorder.record(ir)
+    elapsed = time.perf_counter() - start
+    recorder.close()
+    return elapsed
+
+
+def replay(path: str) -> dict:
+    # play the recording as fast as possible through the real worker and generator
+    worker = IRManagerWorker(ReplaySource(path, speed=0))
+    generator = TrackGenerator()
+    generator.set_connected(True)
+    recording = TelemetryRecording(path)
+    counts = {'ticks': 0, 'tracks': 0, 'mismatches': 0}
+
+    def on_telemetry(telemetry):
+        frame = worker.ir.frame
+        if telemetry.session_time != recording['SessionTime'][frame] \
+        or telemetry.other_ld_pcts[N_CARS - 1] != recording['CarIdxLapDistPct'][frame, N_CARS - 1]:
+            counts['mismatches'] += 1
+        counts['ticks'] += 1
+        generator.update_telemetry(telemetry)
+
+    def on_track(track_dict):
+        counts['tracks'] += 1
+
+    def on_disconnected():
+        worker.running = False
+
+    worker.telemetry_updated.connect(on_telemetry)
+    worker.ir_disconnected.connect(on_disconnected)
+    generator.track_updated.connect(on_track)
+    start = time.perf_counter()
+    worker.run()
+    counts['elapsed'] = time.perf_counter() - start
+    counts['snapshots'] = len(worker.pool.snapshots)
+    return counts
+
+
+class OrderProbe(QObject):
+    # stands in for the track generator thread, slower than the replay; keeps
+    # every KEEP_EVERY-th snapshot with the values it had on arrival
+    KEEP_EVERY = 10
+    done = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self.session_times = []
+        self.kept = []
+        self.done.connect(self.finish, Qt.BlockingQueuedConnection)
+
+    def on_telemetry(self, telemetry):
+        self.session_times.append(telemetry.session_time)
+        if len(self.session_times) % self.KEEP_EVERY == 0:
+            self.kept.append((telemetry, telemetry.session_time, telemetry.other_ld_pcts.copy()))
+        time.sleep(0.0001)
+
+    def changed(self) -> int:
+        # kept snapshots that were written again after they arrived
+        return sum(telemetry.session_time != session_time or not np.array_equal(telemetry.other_ld_pcts, ld_pcts)
+                   for telemetry, session_time, ld_pcts in self.kept)
+
+    def finish(self):
+        pass
+
+
+def generator_order(path: str) -> dict:
+    # ticks as the generator thread sees them over the queued connection,
+    # every one must arrive once and in order and stay as it arrived
+    app = QApplication.instance() or QApplication([])
+    worker = IRManagerWorker(ReplaySource(path, speed=0))
+    probe = OrderProbe()
+    thread = QThread()
+    probe.moveToThread(thread)
+    thread.start()
+    worker.telemetry_updated.connect(probe.on_telemetry)
+    worker.ir_disconnected.connect(lambda: setattr(worker, 'running', False))
+    worker.run()
+    # returns once the probe has worked through the ticks queued before it
+    probe.done.emit()
+    thread.quit()
+    thread.wait()
+    steps = np.diff(probe.session_times)
+    return {'received': len(probe.session_times), 'out of order': int(np.count_nonzero(steps <= 0)),
+            'changed': probe.changed()}
+
+
+def run() -> dict:
+    path = os.path.join(tempfile.mkdtemp(), 'recording')
+    record_time = record(path)
+    n_ticks = len(TelemetryRecording(path))
+    size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    counts = replay(path)
+    order = generator_order(path)
+    return {
+        'record per tick': record_time / n_ticks,
+        'replay per tick': counts['elapsed'] / counts['ticks'],
+        'bytes per tick': size // n_ticks,
+        'ticks recorded': n_ticks,
+        'ticks replayed': counts['ticks'],
+        'tracks committed': counts['tracks'],
+        'value mismatches': counts['mismatches'],
+        'generator thread: ticks received': order['received'],
+        'generator thread: ticks out of order': order['out of order'],
+        'generator thread: kept snapshots changed': order['changed'],
+        'telemetry snapshots allocated': counts['snapshots'],
+    }
+
+
+if __name__ == '__main__':
+    print_results('telemetry record & replay', run())
@@ -0,0 +1,64 @@
+from benchmarks.common import measure, print_results, load_bundled_tracks, make_raw_lap
+from ir_map.model.track_generator import TrackGenerator, ResampleMode
+import numpy as np
+
+SIZES = (10000, 50000, 100000)
+# the N x TARGET_LENGTH matrix of the old resampler needs ~3.2 GB at 100k
+NEAREST_MAX_SIZE = 50000
+
+
+def resample_nearest(points: np.ndarray, target_length: int = TrackGenerator.TARGET_LENGTH):
+    # resampler used before the searchsorted/interp version, kept as reference
+    points = points[points[:, 2].argsort()]
+    ld_pcts = points[:, 2]
+    target_ld_pct = np.linspace(0.0, 1.0, target_length)
+    indices = np.abs(ld_pcts[:, None] - target_ld_pct).argmin(axis=0)
+    indices = np.clip(indices, 0, len(ld_pcts) - 1)
+    points = np.column_stack((points[indices, 0], points[indices, 1], target_ld_pct, points[indices, 3]))
+    _, unique_indices = np.unique(points[:, 2], return_index=True)
+    points = points[unique_indices]
+    return np.vstack((points, points[-1]))
+
+
+def run(sizes=SIZES, repeat: int = 3) -> dict:
+    track = load_bundled_tracks()['nurburgring_nordschleife']
+    generator = TrackGenerator()
+    arc_generator = TrackGenerator(resample_mode=ResampleMode.ARC_LENGTH)
+    results = {}
+    for n in sizes:
+        raw = make_raw_lap(track['points'], n)
+        if n <= NEAREST_MAX_SIZE:
+            results[f'nearest {n}'] = measure(lambda: resample_nearest(raw), repeat=repeat)
+        results[f'interp ld_pct {n}'] = measure(lambda: generator.resample_points(raw), repeat=repeat)
+        results[f'interp arc_length {n}'] = measure(lambda: arc_generator.resample_points(raw), repeat=repeat)
+    results['tracks less accurate than nearest'] = check_accuracy()
+    return results
+
+
+def check_accuracy(show: bool = False) -> int:
+    # compare both resamplers on a raw lap of the recorded length of every bundled track.
+    # "truth" is the bundled polyline evaluated at the target LapDistPct values.
+    # Returns the number of tracks where interp is off the old grid or worse than it.
+    generator = TrackGenerator()
+    failed = 0
+    if show:
+        print(f'{"track":<30}{"raw":>8}{"max |new-old|":>16}{"old err":>12}{"new err":>12}')
+    for name, track in load_bundled_tracks().items():
+        points = track['points']
+        raw = make_raw_lap(points, track['length'])
+        old = resample_nearest(raw)
+        new = generator.resample_points(raw)
+        truth_x = np.interp(new[:, 2], points[:, 2], points[:, 0])
+        truth_y = np.interp(new[:, 2], points[:, 2], points[:, 1])
+        diff = np.hypot(new[:, 0] - old[:, 0], new[:, 1] - old[:, 1]).max()
+        old_err = np.hypot(old[:, 0] - truth_x, old[:, 1] - truth_y).max()
+        new_err = np.hypot(new[:, 0] - truth_x, new[:, 1] - truth_y).max()
+        failed += not (new.shape == old.shape and np.array_equal(new[:, 2], old[:, 2]) and new_err <= old_err)
+        if show:
+            print(f'{name:<30}{len(raw):>8}{diff:>16.4f}{old_err:>12.4f}{new_err:>12.4f}')
+    return failed
+
+
+if __name__ == '__main__':
+    print_results('resample_points: time per commit', run())
+    check_accuracy(show=True)
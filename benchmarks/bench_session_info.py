@@ -0,0 +1,67 @@
+from benchmarks.common import print_results
+from benchmarks.irsdk_dump import IRSDKDump
+from ir_map.model.ir_manager import IRManagerWorker
+import argparse
+import irsdk
+import numpy as np
+import os
+import tempfile
+import time
+
+TICKS = 3600
+# the sim rewrites the session string every few seconds during a race
+SESSION_INFO_INTERVAL = 300
+
+
+def read_session_every_tick(worker: IRManagerWorker):
+    # what update_telemetry did before the session info cache
+    worker.ir['WeekendInfo']['TrackName']
+    worker.ir['DriverInfo']['Drivers']
+    worker.update_telemetry()
+
+
+def read_session_on_change(worker: IRManagerWorker):
+    worker.update_session_info()
+    worker.update_telemetry()
+
+
+def run(dump_path: str = None, ticks: int = TICKS) -> dict:
+    # dump_path: shared memory recorded with `irsdk --dump <file>` while iRacing runs,
+    # a synthetic 63-car session is generated when it is not given
+    results = {}
+    for name, update in (('every tick', read_session_every_tick), ('on SessionInfoUpdate', read_session_on_change)):
+        dump = None
+        if dump_path is None:
+            path = os.path.join(tempfile.mkdtemp(), 'irsdk_dump.bin')
+            dump = IRSDKDump(path)
+        else:
+            path = dump_path
+        ir = irsdk.IRSDK()
+        ir.startup(test_file=path)
+        worker = IRManagerWorker()
+        worker.ir = ir
+        worker.state.ir_connected = True
+
+        tick_times = []
+        for i in range(ticks):
+            if dump is not None:
+                dump.tick()
+                if i % SESSION_INFO_INTERVAL == 0:
+                    dump.update_session_info()
+            start = time.perf_counter()
+            update(worker)
+            tick_times.append(time.perf_counter() - start)
+        ir.shutdown()
+        if dump is not None:
+            dump.close()
+        tick_times = np.array(tick_times)
+        results[f'{name} mean'] = tick_times.mean()
+        results[f'{name} p99'] = np.percentile(tick_times, 99)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dump', help='irsdk shared memory dump (irsdk --dump)')
+    args = parser.parse_args()
+    print_results('IRManagerWorker time per tick', run(args.dump))
@@ -0,0 +1,61 @@
+from benchmarks.bench_pipeline import Pipeline
+from benchmarks.common import measure, load_bundled_tracks
+from PySide6.QtGui import QPainterPath
+import numpy as np
+
+
+def legacy_static_path(points: np.ndarray) -> QPainterPath:
+    # create_static_path before the bulk builder, one lineTo per vertex
+    path = QPainterPath()
+    path.moveTo(points[0, 0], points[0, 1])
+    for i in range(1, len(points)):
+        path.lineTo(points[i, 0], points[i, 1])
+    return path
+
+
+def track_layer(view) -> np.ndarray:
+    view.render_track_layer()
+    image = view.track_pixmap.toImage()
+    return np.frombuffer(image.constBits(), dtype=np.uint8, count=image.sizeInBytes()).reshape(image.height(), -1).copy()
+
+
+def run() -> dict:
+    tracks = load_bundled_tracks()
+    pipeline = Pipeline(next(iter(tracks.values())))
+    view = pipeline.view
+    before, after, render_before, render_after = [], [], [], []
+    vertices_before = vertices_after = 0
+    max_diff = changed = 0
+    for track_dict in tracks.values():
+        view._on_track_ready(dict(track_dict, points=track_dict['points'].copy()))
+        points = view.draw_points
+        before.append(measure(lambda: legacy_static_path(points), repeat=3))
+        after.append(measure(view.create_static_path, repeat=3))
+
+        view.static_path = legacy_static_path(points)
+        vertices_before += view.static_path.elementCount()
+        render_before.append(measure(view.render_track_layer, repeat=3))
+        old_image = track_layer(view)
+        view.static_path = view.create_static_path()
+        vertices_after += view.static_path.elementCount()
+        render_after.append(measure(view.render_track_layer, repeat=3))
+        new_image = track_layer(view)
+        diff = np.abs(old_image.astype(int) - new_image.astype(int))
+        max_diff = max(max_diff, int(diff.max()))
+        changed += int(np.count_nonzero(diff > 8))
+    pipeline.stop()
+    return {
+        'before: create_static_path': float(np.mean(before)),
+        'after: create_static_path': float(np.mean(after)),
+        'before: track layer render': float(np.mean(render_before)),
+        'after: track layer render': float(np.mean(render_after)),
+        'before: vertices per track': vertices_before // len(tracks),
+        'after: vertices per track': vertices_after // len(tracks),
+        'max channel difference (0-255)': max_diff,
+        'channels differing by more than 8': changed,
+    }
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results('static track path', run())
@@ -0,0 +1,77 @@
+from benchmarks.bench_pipeline import Pipeline, TRACK
+from benchmarks.common import measure, load_bundled_tracks, synthetic_telemetry
+import importlib
+import numpy as np
+
+N_CARS = 60
+TICKS = 120
+COUNTED = ('QPen', 'QBrush', 'QColor', 'QRectF', 'QPointF')
+MODULES = ('ir_map.view.ir_map', 'ir_map.view_model.ir_map_vm', 'ir_map.view_model.car_styles')
+
+
+class AllocationCounter:
+    # Swaps the Qt value classes named in COUNTED for counting subclasses in
+    # the overlay modules, so every QPen(...) etc. they construct is counted.
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNTED, 0)
+        self.originals = []
+
+    def __enter__(self):
+        for module_name in MODULES:
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError:
+                continue
+            for name in COUNTED:
+                if name in vars(module):
+                    original = vars(module)[name]
+                    self.originals.append((module, name, original))
+                    setattr(module, name, self.counting(name, original))
+        return self
+
+    def counting(self, name: str, cls):
+        counts = self.counts
+
+        class Counting(cls):
+            def __init__(self, *args, **kwargs):
+                counts[name] += 1
+                super().__init__(*args, **kwargs)
+        return Counting
+
+    def __exit__(self, *args):
+        for module, name, original in self.originals:
+            setattr(module, name, original)
+
+
+def run(n_cars: int = N_CARS, ticks: int = TICKS) -> dict:
+    pipeline = Pipeline(load_bundled_tracks()[TRACK])
+    pipeline.set_cars(n_cars)
+    pipeline.view.motion.set_mode('off')
+    telemetries = list(synthetic_telemetry(1, ticks, n_cars=n_cars))
+    index = [0]
+
+    def tick():
+        # one telemetry tick and the frame it causes
+        pipeline.vm._on_telemetry_updated(telemetries[index[0] % len(telemetries)])
+        index[0] += 1
+        pipeline.paint()
+    tick()
+    results = {}
+    with AllocationCounter() as counter:
+        for _ in range(ticks):
+            tick()
+    for name, count in counter.counts.items():
+        results[f'{name} per tick'] = int(np.ceil(count / ticks))
+    results[f'Qt values per tick, {n_cars} cars'] = int(np.ceil(sum(counter.counts.values()) / ticks))
+    with AllocationCounter() as counter:
+        pipeline.vm._on_config_updated('number', 'car_size', pipeline.vm.config['number']['car_size'])
+        tick()
+    results['Qt values after a config change'] = sum(counter.counts.values())
+    results[f'tick and paint {n_cars} cars'] = measure(tick, repeat=5, number=20)
+    pipeline.stop()
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results(f'Qt value objects built per telemetry tick, {N_CARS} cars', run())
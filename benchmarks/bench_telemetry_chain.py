@@ -0,0 +1,144 @@
+from benchmarks.common import model_sandbox
+from benchmarks.fake_ir_manager import FakeIRManager
+from benchmarks.fake_irsdk import FakeIRSDK
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QApplication
+import math
+import time
+import tracemalloc
+
+TICKS = 2000
+
+
+class DictHop(QObject):
+    # one layer of the dict-based chain: copy on receive, re-emit
+    telemetry_updated = Signal(dict)
+
+    def __init__(self, convert_colors: bool = False):
+        super().__init__()
+        self.convert_colors = convert_colors
+        self.telemetry = {}
+
+    def on_telemetry(self, telemetry: dict):
+        self.telemetry = telemetry.copy()
+        if self.convert_colors:
+            for driver in self.telemetry['drivers']:
+                driver['CarClassColor'] = QColor(hex(driver['CarClassColor']).replace('0x', '#'))
+        self.telemetry_updated.emit(telemetry)
+
+
+class DictWorker(QObject):
+    # IRManagerWorker.update_telemetry as it was before the Telemetry snapshot
+    telemetry_updated = Signal(dict)
+
+    def __init__(self, ir):
+        super().__init__()
+        self.ir = ir
+
+    def update_telemetry(self):
+        self.ir.freeze_var_buffer_latest()
+        telemetry = {
+            'track_name': self.ir['WeekendInfo']['TrackName'],
+            'session_state': self.ir['SessionState'],
+            'drivers': self.ir['DriverInfo']['Drivers'],
+            'player_idx': self.ir['PlayerCarIdx'],
+            'player_class': self.ir['PlayerCarClass'],
+            'player_class_pos': self.ir['PlayerCarClassPosition'],
+            'player_ld_pct': self.ir['LapDistPct'],
+            'player_trk_surf': self.ir['PlayerTrackSurface'],
+            'other_class_posts': self.ir['CarIdxClassPosition'],
+            'other_ld_pcts': self.ir['CarIdxLapDistPct'],
+            'other_trk_surfs': self.ir['CarIdxTrackSurface'],
+            'yaw_north': -self.ir['YawNorth'] + math.pi/2,
+            'vel_x': self.ir['VelocityX'],
+            'vel_y': self.ir['VelocityY'],
+            'vel_z': self.ir['VelocityZ'],
+            'current_lap': self.ir['Lap'],
+            'session_time': self.ir['SessionTime'],
+            'is_on_track': self.ir['IsOnTrack'],
+            'player_inc_cnt': self.ir['PlayerCarDriverIncidentCount'],
+        }
+        self.telemetry_updated.emit(telemetry)
+
+
+def dict_chain(ir):
+    # worker -> IRManager -> Model -> IRMapVM -> ConfigUI + IRMap
+    worker = DictWorker(ir)
+    ir_manager, model, vm, config_ui, ir_map = DictHop(), DictHop(), DictHop(convert_colors=True), DictHop(), DictHop()
+    worker.telemetry_updated.connect(ir_manager.on_telemetry)
+    ir_manager.telemetry_updated.connect(model.on_telemetry)
+    model.telemetry_updated.connect(vm.on_telemetry)
+    vm.telemetry_updated.connect(config_ui.on_telemetry)
+    vm.telemetry_updated.connect(ir_map.on_telemetry)
+    return worker.update_telemetry, (worker, ir_manager, model, vm, config_ui, ir_map)
+
+
+def snapshot_chain(ir):
+    # the real classes, wired like IRManager does but without starting the irsdk thread
+    from ir_map.model import Model
+    from ir_map.model.ir_manager import IRManagerWorker
+    from ir_map.view import ConfigUI, IRMap
+    from ir_map.view_model import IRMapVM
+    worker = IRManagerWorker()
+    worker.ir = ir
+    worker.state.ir_connected = True
+    ir_manager = FakeIRManager()
+    worker.session_info_updated.connect(ir_manager.session_info_updated)
+    worker.telemetry_updated.connect(ir_manager.telemetry_updated)
+    sandbox, paths = model_sandbox()
+    model = Model(ir_manager, **paths)
+    model.load_config()
+    vm = IRMapVM(model)
+    objects = (worker, ir_manager, model, vm, ConfigUI(vm), IRMap(vm), sandbox)
+
+    def update():
+        worker.update_session_info()
+        worker.update_telemetry()
+    return update, objects
+
+
+def measure_chain(make_chain, ticks: int = TICKS) -> dict:
+    ir = FakeIRSDK()
+    update, objects = make_chain(ir)
+    update()
+    start = time.perf_counter()
+    for _ in range(ticks):
+        ir.tick()
+        update()
+    elapsed = time.perf_counter() - start
+    # Python-heap bytes alive at the peak of each tick, Qt's own QVariant
+    # conversions are not traced so this undercounts the dict chain
+    tracemalloc.start()
+    peaks = 0
+    for _ in range(ticks):
+        ir.tick()
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        update()
+        peaks += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    if hasattr(objects[2], 'stop'):
+        objects[2].stop()
+    results = {'time per tick': elapsed / ticks, 'bytes per tick': peaks // ticks}
+    if hasattr(objects[0], 'pool'):
+        # the pool stops growing once it holds the snapshots in flight
+        results['snapshots allocated'] = len(objects[0].pool.snapshots)
+    return results
+
+
+def run(ticks: int = TICKS) -> dict:
+    app = QApplication.instance() or QApplication([])
+    results = {}
+    for name, make_chain in (('dict', dict_chain), ('snapshot', snapshot_chain)):
+        for key, value in measure_chain(make_chain, ticks).items():
+            results[f'{name} {key}'] = value
+    return results
+
+
+if __name__ == '__main__':
+    results = run()
+    for name in ('dict', 'snapshot'):
+        tick = results[f'{name} time per tick']
+        size = results[f'{name} bytes per tick']
+        print(f'{name:<10} {tick * 1000:8.3f} ms/tick  {size / 1024:8.1f} KB/tick  {size * 60 / 1024:10.1f} KB/s at 60 Hz')
@@ -0,0 +1,111 @@
+from benchmarks.common import measure, load_bundled_tracks
+from benchmarks.bench_fusion import map_error
+from benchmarks.bench_pipeline import TRACK
+from ir_map.model.track_builder import build_tracks, generate_track, read_ibt
+from ir_map.model.track_store import load_track_file
+import numpy as np
+import os
+import struct
+import tempfile
+import time
+
+N_FILES = 4
+N_LAPS = 4
+SAMPLES_PER_LAP = 3600
+# .ibt variable, irsdk type (2 int, 1 bool, 4 float, 5 double)
+IBT_TYPES = (
+    ('SessionState', 2),
+    ('LapDistPct', 4),
+    ('PlayerTrackSurface', 2),
+    ('YawNorth', 4),
+    ('VelocityX', 4),
+    ('VelocityY', 4),
+    ('Lap', 2),
+    ('SessionTime', 5),
+    ('IsOnTrack', 1),
+    ('PlayerCarDriverIncidentCount', 2),
+)
+NUMPY_TYPES = {1: '?', 2: '<i4', 4: '<f4', 5: '<f8'}
+
+
+def write_ibt(path: str, track_name: str, columns: dict):
+    # the .ibt layout irsdk reads: header, disk sub-header, variable headers,
+    # session info YAML, then one record per tick
+    record = np.dtype([(name, NUMPY_TYPES[var_type]) for name, var_type in IBT_TYPES])
+    records = np.empty(len(columns['SessionTime']), dtype=record)
+    for name, _ in IBT_TYPES:
+        records[name] = columns[name]
+    session_info = f'---\nWeekendInfo:\n TrackName: {track_name}\n\n'.encode('utf-8')
+    var_header_offset = 144
+    session_info_offset = var_header_offset + 144 * len(IBT_TYPES)
+    buf_offset = session_info_offset + len(session_info)
+    header = struct.pack('<12i', 2, 1, 60, 1, len(session_info), session_info_offset, len(IBT_TYPES),
+                         var_header_offset, 1, record.itemsize, 0, 0)
+    header += struct.pack('<4i', len(records), buf_offset, 0, 0).ljust(64, b'\0')
+    disk_header = struct.pack('<Qddii', 0, 0.0, float(columns['SessionTime'][-1]), 0, len(records))
+    var_headers = b''.join(struct.pack('<3i?3x32s64s32s', var_type, record.fields[name][1], 1, False,
+                                       name.encode(), b'', b'') for name, var_type in IBT_TYPES)
+    with open(path, 'wb') as f:
+        f.write(header + disk_header + var_headers + session_info + records.tobytes())
+
+
+def drive_laps(points: np.ndarray, n_laps: int, seed: int = 0) -> dict:
+    # .ibt columns of clean laps along the track at 60 Hz, speeding up and
+    # slowing down, the velocity taking the car from one sample to the next
+    rng = np.random.default_rng(seed)
+    n = n_laps * SAMPLES_PER_LAP
+    steps = (1 + 0.5 * np.sin(8 * np.pi * np.arange(n) / SAMPLES_PER_LAP)) * rng.uniform(0.9, 1.1, n)
+    distance = np.cumsum(steps) / steps.sum() * n_laps
+    ld_pcts = distance % 1.0
+    xy = np.column_stack([np.interp(ld_pcts, points[:, 2], points[:, i]) for i in (0, 1)])
+    session_times = np.arange(1, n + 1) / 60
+    delta = np.diff(xy, axis=0, prepend=xy[:1])
+    speeds = np.hypot(*delta.T) * 60
+    yaws = np.arctan2(-delta[:, 1], delta[:, 0])
+    return {
+        'SessionState': np.full(n, 4),
+        'LapDistPct': ld_pcts,
+        'PlayerTrackSurface': np.full(n, 3),
+        'YawNorth': np.pi / 2 - yaws,
+        'VelocityX': speeds,
+        'VelocityY': np.zeros(n),
+        'Lap': np.floor(distance).astype(int) + 1,
+        'SessionTime': session_times,
+        'IsOnTrack': np.ones(n, dtype=bool),
+        'PlayerCarDriverIncidentCount': np.zeros(n, dtype=int),
+    }
+
+
+def run(n_files: int = N_FILES) -> dict:
+    truth = load_bundled_tracks()[TRACK]['points']
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        ibt_path = os.path.join(directory, 'telemetry')
+        tracks_path = os.path.join(directory, 'tracks')
+        os.makedirs(ibt_path)
+        for i in range(n_files):
+            write_ibt(os.path.join(ibt_path, f'car {TRACK} {i}.ibt'), TRACK, drive_laps(truth, N_LAPS, i))
+        paths = sorted(os.path.join(ibt_path, name) for name in os.listdir(ibt_path))
+
+        track_name, columns = read_ibt(paths[0])
+        track_dict = generate_track(columns)
+        results['one file: laps'] = track_dict['laps']
+        results['one file: map error (x1e5 of lap)'] = int(1e5 * map_error(track_dict['points'], truth) + 0.5)
+        results['read_ibt per file'] = measure(lambda: read_ibt(paths[0]), repeat=3)
+        results['generate_track per lap'] = measure(lambda: generate_track(columns), repeat=3) / N_LAPS
+
+        start = time.perf_counter()
+        track_paths = build_tracks([ibt_path], tracks_path)
+        results[f'build_tracks {n_files} files'] = time.perf_counter() - start
+        stored = load_track_file(track_paths[0])
+        results['tracks written'] = len(track_paths)
+        results['fused laps'] = stored['laps']
+        results['fused: map error (x1e5 of lap)'] = int(1e5 * map_error(stored['points'], truth) + 0.5)
+        # a second run adds to the stored track
+        results['second run: fused laps'] = load_track_file(build_tracks(paths[:1], tracks_path)[0])['laps']
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results(f'offline track builder, {N_FILES} .ibt files of {N_LAPS} laps of {TRACK}', run())
@@ -0,0 +1,79 @@
+from benchmarks.common import measure, load_bundled_tracks
+from benchmarks.bench_pipeline import TRACK
+from ir_map.model.track_generator import TrackGenerator, ResampleMode
+from ir_map.model.track_index import TrackIndex
+from benchmarks.common import make_raw_lap
+import numpy as np
+
+N_CARS = 63
+
+
+def lookup_searchsorted(ld_pct_column: np.ndarray, ld_pcts: np.ndarray):
+    # the binary search IRMap.interpolate_positions did before the index, kept as reference
+    upper = np.clip(np.searchsorted(ld_pct_column, ld_pcts, side='right'), 1, len(ld_pct_column) - 1)
+    lower = upper - 1
+    span = ld_pct_column[upper] - ld_pct_column[lower]
+    ratio = np.divide(ld_pcts - ld_pct_column[lower], span, out=np.zeros_like(span), where=span > 0)
+    return lower, upper, np.clip(ratio, 0.0, 1.0)
+
+
+def lookup_mismatches(index: TrackIndex, ld_pcts: np.ndarray) -> int:
+    lower, _, ratio = index.lookup(ld_pcts)
+    ref_lower, _, ref_ratio = lookup_searchsorted(index.ld_pcts, ld_pcts)
+    return int(np.count_nonzero((lower != ref_lower) | (np.abs(ratio - ref_ratio) > 1e-12)))
+
+
+def probe_ld_pcts(index: TrackIndex, rng) -> np.ndarray:
+    # random positions, every track point and bucket edge exactly, and values
+    # off the lap (-1 for cars not in the world)
+    n_buckets = len(index.buckets)
+    return np.concatenate((rng.random(100000), index.ld_pcts, np.arange(n_buckets + 1) / n_buckets,
+                           np.nextafter(index.ld_pcts, 2.0), [-1.0, -1e-9, 1.0, 1.2]))
+
+
+def run(n_cars: int = N_CARS) -> dict:
+    rng = np.random.default_rng(0)
+    tracks = load_bundled_tracks()
+    results = {}
+    # placement must match the binary search on every bundled track, and on
+    # arc length resampled tracks, where the LapDistPct spacing is uneven
+    arc_generator = TrackGenerator(resample_mode=ResampleMode.ARC_LENGTH)
+    mismatches = 0
+    max_steps = 0
+    for track in tracks.values():
+        for points in (track['points'], arc_generator.resample_points(make_raw_lap(track['points'], track['length']))):
+            index = TrackIndex(points)
+            mismatches += lookup_mismatches(index, probe_ld_pcts(index, rng))
+            max_steps = max(max_steps, index.max_steps)
+    results['lookup mismatches vs searchsorted'] = mismatches
+    results['max bucket steps'] = max_steps
+
+    points = tracks[TRACK]['points']
+    index = TrackIndex(points)
+    results[f'{TRACK} segments'] = len(index.segments)
+    results[f'{TRACK} corners'] = sum(segment['kind'] != 'straight' for segment in index.segments)
+    # the segment lengths add up to the lap, apart from the closing duplicate point
+    results['segment length / lap length (x1000)'] = int(1000 * sum(s['length'] for s in index.segments) / index.length + 0.5)
+    # a straight line has no corners, and fewer than two points give no
+    # positions rather than an IndexError
+    line = np.column_stack((np.linspace(0, 1000, 500), np.zeros(500), np.linspace(0, 1, 500), np.zeros(500)))
+    results['straight line: corners'] = sum(s['kind'] != 'straight' for s in TrackIndex(line).segments)
+    probe = rng.random(n_cars)
+    short = [TrackIndex(line[:n]) for n in (0, 1)]
+    results['under 2 points: positions found'] = sum(
+        index.lookup(probe) is not None or index.sec_num_at(probe) is not None
+        or not np.isnan(index.distance_at(probe)).all() or not np.isnan(index.gap(probe, probe)).all()
+        for index in short)
+    results['build index'] = measure(lambda: TrackIndex(points), repeat=5, number=10)
+
+    ld_pcts = rng.random(n_cars)
+    results[f'searchsorted {n_cars} cars'] = measure(lambda: lookup_searchsorted(index.ld_pcts, ld_pcts), repeat=5, number=1000)
+    results[f'bucket lookup {n_cars} cars'] = measure(lambda: index.lookup(ld_pcts), repeat=5, number=1000)
+    ahead = np.roll(ld_pcts, 1)
+    results[f'gap {n_cars} cars'] = measure(lambda: index.gap(ld_pcts, ahead), repeat=5, number=1000)
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results(f'track index, {N_CARS} cars', run())
@@ -0,0 +1,41 @@
+from benchmarks.common import measure, load_bundled_tracks
+from ir_map.model.track_store import save_track_file, load_track_file, load_legacy_track
+from ir_map.model.track_index import index_track
+import numpy as np
+import os
+import pickle
+import tempfile
+
+
+def run(repeat: int = 50) -> dict:
+    # one bundled track saved both ways, as Model.save_track did and does now
+    track_dict = next(iter(load_bundled_tracks().values()))
+    directory = tempfile.mkdtemp()
+    pickle_path = os.path.join(directory, 'track.pkl')
+    track_path = os.path.join(directory, 'track.trk')
+    with open(pickle_path, 'wb') as f:
+        pickle.dump(dict(track_dict, points=np.asarray(track_dict['points']).tolist()), f)
+    save_track_file(track_path, track_dict)
+
+    loaded = [load_legacy_track(pickle_path), load_track_file(track_path), load_track_file(track_path, mmap=True)]
+    mismatches = sum(not np.array_equal(loaded[0]['points'], track['points']) for track in loaded[1:])
+    # Model.load_track indexes the loaded points, that must not copy them
+    copies = 0
+    for track in loaded[1:]:
+        points = track['points']
+        copies += not np.shares_memory(index_track(track)['points'], points)
+    return {
+        'pickle load': measure(lambda: load_legacy_track(pickle_path), repeat=repeat),
+        'trk load': measure(lambda: load_track_file(track_path), repeat=repeat),
+        'trk load (mmap)': measure(lambda: load_track_file(track_path, mmap=True), repeat=repeat),
+        'pickle bytes': os.path.getsize(pickle_path),
+        'trk bytes': os.path.getsize(track_path),
+        'point mismatches': mismatches,
+        'trk load + index_track': measure(lambda: index_track(load_track_file(track_path)), repeat=repeat),
+        'point copies by index_track': copies,
+    }
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results('track load', run())
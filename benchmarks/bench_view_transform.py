@@ -0,0 +1,68 @@
+from benchmarks.bench_pipeline import Pipeline
+from benchmarks.common import measure, load_bundled_tracks
+import numpy as np
+
+SIZES = ((800, 800), (600, 600), (1000, 1000), (800, 800))
+
+
+def legacy_rescale(points: np.ndarray, width: int, height: int) -> np.ndarray:
+    # rescale_track before the view transform, written back into points
+    min_x, max_x = np.min(points[:, 0]), np.max(points[:, 0])
+    min_y, max_y = np.min(points[:, 1]), np.max(points[:, 1])
+    track_width = max_x - min_x
+    track_height = max_y - min_y
+    scale = min(width / track_width if track_width > 0 else 1, height / track_height if track_height > 0 else 1) * 0.9
+    points[:, 0] = points[:, 0] * scale + (width - track_width * scale) / 2 - min_x * scale
+    points[:, 1] = points[:, 1] * scale + (height - track_height * scale) / 2 - min_y * scale
+    return points
+
+
+def run(n_resizes: int = 100) -> dict:
+    track_dict = load_bundled_tracks()['barcelona_gp']
+    world = track_dict['points'].copy()
+
+    # the old path: every resize rescales the model's (already rescaled) array
+    model_points = world.copy()
+    for i in range(n_resizes):
+        legacy_rescale(model_points, *SIZES[i % len(SIZES)])
+    legacy_rescale(model_points, *SIZES[0])
+    reference = legacy_rescale(world.copy(), *SIZES[0])
+
+    pipeline = Pipeline(dict(track_dict, points=world.copy()))
+    view = pipeline.view
+    view_world = view.track_dict['points']
+    before = view_world.copy()
+    for i in range(n_resizes):
+        view.resize(*SIZES[i % len(SIZES)])
+        view.update_draw_points()
+    view.resize(*SIZES[0])
+    view.update_draw_points()
+
+    def resize_legacy():
+        legacy_rescale(model_points, *SIZES[0])
+
+    def resize():
+        # a new widget size, the transform is worked out again
+        view.view_transform_key = None
+        view.update_draw_points()
+
+    def redraw():
+        # same track and size, the cached transform is reused
+        view.update_draw_points()
+
+    results = {
+        'before: rescale per resize': measure(resize_legacy, repeat=20),
+        'after: transform per resize': measure(resize, repeat=20),
+        'after: transform, cached': measure(redraw, repeat=20),
+        f'before: drift after {n_resizes} resizes (px x1000)': int(np.abs(model_points[:, :2] - reference[:, :2]).max() * 1000),
+        f'after: drift after {n_resizes} resizes (px x1000)': int(np.abs(view.draw_points[:, :2] - reference[:, :2]).max() * 1000),
+        'before: world points modified': int(not np.array_equal(model_points, world)),
+        'after: world points modified': int(not np.array_equal(view_world, before)),
+    }
+    pipeline.stop()
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_results
+    print_results('view transform', run())
@@ -0,0 +1,144 @@
+import time
+
+
+def measure(func, repeat: int = 5, number: int = 1) -> float:
+    # best wall time of `repeat` runs, per call, in seconds
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def print_results(title: str, results: dict):
+    print(title)
+    # floats are seconds, ints are counts
+    for key, value in results.items():
+        if isinstance(value, int):
+            print(f'  {key:<40} {value:10d}')
+        else:
+            print(f'  {key:<40} {value * 1000:10.3f} ms')
+
+
+def model_sandbox() -> tuple:
+    # a temporary directory with a copy of config.json and an empty track
+    # store, so a benchmark's Model never reads or writes the working tree;
+    # keep the directory object alive as long as the Model
+    import os
+    import shutil
+    import tempfile
+    from ir_map.model.model import PATH
+    directory = tempfile.TemporaryDirectory()
+    config_path = os.path.join(directory.name, 'config.json')
+    if os.path.exists(PATH.CONFIG_PATH.value):
+        shutil.copyfile(PATH.CONFIG_PATH.value, config_path)
+    tracks_path = os.path.join(directory.name, 'tracks')
+    os.makedirs(tracks_path)
+    return directory, {'config_path': config_path, 'tracks_path': tracks_path}
+
+
+def load_bundled_tracks() -> dict:
+    import glob
+    import os
+    from ir_map.model.track_store import load_track_file, TRACK_EXTENSION
+    tracks_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tracks')
+    tracks = {}
+    for track_path in sorted(glob.glob(os.path.join(tracks_path, f'*{TRACK_EXTENSION}'))):
+        tracks[os.path.splitext(os.path.basename(track_path))[0]] = load_track_file(track_path)
+    return tracks
+
+
+def make_raw_lap(points, n: int, seed: int = 0):
+    # fake a raw lap of n samples along a resampled track, with uneven
+    # LapDistPct spacing like a real car speeding up and slowing down
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    steps = rng.uniform(0.5, 1.5, n)
+    ld_pcts = np.cumsum(steps)
+    ld_pcts = (ld_pcts - ld_pcts[0]) / (ld_pcts[-1] - ld_pcts[0])
+    x = np.interp(ld_pcts, points[:, 2], points[:, 0])
+    y = np.interp(ld_pcts, points[:, 2], points[:, 1])
+    return np.column_stack((x, y, ld_pcts, np.ones(n)))
+
+
+def make_dead_reckoned_lap(points, n: int, seed: int = 0, start_ld_pct: float = 0.5, drift: float = 1.0):
+    # fake a raw lap the way TrackGenerator collects one: n samples evenly
+    # spaced in time in driving order from start_ld_pct once around, with the
+    # speed going up and down three times a lap. Integrated from (0, 0) out
+    # of steps with a per-lap speed scale and heading error, a constant
+    # velocity bias and noise, scaled by `drift`.
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    phase = rng.uniform(0, 2 * np.pi)
+    steps = (1 + 0.6 * np.sin(6 * np.pi * np.arange(n) / n + phase)) * rng.uniform(0.9, 1.1, n)
+    laps = np.cumsum(steps) - steps[0]
+    laps /= laps[-1] + steps.mean()
+    ld_pcts = (start_ld_pct + laps) % 1.0
+    x = np.interp(ld_pcts, points[:, 2], points[:, 0])
+    y = np.interp(ld_pcts, points[:, 2], points[:, 1])
+    true_steps = np.diff(np.column_stack((x, y)), axis=0)
+    step_length = np.hypot(*true_steps.T).mean()
+    angle = rng.normal(0, 0.003 * drift)
+    rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    scale = 1 + rng.normal(0, 0.003 * drift)
+    bias = rng.normal(0, 0.003 * drift * step_length, 2)
+    noise = rng.normal(0, 0.02 * drift * step_length, true_steps.shape)
+    measured = scale * true_steps @ rotation.T + bias + noise
+    xy = np.vstack(((0.0, 0.0), np.cumsum(measured, axis=0)))
+    return np.column_stack((xy, ld_pcts, np.ones(n)))
+
+
+def synthetic_drivers(n_cars: int = 63) -> list:
+    # DriverInfo.Drivers entries carry ~40 keys each in a real session
+    drivers = []
+    for car_idx in range(n_cars):
+        driver = {f'Field{i}': f'value {i}' for i in range(34)}
+        driver.update({
+            'CarIdx': car_idx,
+            'UserName': f'Driver {car_idx}',
+            'CarNumber': str(car_idx + 1),
+            'CarClassID': 1 if car_idx % 3 else 2,
+            'CarClassColor': 0xffffff if car_idx % 3 else 0xff5888,
+            'IRating': 1500 + car_idx,
+        })
+        drivers.append(driver)
+    return drivers
+
+
+def synthetic_session_info(n_cars: int = 1, track_name: str = 'synthetic') -> dict:
+    return {'track_name': track_name, 'drivers': synthetic_drivers(n_cars)}
+
+
+def synthetic_telemetry(n_laps: int = 3, samples_per_lap: int = 3600, n_cars: int = 1, radius: float = 500.0):
+    # Telemetry snapshots for a car driving clean laps around a circle,
+    # other cars spread around the lap
+    import math
+    from ir_map.model.telemetry import Telemetry
+    speed = 2 * math.pi * radius / (samples_per_lap / 60)
+    session_time = 0.0
+    for lap in range(n_laps):
+        for i in range(samples_per_lap):
+            ld_pct = i / samples_per_lap
+            session_time += 1 / 60
+            ld_pcts = [(ld_pct + car / max(n_cars, 1)) % 1.0 for car in range(n_cars)] + [-1.0] * (64 - n_cars)
+            yield Telemetry.from_dict({
+                'session_state': 4,
+                'player_idx': 0,
+                'player_class': 1,
+                'player_class_pos': 1,
+                'player_ld_pct': ld_pct,
+                'player_trk_surf': 3,
+                'other_class_posts': list(range(1, n_cars + 1)) + [0] * (64 - n_cars),
+                'other_ld_pcts': ld_pcts,
+                'other_trk_surfs': [3] * n_cars + [-1] * (64 - n_cars),
+                'yaw_north': 2 * math.pi * ld_pct + math.pi / 2,
+                'vel_x': speed,
+                'vel_y': 0.0,
+                'vel_z': 0.0,
+                'current_lap': lap + 1,
+                'session_time': session_time,
+                'is_on_track': True,
+                'player_inc_cnt': 0,
+            })
@@ -0,0 +1,46 @@
+from PySide6.QtCore import QObject, Signal
+from benchmarks.common import synthetic_session_info
+from ir_map.model.ir_manager import State
+from ir_map.model.telemetry import Telemetry
+from ir_map.model.tick_source import AcquisitionStats
+
+
+class FakeIRManagerWorker(QObject):
+    state_updated = Signal(bool)
+    telemetry_updated = Signal(object)
+
+
+class FakeIRManager(QObject):
+    # stands in for IRManager without starting the irsdk thread,
+    # telemetry is pushed by the benchmark through push()
+    ir_connected = Signal()
+    ir_disconnected = Signal()
+    session_info_updated = Signal(dict)
+    telemetry_updated = Signal(object)
+    acquisition_stats_updated = Signal(dict)
+
+    def __init__(self):
+        super().__init__()
+        self.worker = FakeIRManagerWorker()
+        self.state = State()
+        self.acquisition_stats = AcquisitionStats().as_dict()
+        self.session_info = {'track_name': '', 'drivers': []}
+        self.telemetry = Telemetry()
+
+    def connect_ir(self, session_info: dict = None):
+        self.state.ir_connected = True
+        self.worker.state_updated.emit(True)
+        self.session_info = session_info or synthetic_session_info()
+        self.session_info_updated.emit(self.session_info)
+        self.ir_connected.emit()
+
+    def set_telemetry_rate(self, telemetry_rate: int):
+        pass
+
+    def push(self, telemetry):
+        self.worker.telemetry_updated.emit(telemetry)
+        self.telemetry = telemetry
+        self.telemetry_updated.emit(telemetry)
+
+    def stop(self):
+        pass
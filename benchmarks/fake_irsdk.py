@@ -0,0 +1,60 @@
+from benchmarks.common import synthetic_drivers
+import math
+
+
+class FakeIRSDK:
+    # minimal irsdk.IRSDK stand-in: var-buffer reads return the values in self.vars,
+    # session-string reads return the parsed dicts in self.session_info
+    def __init__(self, n_cars: int = 63):
+        self.is_initialized = True
+        self.is_connected = True
+        self.session_info_update = 1
+        self.session_info = {
+            'WeekendInfo': {'TrackName': 'synthetic'},
+            'DriverInfo': {'Drivers': synthetic_drivers(n_cars)},
+        }
+        self.vars = {
+            'SessionState': 4,
+            'SessionTime': 0.0,
+            'SessionTick': 0,
+            'PlayerCarIdx': 0,
+            'PlayerCarClass': 1,
+            'PlayerCarClassPosition': 1,
+            'LapDistPct': 0.0,
+            'PlayerTrackSurface': 3,
+            'CarIdxClassPosition': [i + 1 if i < n_cars else 0 for i in range(64)],
+            'CarIdxLapDistPct': [i / n_cars if i < n_cars else -1.0 for i in range(64)],
+            'CarIdxTrackSurface': [3 if i < n_cars else -1 for i in range(64)],
+            'YawNorth': 0.0,
+            'VelocityX': 50.0,
+            'VelocityY': 0.0,
+            'VelocityZ': 0.0,
+            'Lap': 1,
+            'IsOnTrack': True,
+            'PlayerCarDriverIncidentCount': 0,
+        }
+
+    def startup(self, *args, **kwargs):
+        return True
+
+    def shutdown(self):
+        pass
+
+    def freeze_var_buffer_latest(self):
+        pass
+
+    def unfreeze_var_buffer_latest(self):
+        pass
+
+    def tick(self, dt: float = 1 / 60):
+        self.vars['SessionTick'] += 1
+        self.vars['SessionTime'] += dt
+        self.vars['LapDistPct'] = (self.vars['LapDistPct'] + 0.0005) % 1.0
+        self.vars['YawNorth'] = 2 * math.pi * self.vars['LapDistPct']
+
+    def __getitem__(self, key):
+        if key in self.vars:
+            value = self.vars[key]
+            # irsdk unpacks array variables into a new list on every read
+            return list(value) if isinstance(value, list) else value
+        return self.session_info.get(key)
@@ -0,0 +1,114 @@
+from benchmarks.common import synthetic_drivers
+import mmap
+import struct
+import yaml
+
+# irsdk var types: 0 char, 1 bool, 2 int, 3 bitfield, 4 float, 5 double
+VAR_TYPE_FORMATS = ['c', '?', 'i', 'I', 'f', 'd']
+VARS = (
+    ('SessionNum', 2, 1),
+    ('SessionState', 2, 1),
+    ('SessionTick', 2, 1),
+    ('SessionTime', 5, 1),
+    ('PlayerCarIdx', 2, 1),
+    ('PlayerCarClass', 2, 1),
+    ('PlayerCarClassPosition', 2, 1),
+    ('PlayerTrackSurface', 2, 1),
+    ('PlayerCarDriverIncidentCount', 2, 1),
+    ('Lap', 2, 1),
+    ('LapDistPct', 4, 1),
+    ('IsOnTrack', 1, 1),
+    ('YawNorth', 4, 1),
+    ('VelocityX', 4, 1),
+    ('VelocityY', 4, 1),
+    ('VelocityZ', 4, 1),
+    ('CarIdxClassPosition', 2, 64),
+    ('CarIdxLapDistPct', 4, 64),
+    ('CarIdxTrackSurface', 2, 64),
+)
+HEADER_SIZE = 112
+VAR_HEADER_SIZE = 144
+SESSION_INFO_SIZE = 512 * 1024
+
+
+def session_yaml(track_name: str = 'synthetic', n_cars: int = 63, revision: int = 0) -> bytes:
+    drivers = synthetic_drivers(n_cars)
+    for driver in drivers:
+        driver['IRating'] += revision
+    sections = [
+        {'WeekendInfo': {'TrackName': track_name, 'TrackDisplayName': track_name, 'TrackID': 1}},
+        {'DriverInfo': {'DriverCarIdx': 0, 'Drivers': drivers}},
+    ]
+    text = '---\n' + '\n'.join(yaml.safe_dump(section, default_flow_style=False, sort_keys=False, indent=1) for section in sections)
+    return (text + '\n...\n').encode('utf-8')
+
+
+class IRSDKDump:
+    # Writes a file laid out like the iRacing shared memory, so the real
+    # irsdk.IRSDK can read it with startup(test_file=path) on any OS.
+    # Values can be changed while irsdk has it open, the mapping is shared.
+    def __init__(self, path: str, track_name: str = 'synthetic', n_cars: int = 63):
+        self.offsets = {}
+        offset = 0
+        for name, var_type, count in VARS:
+            self.offsets[name] = (offset, VAR_TYPE_FORMATS[var_type] * count)
+            offset += struct.calcsize(VAR_TYPE_FORMATS[var_type]) * count
+        self.buf_len = offset
+        var_header_offset = HEADER_SIZE
+        session_info_offset = var_header_offset + VAR_HEADER_SIZE * len(VARS)
+        self.buf_offset = session_info_offset + SESSION_INFO_SIZE
+        self.track_name = track_name
+        self.n_cars = n_cars
+        self.revision = 0
+        session_info = session_yaml(track_name, n_cars)
+
+        with open(path, 'wb') as f:
+            f.write(b'\x00' * (self.buf_offset + self.buf_len))
+        self.file = open(path, 'r+b')
+        self.mem = mmap.mmap(self.file.fileno(), 0)
+        # version, status(connected), tick_rate, session_info_update, len, offset,
+        # num_vars, var_header_offset, num_buf, buf_len, cur_buf_tick_count
+        struct.pack_into('11i', self.mem, 0, 2, 1, 60, 1, len(session_info), session_info_offset,
+                         len(VARS), var_header_offset, 1, self.buf_len, 0)
+        struct.pack_into('3i', self.mem, 48, 0, self.buf_offset, 0)
+        for i, (name, var_type, count) in enumerate(VARS):
+            struct.pack_into('3i?3x32s', self.mem, var_header_offset + i * VAR_HEADER_SIZE,
+                             var_type, self.offsets[name][0], count, False, name.encode())
+        self.mem[session_info_offset:session_info_offset + len(session_info)] = session_info
+        self.set('SessionState', 4)
+        self.set('PlayerCarClassPosition', 1)
+        self.set('PlayerTrackSurface', 3)
+        self.set('IsOnTrack', True)
+        self.set('VelocityX', 50.0)
+        self.set('CarIdxClassPosition', [i + 1 if i < n_cars else 0 for i in range(64)])
+        self.set('CarIdxLapDistPct', [i / n_cars if i < n_cars else -1.0 for i in range(64)])
+        self.set('CarIdxTrackSurface', [3 if i < n_cars else -1 for i in range(64)])
+
+    def set(self, name: str, value):
+        offset, fmt = self.offsets[name]
+        values = value if isinstance(value, (list, tuple)) else (value,)
+        struct.pack_into(fmt, self.mem, self.buf_offset + offset, *values)
+
+    def tick(self, dt: float = 1 / 60):
+        tick_count = struct.unpack_from('i', self.mem, 48)[0] + 1
+        offset, _ = self.offsets['SessionTime']
+        session_time = struct.unpack_from('d', self.mem, self.buf_offset + offset)[0]
+        self.set('SessionTick', tick_count)
+        self.set('SessionTime', session_time + dt)
+        struct.pack_into('i', self.mem, 48, tick_count)
+        struct.pack_into('i', self.mem, 40, tick_count)
+
+    def update_session_info(self):
+        # rewrite the YAML with changed driver data and bump SessionInfoUpdate,
+        # like the sim does when results or ratings change
+        self.revision += 1
+        session_info = session_yaml(self.track_name, self.n_cars, self.revision)
+        session_info_offset = struct.unpack_from('i', self.mem, 20)[0]
+        self.mem[session_info_offset:session_info_offset + SESSION_INFO_SIZE] = b'\x00' * SESSION_INFO_SIZE
+        self.mem[session_info_offset:session_info_offset + len(session_info)] = session_info
+        struct.pack_into('i', self.mem, 16, len(session_info))
+        struct.pack_into('i', self.mem, 12, struct.unpack_from('i', self.mem, 12)[0] + 1)
+
+    def close(self):
+        self.mem.close()
+        self.file.close()
@@ -0,0 +1,154 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import sys
+
+# Runs benchmark modules and compares their results with a stored baseline.
+#   python -m benchmarks.suite                     run and compare with baseline.json
+#   python -m benchmarks.suite --save-baseline     store the results as the new baseline
+#   python -m benchmarks.suite --json results.json also write the results
+# Exits with 1 when a timing is slower than the baseline by more than the tolerance.
+SUITES = (
+    'pipeline',
+    'replay',
+    'track_load',
+    'persistence',
+    'paint',
+    'static_path',
+    'view_transform',
+    'frame_scheduler',
+    'telemetry_chain',
+    'main_thread',
+    'resample',
+    'session_info',
+    'acquisition',
+    'point_buffer',
+    'motion',
+    'styles',
+    'labels',
+    'renderer',
+    'profiling',
+    'track_index',
+    'fusion',
+    'correction',
+    'dead_reckoning',
+    'track_builder',
+)
+DEFAULT_SUITES = ('pipeline', 'replay', 'track_load')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+TOLERANCE = 0.25
+
+
+def environment() -> dict:
+    import numpy as np
+    import PySide6
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'numpy': np.__version__,
+        'pyside6': PySide6.__version__,
+    }
+
+
+def run_suites(names) -> dict:
+    results = {}
+    for name in names:
+        module = importlib.import_module(f'benchmarks.bench_{name}')
+        # the app prints progress (lap changes, connects), keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = module.run()
+        # the type is the unit: a float is seconds, anything else (bytes,
+        # scaled errors) has to be reported as an int count
+        for key, value in results[name].items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise TypeError(f'{name}: {key}: results are float seconds or int counts, got {value!r}')
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float = TOLERANCE) -> list:
+    # floats are seconds (lower is better), ints are counts that should stay
+    # within the tolerance (small counts, like mismatches, must match exactly)
+    rows = []
+    for suite, values in results.items():
+        for key, value in values.items():
+            base = baseline.get(suite, {}).get(key)
+            if base is None:
+                status = 'new'
+            elif isinstance(value, int):
+                status = 'ok' if abs(value - base) <= tolerance * abs(base) else 'changed'
+            elif base > 0 and value > base * (1 + tolerance):
+                status = 'regression'
+            elif base > 0 and value < base * (1 - tolerance):
+                status = 'improved'
+            else:
+                status = 'ok'
+            rows.append((suite, key, value, base, status))
+    return rows
+
+
+def format_value(value) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, int):
+        return f'{value:d}'
+    return f'{value * 1000:.3f} ms'
+
+
+def print_rows(rows: list):
+    for suite, key, value, base, status in rows:
+        print(f'  {suite + ": " + key:<56} {format_value(value):>14} {format_value(base):>14}  {status}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+    parser.add_argument('suites', nargs='*', metavar='SUITE',
+                        help=f'suites to run, from {", ".join(SUITES)} (default: {" ".join(DEFAULT_SUITES)})')
+    parser.add_argument('--all', action='store_true', help='run every suite')
+    parser.add_argument('--json', metavar='PATH', help='write the results as JSON')
+    parser.add_argument('--baseline', metavar='PATH', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='allowed slowdown as a fraction of the baseline (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    names = SUITES if args.all else args.suites or DEFAULT_SUITES
+    for name in names:
+        if name not in SUITES:
+            parser.error(f'unknown suite: {name}')
+    report = {'environment': environment(), 'results': run_suites(names)}
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['results']
+    rows = compare(report['results'], baseline, args.tolerance)
+    print(f'{"benchmark":<58} {"result":>14} {"baseline":>14}')
+    print_rows(rows)
+
+    if args.save_baseline:
+        # keep the suites that were not run this time
+        baseline.update(report['results'])
+        with open(args.baseline, 'w') as f:
+            json.dump({'environment': report['environment'], 'results': baseline}, f, indent=4)
+        print(f'baseline saved: {args.baseline}')
+        return 0
+
+    regressions = [row for row in rows if row[4] in ('regression', 'changed')]
+    if regressions:
+        print(f'{len(regressions)} regression(s) against {args.baseline}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,20 @@
+import argparse
+import os
+from ir_map.model.track_builder import build_tracks
+from ir_map.profiling import setup_logging
+
+# builds tracks/*.trk from iRacing .ibt telemetry files, no sim needed;
+# tracks already stored are fused with the new laps unless --replace
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='build track maps from iRacing .ibt telemetry files')
+    parser.add_argument('paths', nargs='+', metavar='PATH', help='.ibt files, or directories searched for them')
+    parser.add_argument('--tracks-path', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tracks'),
+                        help='track store to write to (default: %(default)s)')
+    parser.add_argument('--workers', type=int, help='worker processes, one file each (default: one per CPU)')
+    parser.add_argument('--replace', action='store_true', help='replace stored tracks instead of adding to them')
+    parser.add_argument('--log-level', default='info', choices=['debug', 'info', 'warning', 'error'],
+                        help='messages to log (default: %(default)s)')
+    args = parser.parse_args()
+    setup_logging(args.log_level)
+    for track_path in build_tracks(args.paths, args.tracks_path, args.workers, args.replace):
+        print(f'built: {track_path}')
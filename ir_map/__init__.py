@@ -1,12 +1,21 @@
 from PySide6.QtWidgets import QApplication
-from .model import Model, IRManager
+from .model import Model, IRManager, TelemetryRecorder, ReplaySource
 from .view_model import IRMapVM
 from .view import IRMap, ConfigUI
+from .profiling import PROFILER, setup_logging
 import os
 
-def main():
+def main(record=None, replay=None, speed=1.0, loop=False, headless=False, log_level='warning', profile=None):
+    setup_logging(log_level)
+    if profile:
+        # spans of the whole run, written as a Chrome trace on exit
+        PROFILER.enable(tracing=True)
+    if headless:
+        os.environ['QT_QPA_PLATFORM'] = 'offscreen'
     app = QApplication([])
-    ir_manager = IRManager()
+    ir = ReplaySource(replay, speed, loop) if replay else None
+    recorder = TelemetryRecorder(record) if record else None
+    ir_manager = IRManager(ir, recorder=recorder)
     model = Model(ir_manager)
     model.load_config()
     
@@ -17,8 +26,15 @@ def main():
     
     ui.show()
     
+    if replay and not loop:
+        model.ir_disconnected.connect(app.quit)
+    
     app.aboutToQuit.connect(model.save_config)
     app.aboutToQuit.connect(model.save_track)
+    app.aboutToQuit.connect(model.stop)
+    app.aboutToQuit.connect(ir_manager.stop)
+    if profile:
+        app.aboutToQuit.connect(lambda: PROFILER.export_chrome_trace(profile))
     app.exec()
 
 if __name__ == "__main__":
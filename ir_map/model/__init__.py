@@ -1,3 +1,9 @@
 from .model import Model
 from .ir_manager import IRManager
-from .track_generator import TrackGenerator
+from .telemetry import Telemetry
+from .track_generator import TrackGenerator, ResampleMode
+from .point_buffer import PointBuffer
+from .track_index import TrackIndex, index_track, track_index
+from .track_correction import ClosureMode
+from .track_fusion import TrackFusion
+from .telemetry_recorder import TelemetryRecorder, TelemetryRecording, ReplaySource
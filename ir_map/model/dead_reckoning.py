@@ -0,0 +1,34 @@
+import numpy as np
+
+# Raw samples as the track generator collects them, one row per tick in
+# driving order, and their integration into lap points (x, y, ld_pct,
+# sec_num). Collecting a sample is a row store; the trigonometry and the
+# integration run once per lap over the whole array, so recorded or .ibt
+# telemetry goes through the same code at thousands of laps per second.
+VEL_X, VEL_Y, YAW_NORTH, SESSION_TIME, LD_PCT = range(5)
+SAMPLE_COLUMNS = 5
+
+def sample_row(telemetry) -> tuple:
+    return (telemetry['vel_x'], telemetry['vel_y'], telemetry['yaw_north'],
+            telemetry['session_time'], telemetry['player_ld_pct'])
+
+
+def dead_reckon(samples: np.ndarray) -> np.ndarray:
+    # Car frame velocity turned to the world by the heading, times the
+    # session time since the sample before; the first sample is the origin.
+    # y is flipped to grow downwards, as the map is drawn.
+    points = np.empty((len(samples), 4), dtype=float)
+    if len(samples) == 0:
+        return points
+    vel_x = samples[1:, VEL_X]
+    vel_y = samples[1:, VEL_Y]
+    cos = np.cos(samples[1:, YAW_NORTH])
+    sin = np.sin(samples[1:, YAW_NORTH])
+    delta_times = np.diff(samples[:, SESSION_TIME])
+
+    points[0, :2] = 0.0
+    np.cumsum((vel_x * cos - vel_y * sin) * delta_times, out=points[1:, 0])
+    np.cumsum(-(vel_x * sin + vel_y * cos) * delta_times, out=points[1:, 1])
+    points[:, 2] = samples[:, LD_PCT]
+    points[:, 3] = 1
+    return points
@@ -1,99 +1,151 @@
 from PySide6.QtCore import QObject, Signal, QThread
+from .telemetry import Telemetry, TelemetryPool
+from .tick_source import IRSDKTickSource, AcquisitionStats, SIM_TICK_RATE
+from ..profiling import PROFILER
 import irsdk
+import logging
 import time
 import math
 
+log = logging.getLogger(__name__)
+
 class State:
     ir_connected = False
 
 
 class IRManagerWorker(QObject):
+    WAIT_TIMEOUT = 0.1
+    STATS_INTERVAL = SIM_TICK_RATE
     
     state_updated = Signal(bool)
     ir_connected = Signal(dict)
     ir_disconnected = Signal()
-    telemetry_updated = Signal(dict)
+    session_info_updated = Signal(dict)
+    # a pooled snapshot, not written again while anything still refers to it
+    telemetry_updated = Signal(object)
+    acquisition_stats_updated = Signal(dict)
     finished = Signal()
 
-    def __init__(self):
+    def __init__(self, ir=None, tick_source=None, recorder=None):
         super().__init__()
         self.state = State()
-        self.ir = irsdk.IRSDK()
+        # ir can be any object with the irsdk.IRSDK interface, e.g. a ReplaySource
+        self.ir = irsdk.IRSDK() if ir is None else ir
+        self.tick_source = IRSDKTickSource(self.ir) if tick_source is None else tick_source
+        self.recorder = recorder
+        self.telemetry_rate = SIM_TICK_RATE
+        self.acquisition_stats = AcquisitionStats()
         self.running = True
+        self.init_session_info()
         self.init_telemetry()
 
     def run(self):
         while self.running:
             self.check_iracing()
-            self.update_telemetry()
-            time.sleep(0.016)  # 約60FPSの更新間隔
+            if not self.state.ir_connected:
+                time.sleep(0.016)
+                continue
+            # wait for the sim instead of sleeping a fixed frame
+            tick = self.tick_source.wait(self.WAIT_TIMEOUT)
+            if self.should_process(tick):
+                with PROFILER.span('acquisition'):
+                    self.update_session_info()
+                    self.update_telemetry()
+                    if self.recorder is not None:
+                        self.recorder.record(self.ir)
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def set_telemetry_rate(self, telemetry_rate: int):
+        # ticks per second to process, 0 processes every new tick
+        self.telemetry_rate = telemetry_rate
+
+    def should_process(self, tick) -> bool:
+        stats = self.acquisition_stats
+        if tick is None or tick == stats.last_tick:
+            stats.duplicates += 1
+            return False
+        if stats.last_tick is not None and tick > stats.last_tick + 1:
+            stats.dropped += tick - stats.last_tick - 1
+        stats.last_tick = tick
+        
+        if self.telemetry_rate > 0 and stats.last_processed_tick is not None \
+        and tick - stats.last_processed_tick < round(SIM_TICK_RATE / self.telemetry_rate):
+            stats.skipped += 1
+            return False
+        stats.last_processed_tick = tick
+        stats.processed += 1
+        if stats.processed % self.STATS_INTERVAL == 0:
+            self.acquisition_stats_updated.emit(stats.as_dict())
+        return True
 
     def check_iracing(self):
         if self.state.ir_connected and not (self.ir.is_initialized and self.ir.is_connected):
             self.state.ir_connected = False
             self.state_updated.emit(self.state.ir_connected)
             self.ir.shutdown()
-            print('irsdk disconnected')
+            self.tick_source.reset()
+            self.acquisition_stats.reset()
+            self.acquisition_stats_updated.emit(self.acquisition_stats.as_dict())
+            log.info('irsdk disconnected')
             self.ir_disconnected.emit()
-            self.telemetry['track_name'] = ''
+            self.init_session_info()
+            self.session_info_updated.emit(self.session_info)
         elif not self.state.ir_connected and self.ir.startup() and self.ir.is_initialized:
             self.state.ir_connected = True
             self.state_updated.emit(self.state.ir_connected)
-            self.telemetry['track_name'] = self.ir['WeekendInfo']['TrackName']
-            print('irsdk connected')
-            self.ir_connected.emit(self.telemetry)
-
-    def update_telemetry(self):
-        if self.state.ir_connected:
-            self.ir.freeze_var_buffer_latest()
-            telemetry = {
+            self.update_session_info()
+            log.info('irsdk connected')
+            self.ir_connected.emit(self.session_info)
+
+    def update_session_info(self):
+        # WeekendInfo/DriverInfo come from the YAML session string, which only
+        # changes when the sdk bumps its SessionInfoUpdate counter
+        if self.state.ir_connected and self.ir.session_info_update != self.session_info_update:
+            self.session_info_update = self.ir.session_info_update
+            self.session_info = {
                 'track_name': self.ir['WeekendInfo']['TrackName'],
-                'session_state': self.ir['SessionState'],
                 'drivers': self.ir['DriverInfo']['Drivers'],
-                'player_idx': self.ir['PlayerCarIdx'],
-                'player_class': self.ir['PlayerCarClass'],
-                'player_class_pos': self.ir['PlayerCarClassPosition'],
-                'player_ld_pct': self.ir['LapDistPct'],
-                'player_trk_surf': self.ir['PlayerTrackSurface'],
-                'other_class_posts': self.ir['CarIdxClassPosition'],
-                'other_ld_pcts': self.ir['CarIdxLapDistPct'],
-                'other_trk_surfs': self.ir['CarIdxTrackSurface'],
-                'yaw_north': -self.ir['YawNorth'] + math.pi/2,
-                'vel_x': self.ir['VelocityX'],
-                'vel_y': self.ir['VelocityY'],
-                'vel_z': self.ir['VelocityZ'],
-                'current_lap': self.ir['Lap'],
-                'session_time': self.ir['SessionTime'],
-                'is_on_track': self.ir['IsOnTrack'],
-                'player_inc_cnt': self.ir['PlayerCarDriverIncidentCount'],
             }
-            self.telemetry = telemetry
-            # print(telemetry)
+            self.session_info_updated.emit(self.session_info)
+
+    def update_telemetry(self):
+        # the var buffer was frozen by the tick source
+        if self.state.ir_connected:
+            telemetry = self.pool.acquire()
+            telemetry.session_state = self.ir['SessionState']
+            telemetry.player_idx = self.ir['PlayerCarIdx']
+            telemetry.player_class = self.ir['PlayerCarClass']
+            telemetry.player_class_pos = self.ir['PlayerCarClassPosition']
+            telemetry.player_ld_pct = self.ir['LapDistPct']
+            telemetry.player_trk_surf = self.ir['PlayerTrackSurface']
+            telemetry.other_class_posts[:] = self.ir['CarIdxClassPosition']
+            telemetry.other_ld_pcts[:] = self.ir['CarIdxLapDistPct']
+            telemetry.other_trk_surfs[:] = self.ir['CarIdxTrackSurface']
+            telemetry.yaw_north = -self.ir['YawNorth'] + math.pi/2
+            telemetry.vel_x = self.ir['VelocityX']
+            telemetry.vel_y = self.ir['VelocityY']
+            telemetry.vel_z = self.ir['VelocityZ']
+            telemetry.current_lap = self.ir['Lap']
+            telemetry.session_time = self.ir['SessionTime']
+            telemetry.is_on_track = self.ir['IsOnTrack']
+            telemetry.player_inc_cnt = self.ir['PlayerCarDriverIncidentCount']
             self.telemetry_updated.emit(telemetry)
 
-    def init_telemetry(self):
-        self.telemetry = {
+    @property
+    def telemetry(self) -> Telemetry:
+        return self.pool.front
+
+    def init_session_info(self):
+        self.session_info_update = -1
+        self.session_info = {
             'track_name': '',
-            'session_state': 0,
             'drivers': [],
-            'player_idx': 0,
-            'player_class': 0,
-            'player_class_pos': 0,
-            'player_ld_pct': 0,
-            'player_trk_surf': 0,
-            'other_class_posts': [],
-            'other_ld_pcts': [],
-            'other_trk_surfs': [],
-            'yaw_north': 0,
-            'vel_x': 0,
-            'vel_y': 0,
-            'vel_z': 0,
-            'current_lap': 0,
-            'session_time': 0,
-            'is_on_track': False,
-            'player_inc_cnt': 0,
         }
 
+    def init_telemetry(self):
+        self.pool = TelemetryPool()
+
     def stop(self):
         self.running = False
         self.finished.emit()
@@ -102,15 +154,19 @@ class IRManagerWorker(QObject):
 class IRManager(QObject):
     ir_connected = Signal()
     ir_disconnected = Signal()
-    telemetry_updated = Signal(dict)
+    session_info_updated = Signal(dict)
+    telemetry_updated = Signal(object)
+    acquisition_stats_updated = Signal(dict)
 
-    def __init__(self):
+    def __init__(self, ir=None, tick_source=None, recorder=None):
         super().__init__()
-        self.worker = IRManagerWorker()
+        self.worker = IRManagerWorker(ir, tick_source, recorder)
         self.thread = QThread()
         
         self.state = State()
-        self.telemetry = self.worker.telemetry.copy()
+        self.acquisition_stats = self.worker.acquisition_stats.as_dict()
+        self.session_info = self.worker.session_info.copy()
+        self.telemetry = self.worker.telemetry
 
         # スレッドの初期化
         self.worker.moveToThread(self.thread)
@@ -119,8 +175,10 @@ class IRManager(QObject):
         self.thread.started.connect(self.worker.run)
         self.worker.ir_connected.connect(self._on_ir_connected)
         self.worker.ir_disconnected.connect(self._on_ir_disconnected)
+        self.worker.session_info_updated.connect(self._on_session_info_updated)
         self.worker.telemetry_updated.connect(self._on_telemetry_updated)
         self.worker.state_updated.connect(self._on_state_updated)
+        self.worker.acquisition_stats_updated.connect(self._on_acquisition_stats_updated)
         self.worker.finished.connect(self.thread.quit)
         self.worker.finished.connect(self.worker.deleteLater)
         self.thread.finished.connect(self.thread.deleteLater)
@@ -128,18 +186,30 @@ class IRManager(QObject):
         # スレッド開始
         self.thread.start()
 
+    def _on_session_info_updated(self, session_info):
+        self.session_info = session_info.copy()
+        self.session_info_updated.emit(session_info)
+
     def _on_telemetry_updated(self, telemetry):
-        self.telemetry = telemetry.copy()
+        self.telemetry = telemetry
         self.telemetry_updated.emit(telemetry)
 
+    def _on_acquisition_stats_updated(self, stats):
+        self.acquisition_stats = stats.copy()
+        self.acquisition_stats_updated.emit(stats)
+
+    def set_telemetry_rate(self, telemetry_rate: int):
+        # run() never returns to the worker's event loop, so set it directly like stop()
+        self.worker.set_telemetry_rate(telemetry_rate)
+
     def _on_state_updated(self, state):
         self.state.ir_connected = state
         
     def _on_ir_disconnected(self):
         self.ir_disconnected.emit()
         
-    def _on_ir_connected(self, telemetry):
-        self.telemetry = telemetry.copy()
+    def _on_ir_connected(self, session_info):
+        self.session_info = session_info.copy()
         self.ir_connected.emit()
 
     def stop(self):
@@ -1,13 +1,19 @@
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QObject, Signal, QThread, QTimer, Qt
 from PySide6.QtGui import QFontDatabase
 from .ir_manager import IRManager
 from .track_generator import TrackGenerator
+from .telemetry import Telemetry
+from .persistence import PersistenceWorker
+from .track_index import index_track
+from .track_store import encode_track, load_track_file, migrate_legacy_track, track_file_name, TRACK_EXTENSION, LEGACY_EXTENSION
 import numpy as np
 import json
+import logging
 import os
-import pickle
 from enum import Enum
 
+log = logging.getLogger(__name__)
+
 class PATH(Enum):
     CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config.json')
     TRACKS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'tracks')
@@ -16,104 +22,173 @@ class Model(QObject):
     
     track_updated = Signal(dict)
     config_updated = Signal(str, str, object)
-    telemetry_updated = Signal(dict)
+    session_info_updated = Signal(dict)
+    telemetry_updated = Signal(object)
+    acquisition_stats_updated = Signal(dict)
     ir_connected = Signal(dict)
     ir_disconnected = Signal()
     
+    # requests to the track generator thread
+    generator_track_set = Signal(dict)
+    generator_reset = Signal()
+    
+    # requests to the persistence thread
+    persistence_write = Signal(str, object)
+    persistence_remove = Signal(str)
+    persistence_flush = Signal()
+    
+    CHECKPOINT_DELAY = 5000  # ms
 
-    def __init__(self, ir_manager: IRManager):
+    def __init__(self, ir_manager: IRManager, config_path: str = PATH.CONFIG_PATH.value, tracks_path: str = PATH.TRACKS_PATH.value):
         
         super().__init__()
         self.ir_manager = ir_manager
+        self.config_path = config_path
+        self.tracks_path = tracks_path
         
         self.ir_manager.ir_connected.connect(self._on_ir_connected)
         self.ir_manager.ir_disconnected.connect(self._on_ir_disconnected)
+        self.ir_manager.session_info_updated.connect(self.update_session_info)
         self.ir_manager.telemetry_updated.connect(self.update_telemetry)    
+        self.ir_manager.acquisition_stats_updated.connect(self.update_acquisition_stats)
 
-        self.telemetry = self.ir_manager.telemetry.copy()
+        self.session_info = self.ir_manager.session_info.copy()
+        self.telemetry = self.ir_manager.telemetry
+        self.acquisition_stats = self.ir_manager.acquisition_stats.copy()
         self.init_track()
         
-        self.config = self.load_config()
+        self.load_config()
         
+        # the generator runs in its own thread and gets the raw telemetry straight
+        # from the irsdk worker, only finished tracks come back to the GUI thread
         self.track_generator = TrackGenerator()
+        self.track_thread = QThread()
+        self.track_generator.moveToThread(self.track_thread)
+        
+        self.ir_manager.worker.state_updated.connect(self.track_generator.set_connected)
+        self.ir_manager.worker.telemetry_updated.connect(self.track_generator.update_telemetry)
+        self.generator_track_set.connect(self.track_generator.set_track)
+        self.generator_reset.connect(self.track_generator.reset)
         self.track_generator.track_updated.connect(self.update_track)
+        self.track_thread.finished.connect(self.track_generator.deleteLater)
+        
+        self.track_thread.start()
+        
+        # files are written in the background, the GUI thread only encodes them
+        self.persistence_worker = PersistenceWorker()
+        self.persistence_thread = QThread()
+        self.persistence_worker.moveToThread(self.persistence_thread)
+        
+        self.persistence_write.connect(self.persistence_worker.write)
+        self.persistence_remove.connect(self.persistence_worker.remove)
+        self.persistence_flush.connect(self.persistence_worker.flush, Qt.BlockingQueuedConnection)
+        self.persistence_thread.finished.connect(self.persistence_worker.deleteLater)
+        
+        self.persistence_thread.start()
+        
+        # saves a new track or config change a few seconds after the last one,
+        # so a crash does not lose it
+        self.checkpoint_timer = QTimer(self)
+        self.checkpoint_timer.setSingleShot(True)
+        self.checkpoint_timer.setInterval(self.CHECKPOINT_DELAY)
+        self.checkpoint_timer.timeout.connect(self.checkpoint)
     
     def _on_ir_connected(self):
         self.load_track()
-        self.telemetry['track_name'] = self.ir_manager.telemetry['track_name']
-        self.update_telemetry(self.telemetry)
+        self.generator_track_set.emit(self.track_dict.copy())
         self.ir_connected.emit(self.track_dict)
         
     def _on_ir_disconnected(self):
         self.save_track()
-        self.track_generator.init_vars()
+        self.generator_reset.emit()
         self.track_dict = {'length': 0, 'updatable': True, 'points' : np.empty((0, 4), dtype=float)}
+        self.generator_track_set.emit(self.track_dict.copy())
         self.track_updated.emit(self.track_dict)
         self.ir_disconnected.emit()
         
     def update_track(self, track_dict: dict):
+        if not self.track_dict['updatable']:
+            # the lap was committed before the generator saw the track locked
+            return
         self.track_dict = track_dict.copy()
         self.track_updated.emit(track_dict)
+        self.checkpoint_timer.start()
+        
+    def update_session_info(self, session_info: dict):
+        self.session_info = session_info.copy()
+        self.session_info_updated.emit(session_info)
         
-    def update_telemetry(self, telemetry: dict):
-        self.telemetry = telemetry.copy()
-        self.track_generator.generate(self.track_dict, telemetry, self.ir_manager.state.ir_connected)
+    def update_telemetry(self, telemetry: Telemetry):
+        self.telemetry = telemetry
         self.telemetry_updated.emit(telemetry)
+
+    def update_acquisition_stats(self, stats: dict):
+        self.acquisition_stats = stats.copy()
+        self.acquisition_stats_updated.emit(stats)
         
     def set_config(self, key1: str, key2: str, value: object):
         self.config[key1][key2] = value
+        if key1 == 'acquisition' and key2 == 'telemetry_rate':
+            self.ir_manager.set_telemetry_rate(value)
         self.config_updated.emit(key1, key2, value)
+        self.checkpoint_timer.start()
         
     def set_track_updatable(self, updatable: bool):
         self.track_dict['updatable'] = updatable
-        self.track_generator.is_invalid_lap = True
+        self.generator_track_set.emit(self.track_dict.copy())
         self.track_updated.emit(self.track_dict)
+        self.checkpoint_timer.start()
         
     def delete_track(self):
         self.track_dict = {'length': 0, 'updatable': True, 'points' : np.empty((0, 4), dtype=float)}
-        track_name = self.ir_manager.telemetry['track_name'].replace(' ', '_')
-        track_path = os.path.join(PATH.TRACKS_PATH.value, f'{track_name}.pkl')
-        if os.path.exists(track_path):
-            try:
-                os.remove(track_path)
-            except Exception as e:
-                print(f"Error deleting track: {e}")
-        self.track_generator.is_invalid_lap = True
+        for track_path in (self.track_path(), self.track_path(LEGACY_EXTENSION)):
+            self.persistence_remove.emit(track_path)
+        self.generator_track_set.emit(self.track_dict.copy())
         self.track_updated.emit(self.track_dict)
 
+    def checkpoint(self):
+        self.save_track()
+        self.save_config()
+
+    def stop(self):
+        self.checkpoint_timer.stop()
+        self.track_thread.quit()
+        self.track_thread.wait()
+        # write what is still queued before the thread goes away
+        self.persistence_flush.emit()
+        self.persistence_thread.quit()
+        self.persistence_thread.wait()
+
     def init_track(self):
         self.track_dict = {'length': 0, 'updatable': True, 'points' : np.empty((0, 4), dtype=float)}
         
     def load_config(self):
         try:
-            with open(PATH.CONFIG_PATH.value, 'r') as f:
+            with open(self.config_path, 'r') as f:
                 self.config = json.load(f)
         except Exception as e:
-            print(f"Error loading config: {e}")
+            log.error("Error loading config: %s", e)
             self.config = {}
+        self.ir_manager.set_telemetry_rate(self.config.get('acquisition', {}).get('telemetry_rate', 60))
 
     def save_config(self):
-        with open(PATH.CONFIG_PATH.value, 'w') as f:
-            json.dump(self.config, f, indent=4)
+        if self.config:
+            self.persistence_write.emit(self.config_path, json.dumps(self.config, indent=4).encode('utf-8'))
             
+    def track_path(self, extension: str = TRACK_EXTENSION):
+        return os.path.join(self.tracks_path, track_file_name(self.ir_manager.session_info['track_name'], extension))
+
     def load_track(self):
-        track_name = self.ir_manager.telemetry['track_name'].replace(' ', '_')
-        track_path = os.path.join(PATH.TRACKS_PATH.value, f'{track_name}.pkl')
+        track_path = self.track_path()
         try:
-            with open(track_path, 'rb') as f:
-                self.track_dict = pickle.load(f)
-                self.track_dict['points'] = np.array(self.track_dict['points'])
+            if not os.path.exists(track_path) and os.path.exists(self.track_path(LEGACY_EXTENSION)):
+                track_path = migrate_legacy_track(self.track_path(LEGACY_EXTENSION))
+            self.track_dict = index_track(load_track_file(track_path))
         except Exception as e:
-            print(f"Error loading track: {e}")
+            log.warning("Error loading track: %s", e)
             self.init_track()
 
     def save_track(self):
         if len(self.track_dict['points']) > 0:
-            self.track_dict['points'] = self.track_dict['points'].tolist()
-            if not os.path.exists(PATH.TRACKS_PATH.value):
-                os.makedirs(PATH.TRACKS_PATH.value)
-            track_name = self.ir_manager.telemetry['track_name'].replace(' ', '_')
-            track_path = os.path.join(PATH.TRACKS_PATH.value, f'{track_name}.pkl')
-            with open(track_path, 'wb') as f:
-                pickle.dump(self.track_dict, f)
+            self.persistence_write.emit(self.track_path(), encode_track(self.track_dict))
 
@@ -0,0 +1,57 @@
+from PySide6.QtCore import QObject, QTimer
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+def write_file_atomic(path: str, data: bytes):
+    # write a temp file next to the target and rename it over the target, so a
+    # crash or a concurrent reader never sees a half written file
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class PersistenceWorker(QObject):
+    # Write-behind file writer, runs in its own thread (see Model).
+    # write() only keeps the newest data per path and starts a short timer,
+    # so a burst of saves of the same file ends up as one write.
+    WRITE_DELAY = 200  # ms
+
+    def __init__(self):
+        super().__init__()
+        self.pending = {}
+        self.write_count = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.WRITE_DELAY)
+        self.timer.timeout.connect(self.flush)
+
+    def write(self, path: str, data: bytes):
+        self.pending[path] = data
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def remove(self, path: str):
+        self.pending.pop(path, None)
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except Exception as e:
+                log.error("Error deleting file: %s", e)
+
+    def flush(self):
+        self.timer.stop()
+        pending, self.pending = self.pending, {}
+        for path, data in pending.items():
+            try:
+                write_file_atomic(path, data)
+                self.write_count += 1
+            except Exception as e:
+                log.error("Error saving %s: %s", path, e)
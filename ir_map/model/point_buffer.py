@@ -0,0 +1,49 @@
+import numpy as np
+
+class PointBuffer:
+    # Growable row buffer with amortized O(1) appends.
+    # Storage is allocated in chunks and doubled when full, so collecting a lap
+    # no longer reallocates the whole array every tick like np.append does.
+    CHUNK_SIZE = 4096
+
+    def __init__(self, columns: int = 4, max_length: int = None, dtype=float):
+        self.columns = columns
+        self.max_length = max_length
+        self.dtype = dtype
+        capacity = self.CHUNK_SIZE if max_length is None else min(self.CHUNK_SIZE, max_length)
+        self._data = np.empty((capacity, columns), dtype=dtype)
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def is_full(self):
+        return self.max_length is not None and self._length >= self.max_length
+
+    def append(self, row):
+        if self._length == len(self._data):
+            self._grow()
+        self._data[self._length] = row
+        self._length += 1
+
+    def snapshot(self) -> np.ndarray:
+        # Read-only view of the stored rows. The view shares memory with the
+        # buffer, so it is only valid until the next clear()/append().
+        view = self._data[:self._length]
+        view.flags.writeable = False
+        return view
+
+    def clear(self):
+        # keep the allocation so the next lap can reuse it
+        self._length = 0
+
+    def _grow(self):
+        if self.is_full:
+            raise IndexError('PointBuffer is full')
+        new_capacity = len(self._data) * 2
+        if self.max_length is not None:
+            new_capacity = min(new_capacity, self.max_length)
+        data = np.empty((new_capacity, self.columns), dtype=self.dtype)
+        data[:self._length] = self._data[:self._length]
+        self._data = data
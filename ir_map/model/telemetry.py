@@ -0,0 +1,98 @@
+import numpy as np
+import sys
+
+MAX_CARS = 64
+ARRAY_FIELDS = ('other_class_posts', 'other_ld_pcts', 'other_trk_surfs')
+
+class Telemetry:
+    # Snapshot of one telemetry tick, numeric var-buffer values only (track
+    # name and drivers travel separately as session info).
+    # Instances are filled in place by IRManagerWorker from a TelemetryPool and
+    # shared read-only by every layer, so there is no dict to build or copy
+    # per tick. Fields can be read as attributes or with the old
+    # telemetry['key'] syntax.
+    __slots__ = (
+        'session_state',
+        'player_idx',
+        'player_class',
+        'player_class_pos',
+        'player_ld_pct',
+        'player_trk_surf',
+        'other_class_posts',
+        'other_ld_pcts',
+        'other_trk_surfs',
+        'yaw_north',
+        'vel_x',
+        'vel_y',
+        'vel_z',
+        'current_lap',
+        'session_time',
+        'is_on_track',
+        'player_inc_cnt',
+    )
+
+    def __init__(self):
+        self.session_state = 0
+        self.player_idx = 0
+        self.player_class = 0
+        self.player_class_pos = 0
+        self.player_ld_pct = 0.0
+        self.player_trk_surf = 0
+        self.other_class_posts = np.zeros(MAX_CARS, dtype=np.int32)
+        self.other_ld_pcts = np.full(MAX_CARS, -1.0, dtype=np.float64)
+        self.other_trk_surfs = np.full(MAX_CARS, -1, dtype=np.int32)
+        self.yaw_north = 0.0
+        self.vel_x = 0.0
+        self.vel_y = 0.0
+        self.vel_z = 0.0
+        self.current_lap = 0
+        self.session_time = 0.0
+        self.is_on_track = False
+        self.player_inc_cnt = 0
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    @classmethod
+    def from_dict(cls, values: dict):
+        telemetry = cls()
+        for key, value in values.items():
+            current = getattr(telemetry, key)
+            if isinstance(current, np.ndarray):
+                current[:len(value)] = value
+            else:
+                setattr(telemetry, key, value)
+        return telemetry
+
+
+class TelemetryPool:
+    # Snapshots written by IRManagerWorker and handed to other threads through
+    # queued signals. A snapshot is only written again once nothing outside
+    # the pool refers to it or to one of its arrays: no queued signal, no
+    # layer keeping the latest tick, no view of an array. Every consumer, the
+    # GUI and the track generator alike, can keep what it got and never sees
+    # it change. The pool grows to the number of snapshots in flight (two with
+    # the GUI keeping the latest), after that a tick allocates nothing.
+    def __init__(self):
+        self.snapshots = [Telemetry()]
+        # the reference counts of a snapshot only the pool holds, taken the
+        # way acquire() takes them
+        telemetry = self.snapshots[0]
+        self.free_refs = self.refs(telemetry)
+        self.front = telemetry
+
+    @staticmethod
+    def refs(telemetry: Telemetry) -> tuple:
+        return (sys.getrefcount(telemetry), *(sys.getrefcount(getattr(telemetry, key)) for key in ARRAY_FIELDS))
+
+    def acquire(self) -> Telemetry:
+        # a snapshot to write the next tick into, it becomes the front
+        self.front = None
+        for telemetry in self.snapshots:
+            if self.refs(telemetry) == self.free_refs:
+                break
+        else:
+            telemetry = Telemetry()
+            self.snapshots.append(telemetry)
+        self.front = telemetry
+        return telemetry
@@ -0,0 +1,169 @@
+import numpy as np
+import bisect
+import json
+import os
+import time
+
+FORMAT_VERSION = 1
+
+# irsdk variables read by IRManagerWorker, with their sdk types
+RECORDED_VARS = (
+    ('SessionTick', 'i4', 1),
+    ('SessionTime', 'f8', 1),
+    ('SessionState', 'i4', 1),
+    ('PlayerCarIdx', 'i4', 1),
+    ('PlayerCarClass', 'i4', 1),
+    ('PlayerCarClassPosition', 'i4', 1),
+    ('LapDistPct', 'f4', 1),
+    ('PlayerTrackSurface', 'i4', 1),
+    ('CarIdxClassPosition', 'i4', 64),
+    ('CarIdxLapDistPct', 'f4', 64),
+    ('CarIdxTrackSurface', 'i4', 64),
+    ('YawNorth', 'f4', 1),
+    ('VelocityX', 'f4', 1),
+    ('VelocityY', 'f4', 1),
+    ('VelocityZ', 'f4', 1),
+    ('Lap', 'i4', 1),
+    ('IsOnTrack', '?', 1),
+    ('PlayerCarDriverIncidentCount', 'i4', 1),
+)
+SESSION_INFO_KEYS = ('WeekendInfo', 'DriverInfo')
+
+# A recording is a directory:
+#   meta.json           format version and the recorded variables
+#   <VarName>.bin       one raw little-endian column per variable, one row per tick
+#   session_info.jsonl  session string sections, one line per SessionInfoUpdate
+# Columns are plain appends, so a recording can be extended and opened with
+# np.memmap while it is being written.
+
+class TelemetryRecorder:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            if meta['version'] != FORMAT_VERSION:
+                raise ValueError(f'unsupported recording version: {meta["version"]}')
+            self.length = TelemetryRecording(path).length
+            # drop a partly written last tick before appending
+            for name, dtype, count in RECORDED_VARS:
+                with open(os.path.join(path, f'{name}.bin'), 'r+b') as f:
+                    f.truncate(self.length * np.dtype(dtype).itemsize * count)
+        else:
+            with open(meta_path, 'w') as f:
+                json.dump({'version': FORMAT_VERSION, 'vars': RECORDED_VARS}, f, indent=4)
+            self.length = 0
+        self.columns = {name: (np.dtype('<' + dtype), open(os.path.join(path, f'{name}.bin'), 'ab'))
+                        for name, dtype, _ in RECORDED_VARS}
+        self.session_file = open(os.path.join(path, 'session_info.jsonl'), 'a', encoding='utf-8')
+        self.session_info_update = None
+
+    def record(self, ir):
+        # call with the var buffer of the tick frozen
+        if ir.session_info_update != self.session_info_update:
+            self.session_info_update = ir.session_info_update
+            session_info = {'frame': self.length, 'update': self.session_info_update}
+            for key in SESSION_INFO_KEYS:
+                session_info[key] = ir[key]
+            self.session_file.write(json.dumps(session_info, ensure_ascii=False, default=str) + '\n')
+        for name, (dtype, f) in self.columns.items():
+            f.write(np.asarray(ir[name], dtype=dtype).tobytes())
+        self.length += 1
+
+    def close(self):
+        for _, f in self.columns.values():
+            f.close()
+        self.session_file.close()
+
+
+class TelemetryRecording:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        if meta['version'] != FORMAT_VERSION:
+            raise ValueError(f'unsupported recording version: {meta["version"]}')
+        self.vars = {name: (np.dtype('<' + dtype), count) for name, dtype, count in meta['vars']}
+        # a tick is complete once every column has it
+        self.length = min(os.path.getsize(os.path.join(path, f'{name}.bin')) // (dtype.itemsize * count)
+                          for name, (dtype, count) in self.vars.items())
+        self.columns = {}
+        for name, (dtype, count) in self.vars.items():
+            shape = (self.length,) if count == 1 else (self.length, count)
+            if self.length == 0:
+                self.columns[name] = np.empty(shape, dtype=dtype)
+            else:
+                self.columns[name] = np.memmap(os.path.join(path, f'{name}.bin'), dtype=dtype, mode='r', shape=shape)
+        self.session_infos = []
+        session_path = os.path.join(path, 'session_info.jsonl')
+        if os.path.exists(session_path):
+            with open(session_path, 'r', encoding='utf-8') as f:
+                self.session_infos = [json.loads(line) for line in f if line.strip()]
+        self.session_frames = [session_info['frame'] for session_info in self.session_infos]
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def session_info_at(self, frame: int) -> dict:
+        index = bisect.bisect_right(self.session_frames, frame) - 1
+        return self.session_infos[max(index, 0)] if self.session_infos else {}
+
+
+class ReplaySource:
+    # Plays a recording back through the parts of the irsdk.IRSDK interface that
+    # IRManagerWorker uses. Each freeze_var_buffer_latest() moves to the next tick,
+    # paced by the recorded SessionTime: speed 1.0 is real time, 2.0 twice as fast,
+    # 0 as fast as possible. The source disconnects at the end unless loop is set.
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False):
+        self.recording = TelemetryRecording(path)
+        self.speed = speed
+        self.loop = loop
+        self.is_initialized = False
+        self.is_finished = False
+        self.frame = 0
+
+    @property
+    def is_connected(self):
+        return self.is_initialized and not self.is_finished
+
+    @property
+    def session_info_update(self):
+        return self.recording.session_info_at(self.frame).get('update', 0)
+
+    def startup(self, *args, **kwargs):
+        if len(self.recording) == 0 or (self.is_finished and not self.loop):
+            return False
+        self.frame = -1
+        self.is_finished = False
+        self.is_initialized = True
+        self.start_time = time.perf_counter()
+        self.start_session_time = self.recording['SessionTime'][0]
+        return True
+
+    def shutdown(self):
+        self.is_initialized = False
+
+    def freeze_var_buffer_latest(self):
+        if self.frame + 1 >= len(self.recording):
+            self.is_finished = True
+            return
+        self.frame += 1
+        if self.speed > 0:
+            target_time = self.start_time + (self.recording['SessionTime'][self.frame] - self.start_session_time) / self.speed
+            delay = target_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def unfreeze_var_buffer_latest(self):
+        pass
+
+    def __getitem__(self, key):
+        frame = max(self.frame, 0)
+        if key in self.recording.columns:
+            return self.recording[key][frame].tolist()
+        return self.recording.session_info_at(frame).get(key)
@@ -0,0 +1,51 @@
+import time
+
+SIM_TICK_RATE = 60
+
+class IRSDKTickSource:
+    # Blocks until the sim publishes a new var buffer.
+    # freeze_var_buffer_latest() waits on the sdk's data-valid event (up to
+    # 32 ms) on Windows and freezes the newest buffer, so the values read
+    # afterwards all belong to the returned tick. Without the event (test
+    # files, Linux) it returns at once and new data is polled for instead.
+    POLL_INTERVAL = 0.002
+
+    def __init__(self, ir):
+        self.ir = ir
+        self.last_tick = None
+
+    def wait(self, timeout: float):
+        deadline = time.perf_counter() + timeout
+        while True:
+            self.ir.freeze_var_buffer_latest()
+            tick = self.ir['SessionTick']
+            if tick != self.last_tick:
+                self.last_tick = tick
+                return tick
+            if time.perf_counter() >= deadline:
+                return None
+            time.sleep(self.POLL_INTERVAL)
+
+    def reset(self):
+        self.last_tick = None
+
+
+class AcquisitionStats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.processed = 0      # ticks read and emitted
+        self.skipped = 0        # new ticks left out to stay at the target rate
+        self.dropped = 0        # sim ticks never seen (gaps in the tick count)
+        self.duplicates = 0     # waits that ended without new data
+        self.last_tick = None
+        self.last_processed_tick = None
+
+    def as_dict(self) -> dict:
+        return {
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'dropped': self.dropped,
+            'duplicates': self.duplicates,
+        }
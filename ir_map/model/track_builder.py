@@ -0,0 +1,169 @@
+import irsdk
+from concurrent.futures import ProcessPoolExecutor
+from .telemetry import Telemetry
+from .track_generator import TrackGenerator
+from .track_fusion import TrackFusion
+from .track_index import index_track
+from .track_store import load_track_file, save_track_file, track_file_name
+import numpy as np
+import glob
+import logging
+import math
+import os
+import struct
+
+log = logging.getLogger(__name__)
+
+# Offline track building from iRacing .ibt telemetry files: each file is
+# played through a TrackGenerator in a worker process, the tracks built
+# from files of the same circuit are fused into one and written to the
+# track store, as the overlay would after driving those laps live.
+IBT_EXTENSION = '.ibt'
+# version, status, tick rate, session info update, length and offset, number
+# of variables and their offset, number of buffers and record length
+IBT_HEADER = struct.Struct('<10i')
+VAR_HEADER_SIZE = 144
+MAX_BUFFERS = 4
+# Telemetry field, .ibt variable and the value for files that do not record it
+IBT_VARIABLES = (
+    ('session_state', 'SessionState', None),
+    ('player_ld_pct', 'LapDistPct', None),
+    ('player_trk_surf', 'PlayerTrackSurface', 3),
+    ('yaw_north', 'YawNorth', None),
+    ('vel_x', 'VelocityX', None),
+    ('vel_y', 'VelocityY', None),
+    ('current_lap', 'Lap', None),
+    ('session_time', 'SessionTime', None),
+    ('is_on_track', 'IsOnTrack', True),
+    ('player_inc_cnt', 'PlayerCarDriverIncidentCount', 0),
+)
+
+class TrackBuildError(ValueError):
+    pass
+
+
+def find_ibt_files(paths: list) -> list:
+    # files as given, directories searched recursively
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '**', f'*{IBT_EXTENSION}'), recursive=True)))
+        else:
+            files.append(path)
+    return files
+
+
+def check_ibt_header(path: str):
+    # irsdk trusts the header, a damaged file would have it read or allocate
+    # far past the end of the file
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.read(IBT_HEADER.size)
+    if len(header) < IBT_HEADER.size:
+        raise TrackBuildError(f'not an iRacing telemetry file: {path}')
+    version, _, _, _, info_len, info_offset, num_vars, var_offset, num_buf, buf_len = IBT_HEADER.unpack(header)
+    if version < 1 or not 0 < num_buf <= MAX_BUFFERS or buf_len <= 0 or num_vars <= 0 \
+    or min(info_len, info_offset, var_offset) < 0 \
+    or info_offset + info_len > size or var_offset + num_vars * VAR_HEADER_SIZE > size:
+        raise TrackBuildError(f'not an iRacing telemetry file: {path}')
+
+
+def read_ibt(path: str) -> tuple:
+    # track name from the session info, and one column per telemetry field
+    check_ibt_header(path)
+    ir = irsdk.IRSDK()
+    try:
+        if not ir.startup(test_file=path):
+            raise TrackBuildError(f'not an iRacing telemetry file: {path}')
+        track_name = ir['WeekendInfo']['TrackName']
+    finally:
+        ir.shutdown()
+
+    ibt = irsdk.IBT()
+    ibt.open(path)
+    try:
+        columns = {}
+        for field, name, default in IBT_VARIABLES:
+            values = ibt.get_all(name)
+            if values is None:
+                if default is None:
+                    raise TrackBuildError(f'{name} not recorded in {path}')
+                values = [default] * len(columns['session_state'])
+            columns[field] = values
+    finally:
+        ibt.close()
+    # the same conversion as IRManagerWorker
+    columns['yaw_north'] = (math.pi / 2 - np.asarray(columns['yaw_north'])).tolist()
+    return track_name, columns
+
+
+def generate_track(columns: dict, target_length: int = TrackGenerator.TARGET_LENGTH) -> dict:
+    # the telemetry ticks through a TrackGenerator, None without a clean lap
+    generator = TrackGenerator(target_length)
+    track_dict = generator.track_dict
+    telemetry = Telemetry()
+    fields = list(columns)
+    for values in zip(*columns.values()):
+        for field, value in zip(fields, values):
+            setattr(telemetry, field, value)
+        generator.generate(track_dict, telemetry, True)
+    if 'laps' not in track_dict:
+        return None
+    track_dict.pop('index', None)
+    return track_dict
+
+
+def build_ibt(path: str, target_length: int = TrackGenerator.TARGET_LENGTH) -> tuple:
+    # runs in a worker process
+    track_name, columns = read_ibt(path)
+    return track_name, generate_track(columns, target_length)
+
+
+def fuse_tracks(track_dicts: list, stored: dict = None, target_length: int = TrackGenerator.TARGET_LENGTH) -> dict:
+    # tracks of one circuit into one, continuing from the stored track when given
+    fusion = TrackFusion(target_length)
+    if stored is not None:
+        fusion.seed(stored['points'], stored.get('laps', 1))
+    for track_dict in track_dicts:
+        fusion.add_map(track_dict['points'], track_dict['laps'])
+    track_dict = {'length': track_dicts[-1]['length'], 'updatable': True, 'laps': fusion.laps}
+    track_dict['points'] = TrackGenerator(target_length).resample_points(fusion.track_points())
+    return index_track(track_dict)
+
+
+def build_tracks(paths: list, tracks_path: str, workers: int = None, replace: bool = False,
+                 target_length: int = TrackGenerator.TARGET_LENGTH) -> list:
+    # one file per worker process; returns the track files written
+    files = find_ibt_files(paths)
+    built = {}
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [(path, executor.submit(build_ibt, path, target_length)) for path in files]
+        for path, future in futures:
+            try:
+                track_name, track_dict = future.result()
+            except Exception as e:
+                log.warning('Error reading %s: %s', path, e)
+                continue
+            if track_dict is None:
+                log.info('no clean lap in %s', path)
+                continue
+            log.info('%s: %s, %d laps', path, track_name, track_dict['laps'])
+            built.setdefault(track_name, []).append(track_dict)
+
+    track_paths = []
+    for track_name, track_dicts in built.items():
+        track_path = os.path.join(tracks_path, track_file_name(track_name))
+        stored = None
+        if not replace and os.path.exists(track_path):
+            try:
+                stored = load_track_file(track_path)
+            except Exception as e:
+                log.warning('Error loading track: %s', e)
+            if stored is not None and not stored['updatable']:
+                log.info('%s is locked, not updated', track_path)
+                continue
+        track_dict = fuse_tracks(track_dicts, stored, target_length)
+        os.makedirs(tracks_path, exist_ok=True)
+        save_track_file(track_path, track_dict)
+        track_paths.append(track_path)
+    return track_paths
@@ -0,0 +1,130 @@
+from .track_correction import ClosureMode, correct_lap, SMOOTHING
+import numpy as np
+import logging
+
+log = logging.getLogger(__name__)
+
+def similarity_transform(source: np.ndarray, target: np.ndarray) -> tuple:
+    # scale, rotation and offset that map source onto target in the least
+    # squares sense (Umeyama), the scale absorbs maps stored in other units
+    source_mean = source.mean(axis=0)
+    target_mean = target.mean(axis=0)
+    source_centered = source - source_mean
+    target_centered = target - target_mean
+    u, s, vt = np.linalg.svd(target_centered.T @ source_centered)
+    d = np.sign(np.linalg.det(u @ vt))
+    rotation = u @ np.diag((1.0, d)) @ vt
+    variance = (source_centered ** 2).sum()
+    scale = (s[0] + d * s[1]) / variance if variance > 0 else 1.0
+    offset = target_mean - scale * source_mean @ rotation.T
+    return scale, rotation, offset
+
+
+def closed_length(xy: np.ndarray) -> float:
+    closed = np.vstack((xy, xy[:1]))
+    return np.hypot(*np.diff(closed, axis=0).T).sum()
+
+
+class TrackFusion:
+    # Running average of clean laps on a fixed LapDistPct grid, so memory
+    # stays at one lap of grid points however many laps are fused. Each lap
+    # is closed on itself and smoothed (see track_correction.py), resampled
+    # onto the grid and fitted onto the map so far before it is averaged in. The weight of a new lap stops falling
+    # after WINDOW laps, so the map keeps following changes to the line.
+    # Laps too far off the map are not fused. A wrong map (a bad stored
+    # track) would turn every lap away, so RECOVERY_LAPS rejected laps in a
+    # row that agree with each other replace it.
+    # Used from the track generator's thread.
+    WINDOW = 10
+    MAX_RESIDUAL = 0.02  # rms distance to the map as a fraction of its length
+    RECOVERY_LAPS = 3
+
+    def __init__(self, grid_length: int, closure: ClosureMode = ClosureMode.LEAST_SQUARES, smoothing: float = SMOOTHING):
+        self.grid = np.arange(grid_length) / grid_length
+        self.closure = closure
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self):
+        self.mean = None
+        self.laps = 0
+        self.rejected = []
+
+    def seed(self, points: np.ndarray, laps: int = 1):
+        # continue from a stored track
+        if len(points) < 2:
+            self.reset()
+            return
+        self.mean = self.resample(points)
+        self.laps = max(int(laps), 1)
+        self.rejected = []
+
+    def resample(self, points: np.ndarray) -> np.ndarray:
+        # onto the grid, periodic across the S/F line; a closing point at
+        # ld_pct 1.0 would stand for 0.0 a second time
+        points = points[points[:, 2] < 1.0]
+        ld_pcts, unique_indices = np.unique(points[:, 2], return_index=True)
+        unique_points = points[unique_indices]
+        return np.column_stack([np.interp(self.grid, ld_pcts, unique_points[:, i], period=1.0) for i in (0, 1)])
+
+    def length(self) -> float:
+        return closed_length(self.mean)
+
+    @staticmethod
+    def fit(track: np.ndarray, target: np.ndarray) -> tuple:
+        # track moved onto target, and the rms distance left as a fraction of
+        # the length of target
+        scale, rotation, offset = similarity_transform(track, target)
+        track = scale * track @ rotation.T + offset
+        residual = np.sqrt(((track - target) ** 2).sum(axis=1).mean())
+        length = closed_length(target)
+        return track, residual / length if length > 0 else 0.0
+
+    def add_lap(self, points: np.ndarray, times: np.ndarray = None) -> bool:
+        # raw lap in driving order, returns whether it was fused
+        if len(points) < 3:
+            return False
+        return self.add_map(correct_lap(points, self.closure, times, self.smoothing))
+
+    def add_map(self, points: np.ndarray, laps: int = 1) -> bool:
+        # a closed lap, or a map fused from `laps` laps elsewhere (see track_builder.py)
+        track = self.resample(points)
+        if self.mean is None:
+            self.mean = track
+            self.laps = laps
+            return True
+
+        fitted, error = self.fit(track, self.mean)
+        if error > self.MAX_RESIDUAL:
+            return self.reject(track, laps, error)
+
+        self.rejected = []
+        track = fitted
+        self.laps += laps
+        self.mean += (track - self.mean) * min(laps / min(self.laps, self.WINDOW), 1.0)
+        return True
+
+    def reject(self, track: np.ndarray, laps: int, error: float) -> bool:
+        # keeps the rejected lap; returns whether the rejected laps replaced the map
+        if self.rejected and self.fit(track, self.rejected[0][0])[1] > self.MAX_RESIDUAL:
+            # not the same shape as the laps rejected before it, start over
+            self.rejected = []
+        self.rejected.append((track, laps))
+        log.warning('lap not fused, %.1f%% off the map (%d rejected in a row that agree)',
+                    100 * error, len(self.rejected))
+        if len(self.rejected) < self.RECOVERY_LAPS:
+            return False
+
+        reference = self.rejected[0][0]
+        tracks = [reference] + [self.fit(other, reference)[0] for other, _ in self.rejected[1:]]
+        weights = [laps for _, laps in self.rejected]
+        self.mean = np.average(tracks, axis=0, weights=weights)
+        self.laps = sum(weights)
+        log.warning('map replaced by the last %d rejected laps', len(self.rejected))
+        self.rejected = []
+        return True
+
+    def track_points(self) -> np.ndarray:
+        # the map as (x, y, ld_pct, sec_num) rows, closed at ld_pct 1.0
+        points = np.column_stack((self.mean, self.grid, np.ones(len(self.grid))))
+        return np.vstack((points, (*self.mean[0], 1.0, 1.0)))
@@ -1,21 +1,64 @@
 from PySide6.QtCore import QObject, Signal
+from .point_buffer import PointBuffer
+from .dead_reckoning import SAMPLE_COLUMNS, SESSION_TIME, dead_reckon, sample_row
+from .telemetry import Telemetry
+from .track_index import index_track
+from .track_fusion import TrackFusion
+from ..profiling import PROFILER
 import numpy as np
-import math
+import logging
 import time
+from enum import Enum
+
+log = logging.getLogger(__name__)
+
+class ResampleMode(Enum):
+    LD_PCT = 'ld_pct'
+    ARC_LENGTH = 'arc_length'
 
 class TrackGenerator(QObject):
     TARGET_LENGTH = 2000
+    MAX_POINTS = 100000
     
     track_updated = Signal(dict)
     
-    def __init__(self):
+    def __init__(self, target_length: int = TARGET_LENGTH, resample_mode: ResampleMode = ResampleMode.LD_PCT):
         super().__init__()
         
-        self.point_store = np.empty((0, 4), dtype=float)
+        self.target_length = target_length
+        self.resample_mode = resample_mode
+        # raw samples, integrated into positions once per lap (see dead_reckoning.py)
+        self.sample_store = PointBuffer(columns=SAMPLE_COLUMNS, max_length=self.MAX_POINTS)
+        # every clean lap is averaged into the map instead of replacing it
+        self.fusion = TrackFusion(target_length)
+        
+        self.track_dict = {'length': 0, 'updatable': True, 'points' : np.empty((0, 4), dtype=float)}
+        self.is_irsdk_connected = False
         
         self.init_vars()
+    
+    # slots below run in the generator thread (see Model)
+    def update_telemetry(self, telemetry: Telemetry):
+        with PROFILER.span('model update'):
+            self.generate(self.track_dict, telemetry, self.is_irsdk_connected)
+    
+    def set_track(self, track_dict: dict):
+        # locking or unlocking sends the points the generator committed back,
+        # seeding from those would interpolate the map onto its own grid again;
+        # only a different track (loaded, deleted, disconnected) reseeds
+        if track_dict['points'] is not self.track_dict['points']:
+            self.fusion.seed(track_dict['points'], track_dict.get('laps', 1))
+        self.track_dict = track_dict.copy()
+        self.is_invalid_lap = True
+    
+    def set_connected(self, is_irsdk_connected: bool):
+        self.is_irsdk_connected = is_irsdk_connected
+    
+    def reset(self):
+        self.sample_store.clear()
+        self.init_vars()
         
-    def generate(self, track_dict: dict, telemetry: dict, is_irsdk_connected: bool):
+    def generate(self, track_dict: dict, telemetry: Telemetry, is_irsdk_connected: bool):
         if is_irsdk_connected:
             # print('generator called')
             self._check_is_lap_changed(telemetry)
@@ -23,77 +66,87 @@ class TrackGenerator(QObject):
             
             if telemetry['player_ld_pct'] > 0.5 and not self.is_lap_changed:
                 if not self.is_invalid_lap and track_dict['updatable']:
-                    if (len(self.point_store) < track_dict['length'] \
-                    or track_dict['length'] == 0):
-                        track_dict['points'] = self.point_store.copy()
-                        track_dict['length'] = len(track_dict['points'])
-                        track_dict['points'] = self.resample_points(track_dict['points'])
-                        self.track_updated.emit(track_dict)
-                        print(f'track updated: {track_dict["length"]}')
+                    samples = self.sample_store.snapshot()
+                    if self.fusion.add_lap(dead_reckon(samples), samples[:, SESSION_TIME]):
+                        track_dict['length'] = len(samples)
+                        track_dict['laps'] = self.fusion.laps
+                        track_dict['points'] = self.resample_points(self.fusion.track_points())
+                        # lookup tables and segments, filling the sec_num column
+                        index_track(track_dict)
+                        self.track_updated.emit(track_dict.copy())
+                        log.info('track updated: %d laps', track_dict['laps'])
 
-                self.point_store = np.empty((0, 4), dtype=float)
+                self.sample_store.clear()
                 self.prev_inc_cnt = telemetry['player_inc_cnt']
                 self.is_invalid_lap = False
                 self.is_lap_changed = True
-                print(f'start generating: {telemetry["current_lap"]}')
+                log.debug('start generating: %d', telemetry['current_lap'])
                 
-            delta_time = telemetry['session_time'] - self.prev_session_time
-            self.prev_session_time = telemetry['session_time']
             self.prev_lap = telemetry['current_lap']
             
-            if telemetry['is_on_track'] and track_dict['updatable'] and len(self.point_store) < 100000:
-                w_vel_x = telemetry['vel_x'] * math.cos(telemetry['yaw_north']) - telemetry['vel_y'] * math.sin(telemetry['yaw_north'])
-                w_vel_y = telemetry['vel_x'] * math.sin(telemetry['yaw_north']) + telemetry['vel_y'] * math.cos(telemetry['yaw_north'])
-                
-                dx = w_vel_x * delta_time
-                dy = w_vel_y * delta_time
-                
-                new_x = self.point_store[-1, 0] + dx if len(self.point_store) > 0 else 0
-                new_y = self.point_store[-1, 1] - dy if len(self.point_store) > 0 else 0
-                
-                self.point_store = np.append(self.point_store, [[new_x, new_y, telemetry['player_ld_pct'], 1]], axis=0)
+            if telemetry['is_on_track'] and track_dict['updatable'] and not self.sample_store.is_full:
+                self.sample_store.append(sample_row(telemetry))
     
-    def _check_is_lap_changed(self, telemetry: dict):
+    def _check_is_lap_changed(self, telemetry: Telemetry):
         if (telemetry['current_lap'] > self.prev_lap or telemetry['current_lap'] == 0) and telemetry['player_ld_pct'] <= 0.5 and self.is_lap_changed:
             self.is_lap_changed = False
-            print(f'lap changed: {telemetry["current_lap"]}')
+            log.debug('lap changed: %d', telemetry['current_lap'])
     
-    def _check_is_invalid_lap(self, telemetry: dict):
+    def _check_is_invalid_lap(self, telemetry: Telemetry):
         if not self.is_invalid_lap:
             if telemetry['session_state'] == 1 \
             or telemetry['player_trk_surf'] != 3 \
             or telemetry['player_inc_cnt'] > self.prev_inc_cnt:
                 self.is_invalid_lap = True
-                print(f'invalid lap: {telemetry["current_lap"]}')
+                log.debug('invalid lap: %d', telemetry['current_lap'])
 
     def resample_points(self, points: np.ndarray):
         if len(points) == 0:
             return points
         
-        points = points[points[:, 2].argsort()]
+        points = points[points[:, 2].argsort(kind='stable')]
         
         ld_pcts = points[:, 2]
         x_coords = points[:, 0]
         y_coords = points[:, 1]
         sec_num = points[:, 3]
         
-        target_ld_pct = np.linspace(0.0, 1.0, self.TARGET_LENGTH)
+        if self.resample_mode == ResampleMode.ARC_LENGTH:
+            # resample at equal distances along the driven line
+            params = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x_coords), np.diff(y_coords)))))
+            targets = np.linspace(0.0, params[-1], self.target_length)
+        else:
+            params = ld_pcts
+            targets = np.linspace(0.0, 1.0, self.target_length)
         
-        indices = np.abs(ld_pcts[:, None] - target_ld_pct).argmin(axis=0)
+        # drop repeated samples so that the interpolation grid is strictly increasing
+        params, unique_indices = np.unique(params, return_index=True)
         
-        indices = np.clip(indices, 0, len(ld_pcts) - 1)
+        x_coords = np.interp(targets, params, x_coords[unique_indices])
+        y_coords = np.interp(targets, params, y_coords[unique_indices])
+        if self.resample_mode == ResampleMode.ARC_LENGTH:
+            target_ld_pct = np.interp(targets, params, ld_pcts[unique_indices])
+        else:
+            target_ld_pct = targets
+        # sector numbers are labels, take them from the nearest sample
+        sec_num = sec_num[unique_indices][self._nearest_indices(params, targets)]
         
-        points = np.column_stack((x_coords[indices], y_coords[indices], target_ld_pct, sec_num[indices]))
-        _, unique_indices = np.unique(points[:, 2], return_index=True)
-        points = points[unique_indices]
+        points = np.column_stack((x_coords, y_coords, target_ld_pct, sec_num))
         
         points = np.vstack((points, points[-1]))
         
         return points
+    
+    @staticmethod
+    def _nearest_indices(values: np.ndarray, targets: np.ndarray):
+        if len(values) == 1:
+            return np.zeros(len(targets), dtype=int)
+        right = np.clip(np.searchsorted(values, targets), 1, len(values) - 1)
+        left = right - 1
+        return np.where(targets - values[left] <= values[right] - targets, left, right)
                 
     def init_vars(self):
         self.prev_lap = 0
         self.prev_inc_cnt = 0
-        self.prev_session_time = 0
         self.is_lap_changed = True
         self.is_invalid_lap = True
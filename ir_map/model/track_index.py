@@ -0,0 +1,200 @@
+import numpy as np
+
+STRAIGHT = 0
+RIGHT = 1
+LEFT = -1
+SEGMENT_KINDS = {STRAIGHT: 'straight', RIGHT: 'right', LEFT: 'left'}
+
+class TrackIndex:
+    # Lookup tables over the resampled track points, built once when a lap is
+    # committed or a track is loaded and shared read-only between threads.
+    #   buckets       uniform LapDistPct buckets holding the index of the track
+    #                 point at or before each bucket start, a lookup reads one
+    #                 bucket and steps forward at most max_steps points
+    #   arc_length    cumulative distance along the points, in the units of
+    #                 the points (meters for generated tracks, the bundled
+    #                 ones are scaled to the overlay)
+    #   curvature     curvature in 1/unit smoothed over CURVATURE_WINDOW,
+    #                 positive for right-handers as drawn (y grows downwards)
+    #   segments      corners and straights, numbered from 1 at the S/F line,
+    #                 these numbers are sec_nums and fill the sec_num column
+    #                 of the points where they are writable
+    # The segment thresholds are fractions of the lap, so they hold for both.
+    BUCKETS_PER_POINT = 2
+    CURVATURE_WINDOW = 0.004  # of the lap, 20 m on a 5 km track
+    CORNER_RADIUS = 0.04  # of the lap, tighter than 200 m on 5 km is a corner
+    STRAIGHT_RADIUS = 1.0  # of the lap, wider than this is never a corner
+    MIN_SEGMENT_LENGTH = 0.008  # of the lap, 40 m on 5 km
+
+    def __init__(self, points: np.ndarray):
+        points = np.asarray(points, dtype=float)
+        self.ld_pcts = np.ascontiguousarray(points[:, 2]) if len(points) else np.empty(0)
+        n = len(points)
+        if n < 2:
+            self.buckets = np.zeros(1, dtype=np.intp)
+            self.max_steps = 0
+            self.next_ld_pcts = self.inv_spans = np.empty(0)
+            self.arc_length = np.zeros(n)
+            self.curvature = np.zeros(n)
+            self.sec_nums = np.ones(n)
+            self.segments = []
+            return
+
+        self.build_buckets(n * self.BUCKETS_PER_POINT)
+        self.arc_length = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(points[:, :2], axis=0).T))))
+        self.curvature = self.smooth(self.point_curvature(points[:, :2]), self.CURVATURE_WINDOW * self.length)
+        self.sec_nums, self.segments = self.find_segments()
+
+    @property
+    def length(self) -> float:
+        return self.arc_length[-1] if len(self.arc_length) else 0.0
+
+    def build_buckets(self, n_buckets: int):
+        # the lower point index is what np.searchsorted gives for the bucket
+        # edges; within a bucket it can only grow up to the next edge's
+        last = len(self.ld_pcts) - 2
+        edges = np.arange(n_buckets + 1) / n_buckets
+        starts = np.clip(np.searchsorted(self.ld_pcts, edges, side='right') - 1, 0, last)
+        self.buckets = starts[:-1]
+        self.max_steps = int(np.diff(starts).max())
+        # per lower index: the LapDistPct to step past, never past the last
+        # pair, and 1 / the span up to the upper point (0 for repeated points)
+        self.next_ld_pcts = np.append(self.ld_pcts[1:-1], np.inf)
+        span = self.ld_pcts[1:] - self.ld_pcts[:-1]
+        self.inv_spans = np.divide(1.0, span, out=np.zeros_like(span), where=span > 0)
+
+    def lookup(self, ld_pcts: np.ndarray):
+        # the track points around each LapDistPct and the ratio between them,
+        # the same result as a binary search over the ld_pct column; None
+        # without two points to place them between
+        if len(self.ld_pcts) < 2:
+            return None
+        ld_pcts = np.asarray(ld_pcts, dtype=float)
+        n_buckets = len(self.buckets)
+        lower = self.buckets[np.clip((ld_pcts * n_buckets).astype(np.intp), 0, n_buckets - 1)]
+        for _ in range(self.max_steps):
+            lower += self.next_ld_pcts[lower] <= ld_pcts
+        ratio = (ld_pcts - self.ld_pcts[lower]) * self.inv_spans[lower]
+        return lower, lower + 1, np.clip(ratio, 0.0, 1.0, out=ratio)
+
+    def distance_at(self, ld_pcts: np.ndarray) -> np.ndarray:
+        # distance from the S/F line along the track, NaN without a track
+        found = self.lookup(ld_pcts)
+        if found is None:
+            return np.full(np.shape(ld_pcts), np.nan)
+        lower, upper, ratio = found
+        return self.arc_length[lower] * (1 - ratio) + self.arc_length[upper] * ratio
+
+    def gap(self, ld_pcts: np.ndarray, ahead_ld_pcts: np.ndarray) -> np.ndarray:
+        # distance forward from each position to the one ahead, across the
+        # S/F line; NaN like distance_at without a track
+        gap = self.distance_at(ahead_ld_pcts) - self.distance_at(ld_pcts)
+        return np.where(gap < 0, gap + self.length, gap)
+
+    def sec_num_at(self, ld_pcts: np.ndarray):
+        found = self.lookup(ld_pcts)
+        if found is None:
+            return None
+        lower, upper, ratio = found
+        return np.where(ratio < 0.5, self.sec_nums[lower], self.sec_nums[upper]).astype(int)
+
+    @staticmethod
+    def point_curvature(xy: np.ndarray) -> np.ndarray:
+        # heading change between the segments before and after each point over
+        # the distance between their midpoints; repeated points (the closing
+        # duplicate) take the value of the point before them
+        d = np.diff(xy, axis=0)
+        ds = np.hypot(d[:, 0], d[:, 1])
+        moving = ds > 1e-9
+        curvature = np.zeros(len(xy))
+        if moving.sum() < 2:
+            return curvature
+        heading = np.arctan2(d[moving, 1], d[moving, 0])
+        turn = np.angle(np.exp(1j * np.diff(heading)))
+        ds = ds[moving]
+        segment_points = np.flatnonzero(moving)
+        # the point between moving segment k and k + 1
+        curvature[segment_points[1:]] = turn / ((ds[:-1] + ds[1:]) / 2)
+        filled = np.zeros(len(xy), dtype=np.intp)
+        filled[segment_points[1:]] = segment_points[1:]
+        np.maximum.accumulate(filled, out=filled)
+        return curvature[filled]
+
+    def smooth(self, values: np.ndarray, window: float) -> np.ndarray:
+        # moving average over `window` of arc length, wrapped around the lap
+        spacing = self.length / max(len(values) - 1, 1)
+        half = int(window / spacing / 2) if spacing > 0 else 0
+        if half < 1 or len(values) <= 2 * half:
+            return values
+        kernel = np.full(2 * half + 1, 1 / (2 * half + 1))
+        padded = np.concatenate((values[-half:], values, values[:half]))
+        return np.convolve(padded, kernel, mode='valid')
+
+    def find_segments(self) -> tuple:
+        min_length = self.MIN_SEGMENT_LENGTH * self.length
+        # ovals only turn through 2 pi per lap and their bends are wider than
+        # CORNER_RADIUS, so close to the average turning counts as a corner
+        # too, but never below STRAIGHT_RADIUS, or a track without any turning
+        # would be one long corner
+        abs_curvature = np.abs(self.curvature)
+        threshold = max(min(1 / (self.CORNER_RADIUS * self.length), 0.75 * abs_curvature.mean()),
+                        1 / (self.STRAIGHT_RADIUS * self.length))
+        kind = np.where(abs_curvature > threshold, np.where(self.curvature > 0, RIGHT, LEFT), STRAIGHT)
+        # fold runs shorter than MIN_SEGMENT_LENGTH into the longer neighbour,
+        # shortest first, so noise does not split corners and straights
+        while True:
+            starts = np.flatnonzero(np.concatenate(([True], kind[1:] != kind[:-1])))
+            ends = np.append(starts[1:], len(kind))
+            lengths = self.arc_length[np.minimum(ends, len(kind) - 1)] - self.arc_length[starts]
+            if len(starts) == 1:
+                break
+            shortest = int(np.argmin(lengths))
+            if lengths[shortest] >= min_length:
+                break
+            if shortest == 0:
+                neighbour = 1
+            elif shortest == len(starts) - 1:
+                neighbour = shortest - 1
+            else:
+                neighbour = shortest - 1 if lengths[shortest - 1] >= lengths[shortest + 1] else shortest + 1
+            kind[starts[shortest]:ends[shortest]] = kind[starts[neighbour]]
+
+        sec_nums = np.empty(len(kind))
+        segments = []
+        for number, (start, end) in enumerate(zip(starts, ends), start=1):
+            sec_nums[start:end] = number
+            segments.append({
+                'sec_num': number,
+                'kind': SEGMENT_KINDS[kind[start]],
+                'start': int(start),
+                'end': int(end - 1),
+                'start_ld_pct': float(self.ld_pcts[start]),
+                'end_ld_pct': float(self.ld_pcts[min(end, len(kind) - 1)]),
+                'length': float(self.arc_length[min(end, len(kind) - 1)] - self.arc_length[start]),
+            })
+        return sec_nums, segments
+
+
+def index_track(track_dict: dict) -> dict:
+    # attaches the index to a track dict and writes the segment numbers into
+    # the sec_num column of its points in place. Points loaded read-only
+    # (memory mapped) are not copied for that, they keep the stored column
+    # and the numbers are only in index.sec_nums.
+    index = TrackIndex(track_dict['points'])
+    points = track_dict['points']
+    if len(points) > 0:
+        if not isinstance(points, np.ndarray):
+            points = np.array(points, dtype=float)
+        if points.flags.writeable:
+            points[:, 3] = index.sec_nums
+        track_dict['points'] = points
+    track_dict['index'] = index
+    return track_dict
+
+
+def track_index(track_dict: dict) -> TrackIndex:
+    # the index a track dict carries, or a new one for dicts made without it
+    index = track_dict.get('index')
+    if index is None or len(index.ld_pcts) != len(track_dict['points']):
+        index = TrackIndex(track_dict['points'])
+    return index
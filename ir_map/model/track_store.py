@@ -0,0 +1,115 @@
+import numpy as np
+import glob
+import json
+import os
+import pickle
+import struct
+from .persistence import write_file_atomic
+
+# Binary track file (.trk):
+#   header     magic, format version, point dtype size, rows, columns,
+#              metadata size and data offset, little-endian
+#   metadata   UTF-8 JSON with every track_dict key except 'points' and the
+#              'index' built from them (see track_index.py)
+#   points     raw little-endian float32/float64 block of rows x columns,
+#              starting at a 64-byte aligned offset
+# The point block is used in place with np.frombuffer/np.memmap, there is no
+# per-value decoding like with the old pickled lists.
+TRACK_EXTENSION = '.trk'
+LEGACY_EXTENSION = '.pkl'
+NOT_STORED = ('points', 'index')
+MAGIC = b'IRMTRACK'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sHHIIII')
+ALIGNMENT = 64
+DTYPES = {4: np.dtype('<f4'), 8: np.dtype('<f8')}
+
+class TrackFileError(ValueError):
+    pass
+
+
+def track_file_name(track_name: str, extension: str = TRACK_EXTENSION) -> str:
+    return f"{track_name.replace(' ', '_')}{extension}"
+
+
+def encode_track(track_dict: dict, dtype=np.float64) -> bytes:
+    points = np.ascontiguousarray(track_dict['points'], dtype=np.dtype(dtype).newbyteorder('<'))
+    if points.ndim != 2:
+        points = points.reshape(-1, 4)
+    if points.dtype.itemsize not in DTYPES:
+        raise TrackFileError(f'unsupported point dtype: {points.dtype}')
+    metadata = json.dumps({key: value for key, value in track_dict.items() if key not in NOT_STORED}).encode('utf-8')
+    data_offset = -(-(HEADER.size + len(metadata)) // ALIGNMENT) * ALIGNMENT
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, points.dtype.itemsize, points.shape[0], points.shape[1],
+                         len(metadata), data_offset)
+    return b''.join((header, metadata, b'\0' * (data_offset - HEADER.size - len(metadata)), points.tobytes()))
+
+
+def save_track_file(path: str, track_dict: dict, dtype=np.float64):
+    write_file_atomic(path, encode_track(track_dict, dtype))
+
+
+def read_track_header(header: bytes, file_size: int) -> tuple:
+    if len(header) < HEADER.size:
+        raise TrackFileError('truncated track file')
+    magic, version, itemsize, rows, columns, metadata_size, data_offset = HEADER.unpack_from(header)
+    if magic != MAGIC:
+        raise TrackFileError('not a track file')
+    if version != FORMAT_VERSION:
+        raise TrackFileError(f'unsupported track file version: {version}')
+    if itemsize not in DTYPES:
+        raise TrackFileError(f'unsupported point dtype size: {itemsize}')
+    if file_size < data_offset + rows * columns * itemsize:
+        raise TrackFileError('truncated track file')
+    return DTYPES[itemsize], rows, columns, metadata_size, data_offset
+
+
+def load_track_file(path: str, mmap: bool = False) -> dict:
+    # The default reads the file once into a writable buffer and wraps the
+    # points without copying. mmap=True maps them read-only instead, the file
+    # stays open until the array is released.
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        if mmap:
+            data = f.read(HEADER.size)
+            dtype, rows, columns, metadata_size, data_offset = read_track_header(data, file_size)
+            metadata = f.read(metadata_size)
+        else:
+            data = bytearray(file_size)
+            f.readinto(data)
+            dtype, rows, columns, metadata_size, data_offset = read_track_header(data, file_size)
+            metadata = data[HEADER.size:HEADER.size + metadata_size]
+    track_dict = json.loads(bytes(metadata).decode('utf-8'))
+    if mmap:
+        track_dict['points'] = np.memmap(path, dtype=dtype, mode='r', offset=data_offset, shape=(rows, columns))
+    else:
+        track_dict['points'] = np.frombuffer(data, dtype=dtype, count=rows * columns,
+                                             offset=data_offset).reshape(rows, columns)
+    return track_dict
+
+
+def load_legacy_track(path: str) -> dict:
+    # tracks saved before the binary format: a pickled dict with the points as a list
+    with open(path, 'rb') as f:
+        track_dict = pickle.load(f)
+    track_dict['points'] = np.array(track_dict['points'], dtype=float).reshape(-1, 4)
+    return track_dict
+
+
+def migrate_legacy_track(path: str, remove: bool = False) -> str:
+    track_path = os.path.splitext(path)[0] + TRACK_EXTENSION
+    save_track_file(track_path, load_legacy_track(path))
+    if remove:
+        os.remove(path)
+    return track_path
+
+
+def migrate_legacy_tracks(tracks_path: str, remove: bool = False) -> list:
+    # one-shot conversion of every tracks/*.pkl, existing .trk files are kept
+    migrated = []
+    for path in sorted(glob.glob(os.path.join(tracks_path, f'*{LEGACY_EXTENSION}'))):
+        if os.path.exists(os.path.splitext(path)[0] + TRACK_EXTENSION):
+            continue
+        migrated.append(migrate_legacy_track(path, remove))
+    return migrated
+
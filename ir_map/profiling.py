@@ -0,0 +1,141 @@
+import numpy as np
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+def setup_logging(level: str = 'warning'):
+    # one handler on stderr; below the level a log call is a cheap no-op
+    logging.basicConfig(level=getattr(logging, level.upper()), format=LOG_FORMAT)
+
+
+class Histogram:
+    # the last `size` durations of one span, in seconds
+    def __init__(self, size: int):
+        self.values = np.zeros(size)
+        self.count = 0
+
+    def add(self, value: float):
+        self.values[self.count % len(self.values)] = value
+        self.count += 1
+
+    def samples(self) -> np.ndarray:
+        return self.values[:min(self.count, len(self.values))]
+
+    def summary(self) -> dict:
+        samples = self.samples()
+        if len(samples) == 0:
+            return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+        p50, p99 = np.percentile(samples, (50, 99))
+        return {'count': self.count, 'mean': samples.mean(), 'p50': p50, 'p99': p99, 'max': samples.max()}
+
+
+class Span:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+NULL_SPAN = NullSpan()
+
+
+class Profiler:
+    # Timing spans around the hot paths (acquisition, model update, view
+    # model, paint), shared by every thread. Each span name keeps a ring
+    # buffer of its last HISTORY durations; with tracing on, the spans are
+    # also kept as events for export_chrome_trace(). Disabled, which is the
+    # default, span() hands out a shared no-op and record() returns at once.
+    HISTORY = 1024
+    TRACE_LENGTH = 200000
+
+    def __init__(self):
+        self.enabled = False
+        self.tracing = False
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.reset()
+
+    def enable(self, tracing: bool = False):
+        self.enabled = True
+        self.tracing = self.tracing or tracing
+
+    def disable(self):
+        self.enabled = False
+        self.tracing = False
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.trace = deque(maxlen=self.TRACE_LENGTH)
+            self.thread_names = {}
+
+    def span(self, name: str):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def record(self, name: str, start: float, end: float):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.HISTORY)
+            histogram.add(end - start)
+            if self.tracing:
+                thread_id = threading.get_ident()
+                if thread_id not in self.thread_names:
+                    self.thread_names[thread_id] = name
+                self.trace.append((name, thread_id, start, end - start))
+
+    def summary(self, name: str) -> dict:
+        with self.lock:
+            histogram = self.histograms.get(name)
+            return histogram.summary() if histogram is not None else Histogram(1).summary()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def export_chrome_trace(self, path: str) -> int:
+        # Trace Event Format, opens in chrome://tracing and Perfetto. Threads
+        # are named after the first span seen on them.
+        with self.lock:
+            trace = list(self.trace)
+            thread_names = dict(self.thread_names)
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id, 'args': {'name': name}}
+                  for thread_id, name in thread_names.items()]
+        events += [{'name': name, 'cat': 'ir_map', 'ph': 'X', 'pid': pid, 'tid': thread_id,
+                    'ts': (start - self.origin) * 1e6, 'dur': duration * 1e6}
+                   for name, thread_id, start, duration in trace]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        log.info('chrome trace written: %s (%d spans)', path, len(trace))
+        return len(trace)
+
+PROFILER = Profiler()
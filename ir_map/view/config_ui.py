@@ -2,9 +2,12 @@ from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushBu
 from PySide6.QtGui import QIcon, QColor
 from PySide6.QtCore import Qt, Signal
 from ..view_model.ir_map_vm import IRMapVM
+import logging
 import os
 from enum import Enum
 
+log = logging.getLogger(__name__)
+
 class PATH(Enum):
     ICON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'assets/icon/icon.ico')
 
@@ -76,7 +79,7 @@ class ConfigUI(QMainWindow):
                       'Track Color' : 'コースの色', 'Track Outline Color' : 'コースの輪郭線の色', 'Player Color' : '自車の色',
                       'Player Outline Color' : '自車の輪郭線の色', 'Other Color' : '他車の色', 'Next Outline Color' : '前の車の色',
                       'Prev Outline Color' : '後ろの車の色', 'Other Car Opacity' : '他車の不透明度', 'Other Class Opacity' : '他クラスの不透明度',
-                      'Number Color' : '数字の色', 'Show Position' : '順位で表示'},
+                      'Number Color' : '数字の色', 'Show Position' : '順位で表示', 'Track Rotation' : 'コースの回転', 'Show HUD' : 'パフォーマンス表示'},
               'en' : {'Language' : '日本語', 'Set Movable' : 'Move Position', 'Set Fixed' : 'Fix Position',
                       'Opacity' : 'Opacity', 'Window Size' : 'Window Size', 'Delete Track' : 'Delete Track',
                       'Set Updatable' : 'Set Updatable', 'Set Unupdatable' : 'Set Unupdatable', 'Open Advanced' : 'Open Advanced',
@@ -85,7 +88,7 @@ class ConfigUI(QMainWindow):
                       'Track Color' : 'Track Color', 'Track Outline Color' : 'Track Outline Color', 'Player Color' : 'Player Car Color',
                       'Player Outline Color' : 'Player Outline Color', 'Other Color' : 'Other Car Color', 'Next Outline Color' : 'Next Car Color',
                       'Prev Outline Color' : 'Prev Car Color', 'Other Car Opacity' : 'Other Car Opacity', 'Other Class Opacity' : 'Other Class Opacity',
-                      'Number Color' : 'Number Color', 'Show Position' : 'Show Position'},
+                      'Number Color' : 'Number Color', 'Show Position' : 'Show Position', 'Track Rotation' : 'Track Rotation', 'Show HUD' : 'Show HUD'},
               }
     
     def __init__(self, vm: IRMapVM):
@@ -98,13 +101,13 @@ class ConfigUI(QMainWindow):
         self.vm = vm
         self.vm.config_updated.connect(self._on_config_updated)
         self.vm.track_updated.connect(self._on_track_updated)
-        self.vm.telemetry_updated.connect(self._on_telemetry_updated)
+        self.vm.session_info_updated.connect(self._on_session_info_updated)
         self.vm.ir_connected.connect(self._on_ir_connected)
         self.vm.ir_disconnected.connect(self._on_ir_disconnected)
         
         self.config = self.vm.config.copy()
         self.track_dict = self.vm.track_dict.copy()
-        self.telemetry = self.vm.telemetry.copy()
+        self.session_info = self.vm.session_info.copy()
         self.is_overlay_movable = self.vm.is_overlay_movable
 
         self.setWindowTitle('S.T.D.N.iRMap - Config')
@@ -125,7 +128,7 @@ class ConfigUI(QMainWindow):
         try:
             self.setWindowIcon(QIcon(PATH.ICON_PATH.value))
         except Exception as e:
-            print(f"Error setting window icon: {e}")
+            log.warning("Error setting window icon: %s", e)
         
         self.widgets['Language'].clicked.connect(lambda: self.lang_button_slot())
         self.widgets['Set Movable'].clicked.connect(lambda: self.move_button_slot())
@@ -143,12 +146,13 @@ class ConfigUI(QMainWindow):
         self.track_dict = track_dict.copy()
         self.set_labels()
         
-    def _on_telemetry_updated(self, telemetry: dict):
-        self.telemetry = telemetry.copy()
+    def _on_session_info_updated(self, session_info: dict):
+        self.session_info = session_info.copy()
+        self.widgets['Track Name'].setText(self.session_info['track_name'])
         
     def _on_ir_connected(self, track_dict: dict):
         self.track_dict = track_dict.copy()
-        self.widgets['Track Name'].setText(self.telemetry['track_name'])
+        self.widgets['Track Name'].setText(self.session_info['track_name'])
         self.set_labels()
         
     def _on_ir_disconnected(self):
@@ -163,7 +167,7 @@ class ConfigUI(QMainWindow):
             'Open Advanced': QPushButton(self.labels[self.config['ui']['language']]['Open Advanced']),
             'Advanced': QWidget(),
             'Bottom Buttons': QWidget(),
-            'Track Name': QLabel(self.telemetry['track_name']),
+            'Track Name': QLabel(self.session_info['track_name']),
         }
         
         self.set_bottom_widget()
@@ -189,7 +193,9 @@ class ConfigUI(QMainWindow):
             'Car Outline Width': SpinBoxWidget(self.labels[self.config['ui']['language']]['Car Outline Width'], self.config['number']['car_outline_width'], 1, 20, 1, 0),
             'Other Car Opacity': SpinBoxWidget(self.labels[self.config['ui']['language']]['Other Car Opacity'], self.config['number']['other_car_opacity'], 0.1, 1.0, 0.1, 2),
             'Other Class Opacity': SpinBoxWidget(self.labels[self.config['ui']['language']]['Other Class Opacity'], self.config['number']['other_class_opacity'], 0.1, 1.0, 0.1, 2),
+            'Track Rotation': SpinBoxWidget(self.labels[self.config['ui']['language']]['Track Rotation'], self.config['number'].get('track_rotation', 0), -180, 180, 5, 0),
             'Show Position': CheckBoxWidget(self.labels[self.config['ui']['language']]['Show Position'], self.config['bool']['show_position']),
+            'Show HUD': CheckBoxWidget(self.labels[self.config['ui']['language']]['Show HUD'], self.config['bool'].get('show_hud', False)),
             'Track Color': ColorWidget(self.labels[self.config['ui']['language']]['Track Color'], self.config['color']['track_color']),
             'Track Outline Color': ColorWidget(self.labels[self.config['ui']['language']]['Track Outline Color'], self.config['color']['outline_color']),
             'Player Color': ColorWidget(self.labels[self.config['ui']['language']]['Player Color'], self.config['color']['player_color']),
@@ -206,7 +212,7 @@ class ConfigUI(QMainWindow):
         self.advanced_layout.addLayout(self.advanced_widgets_right)
         
         for key, widget in self.advanced_widgets.items():
-            if key in ['Track Width', 'Track Outline Width', 'Car Outline Width', 'Car Size', 'Player Scale', 'Other Car Opacity', 'Other Class Opacity', 'Show Position']:
+            if key in ['Track Width', 'Track Outline Width', 'Car Outline Width', 'Car Size', 'Player Scale', 'Other Car Opacity', 'Other Class Opacity', 'Track Rotation', 'Show Position', 'Show HUD']:
                 self.advanced_widgets_left.addWidget(widget)
             else:
                 self.advanced_widgets_right.addWidget(widget)
@@ -218,7 +224,9 @@ class ConfigUI(QMainWindow):
         self.advanced_widgets['Player Scale'].spinBox.valueChanged.connect(lambda value: self.vm.set_config('number', 'player_scale', round(value, 2)))
         self.advanced_widgets['Other Car Opacity'].spinBox.valueChanged.connect(lambda value: self.vm.set_config('number', 'other_car_opacity', round(value, 2)))
         self.advanced_widgets['Other Class Opacity'].spinBox.valueChanged.connect(lambda value: self.vm.set_config('number', 'other_class_opacity', round(value, 2)))
+        self.advanced_widgets['Track Rotation'].spinBox.valueChanged.connect(lambda value: self.vm.set_config('number', 'track_rotation', int(value)))
         self.advanced_widgets['Show Position'].checkBox.stateChanged.connect(lambda state: self.vm.set_config('bool', 'show_position', state))
+        self.advanced_widgets['Show HUD'].checkBox.stateChanged.connect(lambda state: self.vm.set_config('bool', 'show_hud', state))
         self.advanced_widgets['Track Color'].color_changed.connect(lambda color: self.vm.set_config('color', 'track_color', color))
         self.advanced_widgets['Track Outline Color'].color_changed.connect(lambda color: self.vm.set_config('color', 'outline_color', color))
         self.advanced_widgets['Player Color'].color_changed.connect(lambda color: self.vm.set_config('color', 'player_color', color))
@@ -249,7 +257,7 @@ class ConfigUI(QMainWindow):
             self.vm.set_track_updatable(True)
             
     def delete_track_slot(self):
-        if self.telemetry['track_name'] == '':
+        if self.session_info['track_name'] == '':
             return
         message = {'ja' : 'トラックを削除しますか？', 'en' : 'Delete track?'}
         response = self.open_msg_box(QMessageBox.Question, 'Delete Track', message[self.config['ui']['language']])
@@ -309,7 +317,9 @@ class ConfigUI(QMainWindow):
             self.advanced_widgets['Player Scale'].setText(self.labels[self.config['ui']['language']]['Player Scale'])
             self.advanced_widgets['Other Car Opacity'].setText(self.labels[self.config['ui']['language']]['Other Car Opacity'])
             self.advanced_widgets['Other Class Opacity'].setText(self.labels[self.config['ui']['language']]['Other Class Opacity'])
+            self.advanced_widgets['Track Rotation'].setText(self.labels[self.config['ui']['language']]['Track Rotation'])
             self.advanced_widgets['Show Position'].setText(self.labels[self.config['ui']['language']]['Show Position'])
+            self.advanced_widgets['Show HUD'].setText(self.labels[self.config['ui']['language']]['Show HUD'])
 
             self.advanced_widgets['Track Color'].setText(self.labels[self.config['ui']['language']]['Track Color'])
             self.advanced_widgets['Track Color'].set_color(self.config['color']['track_color'])
@@ -351,6 +361,7 @@ class ConfigUI(QMainWindow):
             self.advanced_widgets['Player Scale'].spinBox.clearFocus()
             self.advanced_widgets['Other Car Opacity'].spinBox.clearFocus()
             self.advanced_widgets['Other Class Opacity'].spinBox.clearFocus()
+            self.advanced_widgets['Track Rotation'].spinBox.clearFocus()
 
         super().mousePressEvent(event)
         
@@ -0,0 +1,110 @@
+from PySide6.QtCore import QObject, QTimer
+from ..profiling import PROFILER
+from collections import deque
+import numpy as np
+import math
+import time
+
+class FrameScheduler(QObject):
+    # Turns telemetry ticks into repaints of a widget at no more than
+    # frame_rate per second. Ticks that arrive before the next frame is due
+    # are merged into it, and nothing is painted while the widget is hidden
+    # or fully transparent. With min_move > 0 a tick only repaints when some
+    # car moved at least that many pixels since the last painted frame.
+    # schedule() asks for a frame without a tick, for motion between ticks.
+    # Frames are painted by target, the widget itself unless a child renders it.
+    HISTORY = 240
+
+    def __init__(self, widget, frame_rate: float = 60, min_move: float = 0.0):
+        super().__init__(widget)
+        self.widget = widget
+        self.target = widget
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timeout)
+        self.set_frame_rate(frame_rate)
+        self.min_move = min_move
+        self.pending = False
+        self.last_positions = None
+        self.last_frame_start = 0.0
+        self.frame_start = None
+        self.tick_time = None
+        self.reset_stats()
+
+    def set_frame_rate(self, frame_rate: float):
+        self.interval = 1 / frame_rate if frame_rate > 0 else 0.0
+
+    def set_min_move(self, min_move: float):
+        self.min_move = min_move
+
+    def reset_stats(self):
+        self.requested = 0      # telemetry ticks asking for a frame
+        self.merged = 0         # ticks folded into an already scheduled frame
+        self.unchanged = 0      # ticks where no car moved far enough
+        self.hidden = 0         # frames dropped while hidden or transparent
+        self.paint_times = deque(maxlen=self.HISTORY)
+        self.frame_intervals = deque(maxlen=self.HISTORY)
+
+    def is_visible(self):
+        return self.widget.isVisible() and not self.widget.isMinimized() and self.widget.windowOpacity() > 0
+
+    def request(self, positions: np.ndarray = None):
+        self.requested += 1
+        if self.min_move > 0 and positions is not None:
+            if self.last_positions is not None and positions.shape == self.last_positions.shape \
+            and (len(positions) == 0 or np.abs(positions - self.last_positions).max() < self.min_move):
+                self.unchanged += 1
+                return
+            self.last_positions = positions
+        if self.tick_time is None:
+            # the oldest tick still waiting for a frame, for the latency
+            self.tick_time = time.perf_counter()
+        if self.pending:
+            self.merged += 1
+            return
+        self.schedule()
+
+    def schedule(self):
+        # next frame at the frame rate, without a telemetry tick (animation)
+        if self.pending:
+            return
+        self.pending = True
+        delay = self.last_frame_start + self.interval - time.perf_counter()
+        self.timer.start(max(0, math.ceil(delay * 1000)))
+
+    def _on_timeout(self):
+        self.pending = False
+        if not self.is_visible():
+            self.hidden += 1
+            self.tick_time = None
+            return
+        self.target.update()
+
+    # called by the widget around its paintEvent
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+        if self.last_frame_start:
+            self.frame_intervals.append(self.frame_start - self.last_frame_start)
+        self.last_frame_start = self.frame_start
+
+    def end_frame(self):
+        end = time.perf_counter()
+        self.paint_times.append(end - self.frame_start)
+        PROFILER.record('paint', self.frame_start, end)
+        if self.tick_time is not None:
+            PROFILER.record('tick to frame', self.tick_time, end)
+            self.tick_time = None
+
+    def stats(self) -> dict:
+        paint_times = np.array(self.paint_times)
+        frame_intervals = np.array(self.frame_intervals)
+        return {
+            'fps': 1 / frame_intervals.mean() if len(frame_intervals) else 0.0,
+            'paint mean': paint_times.mean() if len(paint_times) else 0.0,
+            'paint p95': np.percentile(paint_times, 95) if len(paint_times) else 0.0,
+            'paint max': paint_times.max() if len(paint_times) else 0.0,
+            'requested': self.requested,
+            'merged': self.merged,
+            'unchanged': self.unchanged,
+            'hidden': self.hidden,
+        }
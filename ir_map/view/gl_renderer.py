@@ -0,0 +1,365 @@
+from PySide6.QtOpenGLWidgets import QOpenGLWidget
+from PySide6.QtOpenGL import QOpenGLShaderProgram, QOpenGLShader, QOpenGLBuffer, QOpenGLVertexArrayObject
+from PySide6.QtGui import QSurfaceFormat, QOpenGLContext, QOpenGLExtraFunctions, QOffscreenSurface, QPainter, QPen
+from PySide6.QtCore import Qt, QRectF, Signal
+from .hud import draw_hud
+import numpy as np
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+# GL enums used here, PySide6 does not export them
+GL_FLOAT = 0x1406
+GL_TRIANGLE_STRIP = 0x0005
+GL_BLEND = 0x0BE2
+GL_ONE = 1
+GL_ONE_MINUS_SRC_ALPHA = 0x0303
+GL_COLOR_BUFFER_BIT = 0x4000
+
+MITER_LIMIT = 2.0
+INSTANCE_SIZE = 13  # center xy, radius, outline width, fill rgba, outline rgba, opacity
+
+STRIP_VERTEX_SHADER = '''
+in vec2 position;
+uniform vec2 viewport;
+void main() {
+    gl_Position = vec4(position.x / viewport.x * 2.0 - 1.0, 1.0 - position.y / viewport.y * 2.0, 0.0, 1.0);
+}
+'''
+STRIP_FRAGMENT_SHADER = '''
+uniform vec4 color;
+out vec4 frag_color;
+void main() {
+    frag_color = vec4(color.rgb * color.a, color.a);
+}
+'''
+CAR_VERTEX_SHADER = '''
+in vec2 corner;
+in vec2 center;
+in float radius;
+in float outline;
+in vec4 fill;
+in vec4 stroke;
+in float opacity;
+uniform vec2 viewport;
+out vec2 local;
+out float v_radius;
+out float v_outline;
+out vec4 v_fill;
+out vec4 v_stroke;
+out float v_opacity;
+void main() {
+    local = corner * (radius + outline * 0.5 + 1.0);
+    vec2 position = center + local;
+    gl_Position = vec4(position.x / viewport.x * 2.0 - 1.0, 1.0 - position.y / viewport.y * 2.0, 0.0, 1.0);
+    v_radius = radius;
+    v_outline = outline;
+    v_fill = fill;
+    v_stroke = stroke;
+    v_opacity = opacity;
+}
+'''
+CAR_FRAGMENT_SHADER = '''
+in vec2 local;
+in float v_radius;
+in float v_outline;
+in vec4 v_fill;
+in vec4 v_stroke;
+in float v_opacity;
+out vec4 frag_color;
+void main() {
+    // filled disc with the outline centered on its edge, like QPainter.drawEllipse
+    float d = length(local);
+    float aa = max(fwidth(d), 1e-4) * 0.5;
+    float fill_alpha = 1.0 - smoothstep(v_radius - aa, v_radius + aa, d);
+    float stroke_alpha = 0.0;
+    if (v_outline > 0.0) {
+        stroke_alpha = 1.0 - smoothstep(v_outline * 0.5 - aa, v_outline * 0.5 + aa, abs(d - v_radius));
+    }
+    vec4 fill = vec4(v_fill.rgb, 1.0) * v_fill.a * fill_alpha;
+    vec4 stroke = vec4(v_stroke.rgb, 1.0) * v_stroke.a * stroke_alpha;
+    frag_color = (stroke + fill * (1.0 - stroke.a)) * v_opacity;
+}
+'''
+CORNERS = np.array([[-1, -1], [1, -1], [-1, 1], [1, 1]], dtype=np.float32)
+
+
+# desktop OpenGL 3.3 core first, then OpenGL ES 3.0 (e.g. Mesa llvmpipe on
+# EGL without a window system), as renderable type, version and profile
+FORMATS = (
+    (QSurfaceFormat.OpenGL, (3, 3), QSurfaceFormat.CoreProfile),
+    (QSurfaceFormat.OpenGLES, (3, 0), QSurfaceFormat.NoProfile),
+)
+# the format gl_available() found, None before it was called or when no
+# context could be made
+chosen_format = None
+
+
+def surface_format(renderable_type=QSurfaceFormat.OpenGL, version: tuple = (3, 3),
+                   profile=QSurfaceFormat.CoreProfile) -> QSurfaceFormat:
+    surface_format = QSurfaceFormat()
+    surface_format.setRenderableType(renderable_type)
+    surface_format.setVersion(*version)
+    surface_format.setProfile(profile)
+    surface_format.setAlphaBufferSize(8)
+    surface_format.setSamples(4)
+    return surface_format
+
+
+def gl_available() -> bool:
+    # whether a context of one of FORMATS can be made current at all, checked
+    # before the overlay picks its renderer; the first that can is kept for
+    # the canvas
+    global chosen_format
+    if chosen_format is not None:
+        return True
+    for renderable_type, version, profile in FORMATS:
+        context = QOpenGLContext()
+        context.setFormat(surface_format(renderable_type, version, profile))
+        if not context.create():
+            continue
+        surface = QOffscreenSurface()
+        surface.setFormat(context.format())
+        surface.create()
+        if not surface.isValid() or not context.makeCurrent(surface):
+            continue
+        created = context.format()
+        context.doneCurrent()
+        if created.version() >= ((3, 0) if context.isOpenGLES() else (3, 3)):
+            chosen_format = surface_format(renderable_type, version, profile)
+            return True
+    return False
+
+
+def stroke_strip(points: np.ndarray, width: float) -> np.ndarray:
+    # Triangle strip covering a polyline stroked with the given width:
+    # mitered joins (at most MITER_LIMIT half widths out) and square caps.
+    # Returns the 2n strip vertices as float32 xy.
+    points = np.asarray(points[:, :2], dtype=float)
+    if len(points) > 1:
+        points = points[np.r_[True, np.any(np.diff(points, axis=0) != 0, axis=1)]]
+    if len(points) < 2:
+        return np.empty((0, 2), dtype=np.float32)
+    directions = np.diff(points, axis=0)
+    directions /= np.hypot(directions[:, 0], directions[:, 1])[:, None]
+    normals = np.column_stack((-directions[:, 1], directions[:, 0]))
+    # a vertex between two segments is pushed out along the mean normal
+    vertex_normals = np.empty_like(points)
+    vertex_normals[0] = normals[0]
+    vertex_normals[-1] = normals[-1]
+    vertex_normals[1:-1] = normals[:-1] + normals[1:]
+    vertex_normals[1:-1] /= np.maximum(np.hypot(vertex_normals[1:-1, 0], vertex_normals[1:-1, 1]), 1e-9)[:, None]
+    cosines = np.ones(len(points))
+    cosines[1:-1] = np.einsum('ij,ij->i', vertex_normals[1:-1], normals[:-1])
+    offsets = vertex_normals * (width / 2 / np.maximum(cosines, 1 / MITER_LIMIT))[:, None]
+    # square caps reach half the width past both ends
+    points[0] -= directions[0] * width / 2
+    points[-1] += directions[-1] * width / 2
+    strip = np.empty((len(points) * 2, 2), dtype=np.float32)
+    strip[0::2] = points + offsets
+    strip[1::2] = points - offsets
+    return strip
+
+
+def rect_strip(center: np.ndarray, angle: float, x: float, y: float, width: float, height: float) -> np.ndarray:
+    # the four corners of a rect given in a frame rotated by angle (degrees)
+    # around center, in triangle strip order
+    corners = np.array([[x, y], [x + width, y], [x, y + height], [x + width, y + height]])
+    radians = np.radians(angle)
+    rotation = np.array([[np.cos(radians), -np.sin(radians)], [np.sin(radians), np.cos(radians)]])
+    return (corners @ rotation.T + center).astype(np.float32)
+
+
+def car_instances(positions: np.ndarray, cars: list) -> np.ndarray:
+    # one row of INSTANCE_SIZE floats per car for the instanced quads
+    instances = np.zeros((len(cars), INSTANCE_SIZE), dtype=np.float32)
+    instances[:, :2] = positions
+    for row, (car_size, pen, brush, opacity, _) in zip(instances, cars):
+        row[2] = car_size
+        row[4:8] = brush.color().getRgbF()
+        if isinstance(pen, QPen):
+            row[3] = pen.widthF()
+            row[8:12] = pen.color().getRgbF()
+        row[12] = opacity
+    return instances
+
+
+class GLCanvas(QOpenGLWidget):
+    # GPU renderer for IRMap, used as its central widget when
+    # render.renderer is 'opengl'. The track and the S/F line are triangle
+    # strips in one vertex buffer, built when the track geometry changes; the
+    # cars are instanced quads shaded as discs in the fragment shader. The
+    # numbers are the IRMap label pixmaps, drawn with QPainter on top.
+    # failed is emitted when the shaders cannot be built, IRMap then goes
+    # back to the software renderer.
+    failed = Signal()
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self.setFormat(chosen_format if chosen_format is not None else surface_format())
+        self.setAttribute(Qt.WA_AlwaysStackOnTop)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.ready = False
+        self.track_dirty = True
+        self.track_ranges = []
+        self.styled_cars = None
+        self.car_styles = np.empty((0, INSTANCE_SIZE), dtype=np.float32)
+
+    def invalidate_track(self):
+        self.track_dirty = True
+
+    def build_program(self, vertex_source: str, fragment_source: str, attributes: tuple):
+        context = self.context()
+        header = '#version 300 es\nprecision mediump float;\n' if context.isOpenGLES() else '#version 330 core\n'
+        program = QOpenGLShaderProgram(self)
+        if not program.addShaderFromSourceCode(QOpenGLShader.Vertex, header + vertex_source) \
+        or not program.addShaderFromSourceCode(QOpenGLShader.Fragment, header + fragment_source):
+            raise RuntimeError(program.log())
+        for location, name in enumerate(attributes):
+            program.bindAttributeLocation(name, location)
+        if not program.link():
+            raise RuntimeError(program.log())
+        return program
+
+    def initializeGL(self):
+        try:
+            self.strip_program = self.build_program(STRIP_VERTEX_SHADER, STRIP_FRAGMENT_SHADER, ('position',))
+            self.car_program = self.build_program(
+                CAR_VERTEX_SHADER, CAR_FRAGMENT_SHADER,
+                ('corner', 'center', 'radius', 'outline', 'fill', 'stroke', 'opacity'))
+        except RuntimeError as e:
+            log.error("Error building OpenGL shaders: %s", e)
+            self.failed.emit()
+            return
+        # its own wrapper: PySide6 returns the functions() wrapper for
+        # extraFunctions(), which has no instancing calls
+        self.functions = QOpenGLExtraFunctions(self.context())
+
+        self.track_vao = QOpenGLVertexArrayObject(self)
+        self.track_vao.create()
+        self.track_vao.bind()
+        self.track_buffer = QOpenGLBuffer(QOpenGLBuffer.VertexBuffer)
+        self.track_buffer.create()
+        self.track_buffer.bind()
+        self.strip_program.enableAttributeArray(0)
+        self.strip_program.setAttributeBuffer(0, GL_FLOAT, 0, 2, 8)
+        self.track_vao.release()
+
+        self.car_vao = QOpenGLVertexArrayObject(self)
+        self.car_vao.create()
+        self.car_vao.bind()
+        self.corner_buffer = QOpenGLBuffer(QOpenGLBuffer.VertexBuffer)
+        self.corner_buffer.create()
+        self.corner_buffer.bind()
+        self.corner_buffer.allocate(CORNERS.tobytes(), CORNERS.nbytes)
+        self.car_program.enableAttributeArray(0)
+        self.car_program.setAttributeBuffer(0, GL_FLOAT, 0, 2, 8)
+        self.instance_buffer = QOpenGLBuffer(QOpenGLBuffer.VertexBuffer)
+        self.instance_buffer.setUsagePattern(QOpenGLBuffer.DynamicDraw)
+        self.instance_buffer.create()
+        self.instance_buffer.bind()
+        offset = 0
+        for location, size in enumerate((2, 1, 1, 4, 4, 1), start=1):
+            self.car_program.enableAttributeArray(location)
+            self.car_program.setAttributeBuffer(location, GL_FLOAT, offset * 4, size, INSTANCE_SIZE * 4)
+            self.functions.glVertexAttribDivisor(location, 1)
+            offset += size
+        self.car_vao.release()
+
+        self.track_dirty = True
+        self.ready = True
+
+    def upload_track(self):
+        # outline, track and S/F line strips back to back in one buffer
+        view = self.view
+        self.track_ranges = []
+        strips = []
+        if len(view.draw_points) > 1:
+            colors = view.config['color']
+            first_point = view.draw_points[0, :2]
+            angle = view.sf_angle()
+            sf_height = view.track_width + view.track_outline_width * 2
+            for color, strip in (
+                (colors['outline_color'], stroke_strip(view.draw_points, view.track_width + view.track_outline_width * 2)),
+                (colors['track_color'], stroke_strip(view.draw_points, view.track_width)),
+                (colors['sf_color'], rect_strip(first_point, angle, -view.track_width / 3, -sf_height / 2,
+                                                view.track_width / 3 * 2, sf_height)),
+            ):
+                first = sum(len(strip) for strip in strips)
+                self.track_ranges.append((color, first, len(strip)))
+                strips.append(strip)
+        vertices = np.concatenate(strips) if strips else np.empty((0, 2), dtype=np.float32)
+        self.track_buffer.bind()
+        self.track_buffer.allocate(vertices.tobytes(), vertices.nbytes)
+        self.track_dirty = False
+
+    def paintGL(self):
+        view = self.view
+        view.frame_scheduler.begin_frame()
+        now = time.perf_counter()
+        functions = self.context().functions()
+        if view.is_overlay_movable:
+            # premultiplied rgba(255, 255, 255, 150), the software background
+            functions.glClearColor(150 / 255, 150 / 255, 150 / 255, 150 / 255)
+        else:
+            functions.glClearColor(0.0, 0.0, 0.0, 0.0)
+        functions.glClear(GL_COLOR_BUFFER_BIT)
+        if not self.ready:
+            view.frame_scheduler.end_frame()
+            return
+
+        # QPainter leaves its own blend state behind, so it is set every frame
+        functions.glEnable(GL_BLEND)
+        functions.glBlendFunc(GL_ONE, GL_ONE_MINUS_SRC_ALPHA)
+        width = self.width()
+        height = self.height()
+        if len(view.draw_points) > 1:
+            # draw the track
+            if self.track_dirty:
+                self.upload_track()
+            self.strip_program.bind()
+            self.strip_program.setUniformValue(self.strip_program.uniformLocation('viewport'), float(width), float(height))
+            self.track_vao.bind()
+            color_location = self.strip_program.uniformLocation('color')
+            for color, first, count in self.track_ranges:
+                self.strip_program.setUniformValue(color_location, color)
+                functions.glDrawArrays(GL_TRIANGLE_STRIP, first, count)
+            self.track_vao.release()
+            self.strip_program.release()
+
+            # draw cars, the styles only change with the telemetry tick
+            positions = view.car_positions(now)
+            if view.cars is not self.styled_cars:
+                self.styled_cars = view.cars
+                self.car_styles = car_instances(positions, view.cars)
+            if len(view.cars) > 0:
+                instances = self.car_styles
+                instances[:, :2] = positions
+                self.car_program.bind()
+                self.car_program.setUniformValue(self.car_program.uniformLocation('viewport'), float(width), float(height))
+                self.car_vao.bind()
+                self.instance_buffer.bind()
+                self.instance_buffer.allocate(instances.tobytes(), instances.nbytes)
+                self.functions.glDrawArraysInstanced(GL_TRIANGLE_STRIP, 0, 4, len(instances))
+                self.car_vao.release()
+                self.car_program.release()
+
+        # numbers (blitted from the label cache) and the HUD on top
+        painter = QPainter(self)
+        if len(view.draw_points) > 1:
+            number_color = view.config['color']['number_color']
+            dpr = self.devicePixelRatioF()
+            label_rect = QRectF()
+            for (car_x, car_y), (car_size, _, _, opacity, car_number) in zip(positions, view.cars):
+                painter.setOpacity(opacity)
+                label, source_rect = view.labels.label(car_number, car_size, number_color, dpr)
+                label_rect.setRect(car_x - car_size * 2, car_y - car_size, car_size * 4, car_size * 2)
+                painter.drawPixmap(label_rect, label, source_rect)
+        if view.show_hud:
+            draw_hud(painter, view.frame_stats()['fps'], view.acquisition_stats)
+        painter.end()
+        view.frame_scheduler.end_frame()
+        if view.motion.is_moving(now):
+            view.frame_scheduler.schedule()
@@ -0,0 +1,38 @@
+from PySide6.QtGui import QPainter, QColor, QFont, QFontMetricsF
+from PySide6.QtCore import Qt, QRectF
+from ..profiling import PROFILER
+
+# spans shown on the HUD, in pipeline order reversed (the frame first)
+HUD_SPANS = ('paint', 'tick to frame', 'view model', 'model update', 'acquisition')
+HUD_FONT = QFont('monospace', 9)
+HUD_BACKGROUND = QColor(0, 0, 0, 160)
+HUD_TEXT = QColor(255, 255, 255)
+
+
+def hud_lines(fps: float, acquisition: dict = None) -> list:
+    lines = [f'{fps:5.1f} fps']
+    if acquisition:
+        # counts since the sim connected, sent once a second by the irsdk worker
+        lines.append(f"ticks {acquisition['processed']:>8} read  {acquisition['skipped']} skipped  "
+                     f"{acquisition['dropped']} dropped")
+    for name in HUD_SPANS:
+        summary = PROFILER.summary(name)
+        if summary['count']:
+            lines.append(f"{name:<14} p50 {summary['p50'] * 1000:6.2f}  p99 {summary['p99'] * 1000:6.2f} ms")
+    return lines
+
+
+def draw_hud(painter: QPainter, fps: float, acquisition: dict = None):
+    # frame rate, sim ticks and span latencies in the top left corner of the overlay
+    lines = hud_lines(fps, acquisition)
+    painter.save()
+    painter.setOpacity(1.0)
+    painter.setFont(HUD_FONT)
+    metrics = QFontMetricsF(HUD_FONT)
+    line_height = metrics.height()
+    width = max(metrics.horizontalAdvance(line) for line in lines) + 8
+    painter.fillRect(QRectF(0, 0, width, line_height * len(lines) + 8), HUD_BACKGROUND)
+    painter.setPen(HUD_TEXT)
+    for i, line in enumerate(lines):
+        painter.drawText(QRectF(4, 4 + i * line_height, width, line_height), Qt.AlignLeft | Qt.AlignVCenter, line)
+    painter.restore()
@@ -1,17 +1,30 @@
 from PySide6.QtWidgets import QMainWindow, QApplication, QWidget
-from PySide6.QtGui import QPainter, QPainterPath, QPen, QColor, QFont, QIcon, QFontDatabase
-from PySide6.QtCore import Qt, QPointF, QRectF, QPoint
+from PySide6.QtGui import QPainter, QPainterPath, QPen, QFont, QIcon, QFontDatabase, QPixmap
+from PySide6.QtCore import Qt, QRectF, QPoint
 from ..view_model.ir_map_vm import IRMapVM
+from ..model.telemetry import Telemetry
+from ..model.track_index import track_index
+from .polyline import simplify, to_polygon
+from .frame_scheduler import FrameScheduler
+from .motion import MotionSmoother
+from .labels import LabelCache
+from .gl_renderer import GLCanvas, gl_available
+from .hud import draw_hud
+from ..profiling import PROFILER
 import numpy as np
+import logging
 import os
 from enum import Enum
 import time
 
+log = logging.getLogger(__name__)
+
 class PATH(Enum):
     ICON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'assets/icon/icon.ico')
     FONT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'assets/fonts/Gemunu_Libre/static/GemunuLibre-SemiBold.ttf')
 
 class IRMap(QMainWindow):
+    PATH_TOLERANCE = 0.1  # px at a window_size of 1000
     
     def set_window_geometry(self):
         self.window_x = self.screen_geometry.width() * self.config['geometry']['x']
@@ -26,17 +39,30 @@ class IRMap(QMainWindow):
         self.vm.track_updated.connect(self._on_track_ready)
         self.vm.config_updated.connect(self._on_config_ready)
         self.vm.telemetry_updated.connect(self._on_telemetry_ready)
+        self.vm.acquisition_stats_updated.connect(self._on_acquisition_stats_ready)
+        self.vm.session_info_updated.connect(self._on_session_info_ready)
         self.vm.ir_connected.connect(self._on_ir_connected)
         self.vm.ir_disconnected.connect(self._on_ir_disconnected)
         self.vm.is_overlay_movable_changed.connect(self._on_is_overlay_movable_changed)
 
         self.track_dict = self.vm.track_dict.copy()
         self.config = self.vm.config.copy()
-        self.telemetry = self.vm.telemetry.copy()
-        self.draw_points = self.rescale_track(self.track_dict['points'])
-        self.static_path = self.create_static_path()
+        self.telemetry = self.vm.telemetry
+        self.acquisition_stats = self.vm.acquisition_stats.copy()
+        self.session_info = self.vm.session_info.copy()
+        self.draw_points = np.empty((0, 4), dtype=float)
+        self.view_transform_key = None
+        self.canvas = None
+        self.update_track_geometry()
         self.is_overlay_movable = self.vm.is_overlay_movable
         self.drag_pos = QPoint()
+        render_config = self.config.get('render', {})
+        self.frame_scheduler = FrameScheduler(self, render_config.get('frame_rate', 60), render_config.get('min_car_move', 0))
+        self.motion = MotionSmoother(render_config.get('motion_smoothing', 'extrapolate'))
+        self.motion.update(self.telemetry['other_ld_pcts'], self.telemetry['session_time'])
+        self.show_hud = False
+        self.hud_profiling = False
+        self.set_show_hud(self.config['bool'].get('show_hud', False))
 
         self.setWindowTitle("S.T.D.N.iRMap")
         self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint)
@@ -46,43 +72,78 @@ class IRMap(QMainWindow):
         
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
+        if render_config.get('renderer', 'software') == 'opengl':
+            self.use_gl_renderer()
         
         try:
             self.setWindowIcon(QIcon(PATH.ICON_PATH.value))
         except Exception as e:
-            print(f"Error setting window icon: {e}")
+            log.warning("Error setting window icon: %s", e)
             
         try:
             font_id = QFontDatabase.addApplicationFont(PATH.FONT_PATH.value)
             self.font_family = QFontDatabase.applicationFontFamilies(font_id)[0]
         except Exception as e:
-            print(f"Error loading font: {e}")
+            log.warning("Error loading font: %s", e)
             self.font_family = "Arial"
             
         self.font_family = QFont(self.font_family)
+        self.labels = LabelCache(self.font_family)
         
     def _on_track_ready(self, track_dict: dict):
         self.track_dict = track_dict.copy()
-        self.draw_points = self.rescale_track(self.track_dict['points'])
-        self.static_path = self.create_static_path()
+        self.update_track_geometry()
 
     def _on_config_ready(self, key1: str, key2: str, value: object):
         self.config[key1][key2] = value
         if key2 in ['window_size', 'opacity', 'track_width', 'track_outline_width', 'car_size', 'car_outline_width']:
             self.ajust_size_values()
+        if key2 == 'track_rotation':
+            self.update_track_geometry()
+        if key1 == 'render' and key2 == 'frame_rate':
+            self.frame_scheduler.set_frame_rate(value)
+        if key1 == 'render' and key2 == 'min_car_move':
+            self.frame_scheduler.set_min_move(value)
+        if key1 == 'render' and key2 == 'motion_smoothing':
+            self.motion.set_mode(value)
+        if key1 == 'bool' and key2 == 'show_hud':
+            self.set_show_hud(value)
+        if key1 == 'render' and key2 == 'renderer':
+            if value == 'opengl':
+                self.use_gl_renderer()
+            else:
+                self.use_software_renderer()
+        self.invalidate_track_layer()
+        self.cars = None
         self.update()
+        if self.canvas is not None:
+            self.canvas.update()
 
-    def _on_telemetry_ready(self, telemetry: dict):
-        self.telemetry = telemetry.copy()
-        self.update()
+    def _on_telemetry_ready(self, telemetry: Telemetry):
+        self.telemetry = telemetry
+        self.motion.update(telemetry['other_ld_pcts'], telemetry['session_time'])
+        self.cars = None
+        if self.frame_scheduler.min_move > 0:
+            # the styles are needed for the next frame anyway
+            self.frame_scheduler.request(self.car_positions())
+        else:
+            self.frame_scheduler.request()
+        
+    def _on_acquisition_stats_ready(self, stats: dict):
+        # shown on the HUD with the next frame
+        self.acquisition_stats = stats.copy()
+
+    def _on_session_info_ready(self, session_info: dict):
+        self.session_info = session_info.copy()
+        self.cars = None
         
     def _on_ir_connected(self, track_dict: dict):
         self.track_dict = track_dict.copy()
-        self.draw_points = self.rescale_track(self.track_dict['points'])
-        self.static_path = self.create_static_path()
+        self.update_track_geometry()
         self.show()
         
     def _on_ir_disconnected(self):
+        self.motion.reset()
         self.hide()
         
     def _on_is_overlay_movable_changed(self, is_overlay_movable: bool):
@@ -104,15 +165,68 @@ class IRMap(QMainWindow):
         self.track_outline_width = self.config['number']['track_outline_width'] * self.window_size / 1000
         self.car_size = self.config['number']['car_size'] * self.window_size / 1000
         self.car_outline_width = self.car_size * self.config['number']['car_outline_width'] / 50
+        self.invalidate_track_layer()
+        self.cars = None
 
-    def rescale_track(self, points: np.ndarray): 
-        if len(points) == 0 or self.window_size == 0:
-            return points
+    def use_gl_renderer(self) -> bool:
+        # the GL canvas replaces the central widget and paints the frames,
+        # without a usable OpenGL 3.3 context the software renderer stays
+        if self.canvas is not None:
+            return True
+        if not gl_available():
+            log.warning("OpenGL is not available, using the software renderer")
+            return False
+        self.canvas = GLCanvas(self)
+        self.canvas.failed.connect(self.use_software_renderer, Qt.QueuedConnection)
+        self.central_widget = self.canvas
+        self.setCentralWidget(self.central_widget)
+        self.frame_scheduler.target = self.canvas
+        self.update()
+        return True
+
+    def use_software_renderer(self):
+        if self.canvas is None:
+            return
+        self.canvas = None
+        self.central_widget = QWidget()
+        if self.is_overlay_movable:
+            self.central_widget.setStyleSheet("background-color: rgba(255, 255, 255, 150);")
+        # deletes the GL canvas
+        self.setCentralWidget(self.central_widget)
+        self.frame_scheduler.target = self
+        self.track_pixmap = None
+        self.update()
+
+    def set_show_hud(self, show_hud: bool):
+        # the HUD needs the profiler, which is turned off again with the HUD
+        # unless something else (--profile) enabled it
+        self.show_hud = show_hud
+        if show_hud and not PROFILER.enabled:
+            PROFILER.enable()
+            self.hud_profiling = True
+        elif not show_hud and self.hud_profiling:
+            PROFILER.disable()
+            self.hud_profiling = False
+
+    def invalidate_track_layer(self):
+        self.track_pixmap = None
+        if self.canvas is not None:
+            self.canvas.invalidate_track()
+
+    def view_transform(self, points: np.ndarray):
+        # world -> widget transform as a 2x2 matrix (rotation and scale) and an
+        # offset, fitting the track into 90% of the widget. It only depends on
+        # the track, the widget size and the rotation, so it is cached on those.
+        rotation = self.config['number'].get('track_rotation', 0)
+        key = (self.width(), self.height(), rotation)
+        if self.view_transform_key == key and self.view_transform_points is points:
+            return self.view_transform_matrix, self.view_transform_offset
         
-        min_x = np.min(points[:, 0])
-        max_x = np.max(points[:, 0])
-        min_y = np.min(points[:, 1])
-        max_y = np.max(points[:, 1]) 
+        angle = np.radians(rotation)
+        rotation_matrix = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+        rotated = points[:, :2] @ rotation_matrix.T if rotation else points[:, :2]
+        min_x, min_y = rotated.min(axis=0)
+        max_x, max_y = rotated.max(axis=0)
         track_width = max_x - min_x
         track_height = max_y - min_y
         
@@ -123,120 +237,209 @@ class IRMap(QMainWindow):
         offset_x = (self.width() - track_width * scale) / 2 - min_x * scale
         offset_y = (self.height() - track_height * scale) / 2 - min_y * scale
         
-        points[:, 0] = points[:, 0] * scale + offset_x
-        points[:, 1] = points[:, 1] * scale + offset_y
+        self.view_transform_key = key
+        self.view_transform_points = points
+        self.view_transform_matrix = rotation_matrix * scale
+        self.view_transform_offset = np.array([offset_x, offset_y])
+        return self.view_transform_matrix, self.view_transform_offset
+
+    def update_draw_points(self):
+        # The track points stay in world space and are never written to, the
+        # transformed copy goes into the draw_points buffer, which is reused
+        # while the number of points stays the same.
+        points = self.track_dict['points']
+        if len(points) == 0 or self.window_size == 0:
+            self.draw_points = np.empty((0, 4), dtype=float)
+            return
         
-        return points
+        matrix, offset = self.view_transform(points)
+        if self.draw_points.shape != points.shape:
+            self.draw_points = np.empty(points.shape, dtype=float)
+        self.draw_points[:, :2] = points[:, :2] @ matrix.T + offset
+        self.draw_points[:, 2:] = points[:, 2:]
+
+    def update_track_geometry(self):
+        self.track_index = track_index(self.track_dict)
+        self.update_draw_points()
+        self.static_path = self.create_static_path()
+        self.invalidate_track_layer()
+        self.cars = None
     
     def create_static_path(self):
         # print(len(self.draw_points))
         if len(self.draw_points) < 2:
             return QPainterPath()
         
+        # drop the vertices that are within a fraction of a device pixel of
+        # the simplified line, most of them on the straights
+        tolerance = self.PATH_TOLERANCE * self.window_size / 1000 / self.devicePixelRatioF()
+        indices = simplify(self.draw_points[:, :2], tolerance)
+        
         path = QPainterPath()
-        start_x = self.draw_points[0, 0]
-        start_y = self.draw_points[0, 1]
-        path.moveTo(start_x, start_y)
-            
-        for i in range(1, len(self.draw_points)):
-            x = self.draw_points[i, 0]
-            y = self.draw_points[i, 1]
-            path.lineTo(x, y)
+        path.addPolygon(to_polygon(self.draw_points[indices]))
         
         return path
         
+    def render_track_layer(self):
+        # the track only changes with the track, size or config, so it is drawn
+        # once into a pixmap at the screen's device pixel ratio and blitted
+        dpr = self.devicePixelRatioF()
+        self.track_pixmap = QPixmap(self.size() * dpr)
+        self.track_pixmap.setDevicePixelRatio(dpr)
+        self.track_pixmap.fill(Qt.transparent)
+        
+        painter = QPainter(self.track_pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        
+        # draw the track
+        
+        outline_pen = QPen(self.config['color']['outline_color'], self.track_width + self.track_outline_width * 2)
+        painter.setPen(outline_pen)
+        painter.drawPath(self.static_path)
+            
+        painter.setPen(QPen(self.config['color']['track_color'], self.track_width))
+        painter.drawPath(self.static_path)
+        
+        # # draw the s/f line
+        first_point = self.draw_points[0]
+        angle = self.sf_angle()
+        rect_x = first_point[0]
+        rect_y = first_point[1]
+        
+        painter.translate(rect_x, rect_y)
+        painter.rotate(angle)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.config['color']['sf_color'])
+        sf_height = self.track_width + self.track_outline_width * 2
+        painter.drawRect(-self.track_width / 3, -sf_height / 2, self.track_width / 3 * 2, sf_height)
+        
+        painter.end()
+        
+    def sf_angle(self) -> float:
+        # the S/F marker lies along the line from the first point back to the
+        # last; on a closed track these are the same point, there the line
+        # back from the second point is used
+        first_point = self.draw_points[0, :2]
+        last_point = self.draw_points[-1, :2]
+        if np.hypot(*(last_point - first_point)) < 1e-6:
+            last_point = 2 * first_point - self.draw_points[1, :2]
+        return np.arctan2(last_point[1] - first_point[1], last_point[0] - first_point[0]) * 180 / np.pi
+
+    def frame_stats(self) -> dict:
+        # frame rate, paint times and request counts, whichever renderer paints
+        return self.frame_scheduler.stats()
+        
     def paintEvent(self, event):
+        if self.canvas is not None:
+            # the GL canvas draws everything
+            return
+        self.frame_scheduler.begin_frame()
+        now = time.perf_counter()
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
         painter.fillRect(self.rect(), Qt.transparent)
         if len(self.draw_points) > 1:
             
             # draw the track
-            
-            outline_pen = QPen(self.config['color']['outline_color'], self.track_width + self.track_outline_width * 2)
-            painter.setPen(outline_pen)
-            painter.drawPath(self.static_path)
-                
-            painter.setPen(QPen(self.config['color']['track_color'], self.track_width))
-            painter.drawPath(self.static_path)
-            
-            # # draw the s/f line
-            painter.save()
-            first_point = self.draw_points[0]
-            last_point = self.draw_points[-1]
-            angle = np.arctan2(last_point[1] - first_point[1], last_point[0] - first_point[0]) * 180 / np.pi
-            rect_x = first_point[0]
-            rect_y = first_point[1]
-            
-            painter.translate(rect_x, rect_y)
-            painter.rotate(angle)
-            painter.setPen(Qt.NoPen)
-            painter.setBrush(self.config['color']['sf_color'])
-            sf_height = self.track_width + self.track_outline_width * 2
-            painter.drawRect(-self.track_width / 3, -sf_height / 2, self.track_width / 3 * 2, sf_height)
-            
-            painter.restore()
+            if self.track_pixmap is None \
+            or self.track_pixmap.devicePixelRatio() != self.devicePixelRatioF() \
+            or self.track_pixmap.size() != self.size() * self.devicePixelRatioF():
+                self.render_track_layer()
+            painter.drawPixmap(0, 0, self.track_pixmap)
             
             # draw cars
-            for driver in self.telemetry['drivers']:
-                painter.save()
-                car_idx = driver['CarIdx']
-                car_class_position = self.telemetry['other_class_posts'][car_idx]
-                car_number = driver['CarNumber']
-                car_class_color = driver['CarClassColor']
-                closest_point = np.argmin(
-                    np.abs(self.draw_points[:, 2] - self.telemetry['other_ld_pcts'][car_idx])
-                )
-                car_position = self.draw_points[closest_point, :2]
-                car_x = car_position[0]
-                car_y = car_position[1]
+            number_color = self.config['color']['number_color']
+            dpr = self.devicePixelRatioF()
+            positions = self.car_positions(now)
+            # rects reused for every car, the number is a cached pixmap
+            car_rect = QRectF()
+            label_rect = QRectF()
+            for (car_x, car_y), (car_size, pen, brush, opacity, car_number) in zip(positions, self.cars):
+                painter.setOpacity(opacity)
+                painter.setPen(pen)
+                painter.setBrush(brush)
+                car_rect.setRect(car_x - car_size, car_y - car_size, car_size * 2, car_size * 2)
+                painter.drawEllipse(car_rect)
                 
-                if car_idx == self.telemetry['player_idx']:
-                    painter.setPen(QPen(self.config['color']['player_outline_color'], self.car_outline_width))
-                    painter.setBrush(self.config['color']['player_color'])
-                    car_size = self.car_size * self.config['number']['player_scale']
-                else:
-                    painter.setPen(Qt.NoPen)
-                    if driver['CarClassID'] == self.telemetry['player_class']:
-                        if car_class_position == self.telemetry['player_class_pos'] - 1 and self.telemetry['player_class_pos'] -1 > 0:
-                            painter.setPen(QPen(self.config['color']['next_outline_color'], self.car_outline_width))
-                        if car_class_position == self.telemetry['player_class_pos'] + 1 and self.telemetry['player_class_pos'] > 0:
-                            painter.setPen(QPen(self.config['color']['prev_outline_color'], self.car_outline_width))
-                        painter.setOpacity(self.config['number']['other_car_opacity'])
-                    else:
-                        painter.setOpacity(self.config['number']['other_class_opacity']*self.config['number']['other_car_opacity'])
-                    if car_class_color == QColor(255, 255, 255):
-                        car_class_color = self.config['color']['other_color']
-                    painter.setBrush(car_class_color)
-                    car_size = self.car_size
+                label, source_rect = self.labels.label(car_number, car_size, number_color, dpr)
+                label_rect.setRect(car_x - car_size * 2, car_y - car_size, car_size * 4, car_size * 2)
+                painter.drawPixmap(label_rect, label, source_rect)
+        if self.show_hud:
+            draw_hud(painter, self.frame_stats()['fps'], self.acquisition_stats)
+        painter.end()
+        self.frame_scheduler.end_frame()
+        if self.motion.is_moving(now):
+            # keep animating between telemetry samples
+            self.frame_scheduler.schedule()
 
-                if self.telemetry['other_trk_surfs'][car_idx] == 1 or self.telemetry['other_trk_surfs'][car_idx] == 2:
-                    painter.setOpacity(0.4)
-                if self.telemetry['other_trk_surfs'][car_idx] == -1:
-                    painter.setOpacity(0.0)
-                    
-                painter.drawEllipse(QPointF(car_x, car_y), car_size, car_size)
-                
-                painter.setPen(QColor(self.config['color']['number_color']))
-                self.font_family.setPointSizeF(car_size * 0.8)
-                painter.setFont(self.font_family)
-                s = car_size * 2
-                text_rect = QRectF(
-                    car_x - s / 2, 
-                    car_y - s / 2, 
-                    s, 
-                    s
-                )
-                if self.config['bool']['show_position']:
-                    car_number = str(car_class_position) if car_class_position > 0 else '-'
-                painter.drawText(text_rect, Qt.AlignCenter, str(car_number))
-                
-                painter.restore()
+    def interpolate_positions(self, ld_pcts: np.ndarray):
+        # positions of all cars at once, linear between the two track points
+        # around each LapDistPct, found through the track index's buckets
+        lower, upper, ratio = self.track_index.lookup(ld_pcts)
+        ratio = ratio[:, None]
+        return self.draw_points[lower, :2] * (1 - ratio) + self.draw_points[upper, :2] * ratio
+
+    def car_positions(self, now: float = None):
+        # positions of the cars in self.cars at the time of the frame, moved on
+        # from the last telemetry sample by the motion smoothing
+        if self.cars is None:
+            self.update_cars()
+        if len(self.car_idxs) == 0:
+            return np.empty((0, 2), dtype=float)
+        return self.interpolate_positions(self.motion.ld_pcts_at(now)[self.car_idxs])
+
+    def update_cars(self):
+        # car styles, worked out once per telemetry tick instead of on every
+        # repaint, the positions follow per frame from car_positions(). Pens
+        # and brushes come from the VM's cache and are not rebuilt per tick.
+        self.cars = []
+        self.car_idxs = np.empty(0, dtype=int)
+        drivers = self.session_info['drivers']
+        if len(drivers) == 0 or len(self.draw_points) < 2:
+            return
+        car_idxs = np.array([driver['CarIdx'] for driver in drivers])
+        car_class_positions = self.telemetry['other_class_posts'][car_idxs]
+        trk_surfs = self.telemetry['other_trk_surfs'][car_idxs]
+        player_class_pos = self.telemetry['player_class_pos']
+        styles = self.vm.car_styles
+        numbers = self.config['number']
+        
+        drawn = []
+        for driver, car_idx, car_class_position, trk_surf in zip(drivers, car_idxs, car_class_positions, trk_surfs):
+            if trk_surf == -1:
+                # not in the world, would be drawn fully transparent
+                continue
+            opacity = 1.0
+            if driver['CarIdx'] == self.telemetry['player_idx']:
+                pen = styles.pen('player_outline_color', self.car_outline_width)
+                brush = styles.brush('player_color')
+                car_size = self.car_size * numbers['player_scale']
+            else:
+                pen = Qt.NoPen
+                if driver['CarClassID'] == self.telemetry['player_class']:
+                    if car_class_position == player_class_pos - 1 and player_class_pos - 1 > 0:
+                        pen = styles.pen('next_outline_color', self.car_outline_width)
+                    if car_class_position == player_class_pos + 1 and player_class_pos > 0:
+                        pen = styles.pen('prev_outline_color', self.car_outline_width)
+                    opacity = numbers['other_car_opacity']
+                else:
+                    opacity = numbers['other_class_opacity'] * numbers['other_car_opacity']
+                brush = styles.class_brush(driver['CarClassColor'])
+                car_size = self.car_size
+            
+            if trk_surf == 1 or trk_surf == 2:
+                opacity = 0.4
+            
+            car_number = driver['CarNumber']
+            if self.config['bool']['show_position']:
+                car_number = str(car_class_position) if car_class_position > 0 else '-'
+            drawn.append(car_idx)
+            self.cars.append((car_size, pen, brush, opacity, str(car_number)))
+        self.car_idxs = np.array(drawn, dtype=int)
 
     def resizeEvent(self, event):
         if len(self.track_dict['points']) > 0:  
-            self.draw_points = self.rescale_track(self.track_dict['points'])
-            self.static_path = self.create_static_path()
+            self.update_track_geometry()
         event.accept()
         
     def mousePressEvent(self, event):
@@ -0,0 +1,52 @@
+from PySide6.QtGui import QPainter, QPixmap, QFont, QColor
+from PySide6.QtCore import Qt, QRectF
+from collections import OrderedDict
+import math
+
+class LabelCache:
+    # Car numbers rendered once into pixmaps, keyed by text, marker size,
+    # color and device pixel ratio, so a frame blits them instead of laying
+    # out the text of every car again. Beyond capacity the least recently
+    # used labels are dropped.
+    CAPACITY = 256
+
+    def __init__(self, font: QFont, capacity: int = CAPACITY):
+        self.font = QFont(font)
+        self.capacity = capacity
+        self.labels = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.labels.clear()
+
+    def label(self, text: str, size: float, color: QColor, dpr: float) -> tuple:
+        # (pixmap, source rect) of a label centered like drawText(AlignCenter)
+        # in a rect 4 * size wide and 2 * size high around the marker center
+        key = (text, size, color.rgba(), dpr)
+        label = self.labels.get(key)
+        if label is not None:
+            self.labels.move_to_end(key)
+            self.hits += 1
+            return label
+        self.misses += 1
+        label = self.labels[key] = self.render(text, size, color, dpr)
+        if len(self.labels) > self.capacity:
+            self.labels.popitem(last=False)
+        return label
+
+    def render(self, text: str, size: float, color: QColor, dpr: float) -> tuple:
+        # wider than the marker, so long numbers are not cut off
+        width = size * 4
+        height = size * 2
+        pixmap = QPixmap(math.ceil(width * dpr), math.ceil(height * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(color)
+        self.font.setPointSizeF(size * 0.8)
+        painter.setFont(self.font)
+        painter.drawText(QRectF(0, 0, width, height), Qt.AlignCenter, text)
+        painter.end()
+        return pixmap, QRectF(0, 0, width * dpr, height * dpr)
@@ -0,0 +1,67 @@
+from ..model.telemetry import MAX_CARS
+import numpy as np
+import time
+
+class MotionSmoother:
+    # Keeps the last LapDistPct of every CarIdx and its rate of change between
+    # the last two samples (in SessionTime), and moves the cars on between
+    # samples so the overlay can draw more frames than telemetry delivers.
+    #   'extrapolate'  continue from the last sample, at most max_extrapolation s
+    #   'interpolate'  draw one sample interval behind, between the last two samples
+    #   'off'          the last sample as it is
+    # A change of more than MAX_JUMP of a lap between two samples (tow, reset,
+    # pit teleport) is not animated.
+    MODES = ('extrapolate', 'interpolate', 'off')
+    MAX_JUMP = 0.05
+
+    def __init__(self, mode: str = 'extrapolate', max_extrapolation: float = 0.1):
+        self.mode = mode if mode in self.MODES else 'off'
+        self.max_extrapolation = max_extrapolation
+        self.reset()
+
+    def reset(self):
+        self.ld_pcts = np.full(MAX_CARS, -1.0)
+        self.rates = np.zeros(MAX_CARS)
+        self.session_time = None
+        self.interval = 0.0
+        self.received = 0.0
+
+    def set_mode(self, mode: str):
+        self.mode = mode if mode in self.MODES else 'off'
+
+    def update(self, ld_pcts: np.ndarray, session_time: float, now: float = None):
+        ld_pcts = np.asarray(ld_pcts, dtype=float)
+        if self.session_time is not None and session_time > self.session_time:
+            interval = session_time - self.session_time
+            # shortest way round the lap, so 0.99 -> 0.01 is +0.02
+            deltas = (ld_pcts - self.ld_pcts + 0.5) % 1.0 - 0.5
+            valid = (ld_pcts >= 0) & (self.ld_pcts >= 0) & (np.abs(deltas) < self.MAX_JUMP)
+            self.rates = np.where(valid, deltas / interval, 0.0)
+            self.interval = interval
+        elif self.session_time is None or session_time < self.session_time:
+            # first sample or a new session
+            self.rates = np.zeros(MAX_CARS)
+            self.interval = 0.0
+        self.ld_pcts = ld_pcts.copy()
+        self.session_time = session_time
+        self.received = time.perf_counter() if now is None else now
+
+    def elapsed(self, now: float = None) -> float:
+        return (time.perf_counter() if now is None else now) - self.received
+
+    def ld_pcts_at(self, now: float = None) -> np.ndarray:
+        if self.mode == 'off' or self.session_time is None:
+            return self.ld_pcts
+        elapsed = self.elapsed(now)
+        if self.mode == 'interpolate':
+            offset = min(max(elapsed - self.interval, -self.interval), 0.0)
+        else:
+            offset = min(max(elapsed, 0.0), self.max_extrapolation)
+        return np.where(self.ld_pcts >= 0, (self.ld_pcts + self.rates * offset) % 1.0, self.ld_pcts)
+
+    def is_moving(self, now: float = None) -> bool:
+        # whether frames drawn now would still differ from the last one
+        if self.mode == 'off' or not self.rates.any():
+            return False
+        limit = self.interval if self.mode == 'interpolate' else self.max_extrapolation
+        return self.elapsed(now) < limit
@@ -0,0 +1,63 @@
+from PySide6.QtGui import QPolygonF
+from PySide6.QtCore import QByteArray, QDataStream, QIODevice
+import numpy as np
+import struct
+
+def simplify(points: np.ndarray, tolerance: float) -> np.ndarray:
+    # Ramer-Douglas-Peucker: indices of the points to keep so that no dropped
+    # point is further than tolerance from the simplified line. All segments
+    # of one level of the recursion are split together in a few array ops.
+    n = len(points)
+    if n < 3 or tolerance <= 0:
+        return np.arange(n)
+    x = np.ascontiguousarray(points[:, 0], dtype=float)
+    y = np.ascontiguousarray(points[:, 1], dtype=float)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    starts = np.array([0])
+    ends = np.array([n - 1])
+    while len(starts) > 0:
+        counts = ends - starts - 1
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        segment_ids = np.repeat(np.arange(len(starts)), counts)
+        indices = np.arange(counts.sum()) + np.repeat(starts + 1 - offsets, counts)
+        
+        # distance of every inner point from the chord of its segment
+        first = np.repeat(starts, counts)
+        last = np.repeat(ends, counts)
+        dx = x[last] - x[first]
+        dy = y[last] - y[first]
+        px = x[indices] - x[first]
+        py = y[indices] - y[first]
+        length = np.hypot(dx, dy)
+        distances = np.abs(dx * py - dy * px)
+        np.divide(distances, length, out=distances, where=length > 0)
+        # a closed chord (start == end) measures the distance to that point
+        closed = length == 0
+        distances[closed] = np.hypot(px[closed], py[closed])
+        
+        # farthest point of every segment
+        max_distances = np.maximum.reduceat(distances, offsets)
+        is_max = distances == max_distances[segment_ids]
+        split_segments, first_max = np.unique(segment_ids[is_max], return_index=True)
+        splits = indices[is_max][first_max]
+        split = max_distances[split_segments] > tolerance
+        split_segments = split_segments[split]
+        splits = splits[split]
+        keep[splits] = True
+        
+        starts = np.concatenate((starts[split_segments], splits))
+        ends = np.concatenate((splits, ends[split_segments]))
+        active = ends - starts >= 2
+        starts = starts[active]
+        ends = ends[active]
+    return np.flatnonzero(keep)
+
+
+def to_polygon(points: np.ndarray) -> QPolygonF:
+    # build the QPolygonF in one go from its QDataStream form (point count,
+    # then x/y as big-endian doubles) instead of one QPointF per vertex
+    data = QByteArray(struct.pack('>I', len(points)) + np.ascontiguousarray(points[:, :2], dtype='>f8').tobytes())
+    polygon = QPolygonF()
+    QDataStream(data, QIODevice.ReadOnly) >> polygon
+    return polygon
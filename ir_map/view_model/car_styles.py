@@ -0,0 +1,38 @@
+from PySide6.QtGui import QPen, QBrush, QColor
+
+WHITE = QColor(255, 255, 255)
+
+class CarStyles:
+    # Pens and brushes for the car markers, built once per color and outline
+    # width and shared by every tick and frame. Config colors are looked up by
+    # their key, class colors by value (white classes get other_color). The
+    # cache follows the config dict it was given and is cleared by IRMapVM
+    # whenever the config changes, nothing else invalidates it.
+    def __init__(self, config: dict):
+        self.config = config
+        self.clear()
+
+    def clear(self):
+        self.pens = {}
+        self.brushes = {}
+
+    def pen(self, key: str, width: float) -> QPen:
+        pen = self.pens.get((key, width))
+        if pen is None:
+            pen = self.pens[(key, width)] = QPen(self.config['color'][key], width)
+        return pen
+
+    def brush(self, key: str) -> QBrush:
+        brush = self.brushes.get(key)
+        if brush is None:
+            brush = self.brushes[key] = QBrush(self.config['color'][key])
+        return brush
+
+    def class_brush(self, car_class_color: QColor) -> QBrush:
+        if car_class_color == WHITE:
+            return self.brush('other_color')
+        rgba = car_class_color.rgba()
+        brush = self.brushes.get(rgba)
+        if brush is None:
+            brush = self.brushes[rgba] = QBrush(car_class_color)
+        return brush
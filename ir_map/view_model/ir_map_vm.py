@@ -1,13 +1,20 @@
 from PySide6.QtCore import QObject, Signal
 from PySide6.QtGui import QColor
-from ..model import Model
+from ..model import Model, Telemetry
+from .car_styles import CarStyles
+from ..profiling import PROFILER
+import logging
 import os
 
+log = logging.getLogger(__name__)
+
 class IRMapVM(QObject):
     
     track_updated = Signal(dict)
     config_updated = Signal(str, str, object)
-    telemetry_updated = Signal(dict)
+    telemetry_updated = Signal(object)
+    acquisition_stats_updated = Signal(dict)
+    session_info_updated = Signal(dict)
     ir_connected = Signal(dict)
     ir_disconnected = Signal() 
     is_overlay_movable_changed = Signal(bool)
@@ -18,14 +25,18 @@ class IRMapVM(QObject):
         
         self.model.track_updated.connect(self._on_track_updated)
         self.model.config_updated.connect(self._on_config_updated)
+        self.model.session_info_updated.connect(self._on_session_info_updated)
         self.model.telemetry_updated.connect(self._on_telemetry_updated)
+        self.model.acquisition_stats_updated.connect(self._on_acquisition_stats_updated)
         self.model.ir_connected.connect(self._on_ir_connected)
         self.model.ir_disconnected.connect(self._on_ir_disconnected)
 
 
         self.track_dict = self.model.track_dict.copy()
         self.init_config(self.model.config)
-        self.telemetry = self.model.telemetry.copy()
+        self.init_session_info(self.model.session_info)
+        self.telemetry = self.model.telemetry
+        self.acquisition_stats = self.model.acquisition_stats.copy()
         
         self.is_overlay_movable = False
         
@@ -39,13 +50,21 @@ class IRMapVM(QObject):
         if key1 == 'bool':
             value = bool(value)
         self.config[key1][key2] = value
+        self.car_styles.clear()
         self.config_updated.emit(key1, key2, value)
         
-    def _on_telemetry_updated(self, telemetry: dict):
-        self.telemetry = telemetry.copy()
-        for driver in self.telemetry['drivers']:
-            driver['CarClassColor'] = QColor(hex(driver['CarClassColor']).replace('0x', '#'))
-        self.telemetry_updated.emit(telemetry)
+    def _on_session_info_updated(self, session_info: dict):
+        self.init_session_info(session_info)
+        self.session_info_updated.emit(self.session_info)
+        
+    def _on_telemetry_updated(self, telemetry: Telemetry):
+        with PROFILER.span('view model'):
+            self.telemetry = telemetry
+            self.telemetry_updated.emit(telemetry)
+
+    def _on_acquisition_stats_updated(self, stats: dict):
+        self.acquisition_stats = stats.copy()
+        self.acquisition_stats_updated.emit(stats)
         
     def _on_ir_connected(self, track_dict: dict):
         self.track_dict = track_dict.copy()
@@ -69,9 +88,15 @@ class IRMapVM(QObject):
         self.is_overlay_movable_changed.emit(is_overlay_movable)
         
     def delete_track(self):
-        print('delete_track')
+        log.info('delete_track')
         self.model.delete_track()
         
+    def init_session_info(self, session_info: dict):
+        self.session_info = session_info.copy()
+        self.session_info['drivers'] = [dict(driver, CarClassColor=QColor(hex(driver['CarClassColor']).replace('0x', '#')))
+                                        for driver in session_info['drivers']]
+        
     def init_config(self, config: dict):
         self.config = config.copy()
         self.config['color'] = {key: QColor(value) for key, value in config['color'].items()}
+        self.car_styles = CarStyles(self.config)
@@ -0,0 +1,12 @@
+import argparse
+import os
+from ir_map.model.track_store import migrate_legacy_tracks
+
+# one-shot conversion of pickled tracks (tracks/*.pkl) to the binary .trk format
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='convert pickled tracks to the binary track format')
+    parser.add_argument('tracks_path', nargs='?', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tracks'))
+    parser.add_argument('--remove', action='store_true', help='delete the .pkl files after converting')
+    args = parser.parse_args()
+    for track_path in migrate_legacy_tracks(args.tracks_path, args.remove):
+        print(f'migrated: {track_path}')
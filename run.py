@@ -1,4 +1,15 @@
+import argparse
 import ir_map
 
 if __name__ == "__main__":
-    ir_map.main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--record', metavar='DIR', help='record telemetry to a recording directory')
+    parser.add_argument('--replay', metavar='DIR', help='play a recording back instead of connecting to iRacing')
+    parser.add_argument('--speed', type=float, default=1.0, help='replay speed, 0 for as fast as possible')
+    parser.add_argument('--loop', action='store_true', help='restart the replay when it ends')
+    parser.add_argument('--headless', action='store_true', help='run without a display')
+    parser.add_argument('--log-level', default='warning', choices=['debug', 'info', 'warning', 'error'],
+                        help='messages to log (default: %(default)s)')
+    parser.add_argument('--profile', metavar='PATH', help='time the pipeline and write a Chrome trace JSON on exit')
+    args = parser.parse_args()
+    ir_map.main(args.record, args.replay, args.speed, args.loop, args.headless, args.log_level, args.profile)